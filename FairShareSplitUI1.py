@@ -1,26 +1,17 @@
 import streamlit as st
-import pandas as pd
-import copy
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
+from io import BytesIO, StringIO
 
-def normalize_name(name):
-    """
-    Normalize a name by trimming whitespace and converting to title case
-    
-    Args:
-        name: Raw name string
-    
-    Returns:
-        str: Normalized name (trimmed and title case)
-    """
-    if not name or not isinstance(name, str):
-        return ""
-    return name.strip().title()
+from fairshare.cache import parsed_uploads, rendered_exports, result_key
+from fairshare.feed import FeedRunner
+from fairshare.core import IncrementalSplit, money_owed
+from fairshare.export import EXPORT_FILE_TYPES, EXPORT_FORMATS, EXPORT_TABLES, export_bytes, parquet_available
+from fairshare.ingest import read_serving_table, split_serving_table
+from fairshare.lazy import import_cost_report, load
+from fairshare.ledger import split_bills, trip_ledger, unique_bill_names
+from fairshare.report import write_pdf_report, write_statements_zip, write_text_report
+from fairshare.session import SESSION_FILE_NAME, SESSION_MIME, dump_session, load_session
+from fairshare.validate import KNOWN_MARKS, BillValidationError
+from fairshare.workbook import parse_workbook, split_workbook_tables
 
 def format_item_display(item_name, cost, num_people_shared):
     """
@@ -41,333 +32,270 @@ def format_item_display(item_name, cost, num_people_shared):
         fraction_str = f"{1}/{num_people_shared}"
         return f"{fraction_str} of {item_name}: ${cost:.2f}"
 
-def normalize_names_list(names):
+def compact_split_state():
     """
-    Normalize a list of names by trimming whitespace and converting to title case
+    Incremental split of the Compact UI items
     
-    Args:
-        names: List of name strings (can include comma-separated values)
+    Kept in step with st.session_state['compact_items'] and
+    st.session_state['ignored_items'], and rebuilt if they were replaced.
     
     Returns:
-        list: List of normalized names
+        tuple: (IncrementalSplit, list of split keys parallel to compact_items)
     """
-    if not names:
-        return []
-    
-    normalized = []
-    for name_entry in names:
-        if not name_entry or not isinstance(name_entry, str):
-            continue
-            
-        # Split by comma if the entry contains commas
-        if ',' in name_entry:
-            # Split by comma and process each part
-            name_parts = name_entry.split(',')
-            for part in name_parts:
-                normalized_name = normalize_name(part)
-                if normalized_name:  # Only add non-empty names
-                    normalized.append(normalized_name)
-        else:
-            # Single name, normalize it
-            normalized_name = normalize_name(name_entry)
-            if normalized_name:  # Only add non-empty names
-                normalized.append(normalized_name)
-    
-    return normalized
+    items = st.session_state.get('compact_items', [])
+    keys = st.session_state.get('compact_item_keys')
+    if 'compact_split' not in st.session_state or keys is None or len(keys) != len(items):
+        split = IncrementalSplit()
+        keys = [split.add_item(*item) for item in items]
+        for idx in st.session_state.get('ignored_items', set()):
+            if idx < len(keys):
+                split.ignore_item(keys[idx])
+        st.session_state['compact_split'] = split
+        st.session_state['compact_item_keys'] = keys
+    return st.session_state['compact_split'], keys
 
-def money_owed(items, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
-    person_list = []
+def add_compact_item(item):
+    """Append an (item_name, cost, [people]) tuple to the Compact UI items and the split"""
+    split, keys = compact_split_state()
+    st.session_state['compact_items'].append(item)
+    keys.append(split.add_item(*item))
 
-    for item, cost, names in items:
-        # Normalize the names for this item
-        normalized_names = normalize_names_list(names)
-        for name in normalized_names:
-            person_list.append(name)
+def calculation_inputs(items, *charges):
+    """
+    What a manual split is calculated from, to compare across reruns
 
-    person_list = list(set(person_list))  # Remove duplicates
-    
-    # Get list of all people (excluding the everyone marker)
-    all_people = [p for p in person_list if p != "__EVERYONE__"]
-    
-    # Now replace __EVERYONE__ with actual people
-    resolved_items = []
-    for item, cost, names in items:
-        if "__EVERYONE__" in names:
-            # Replace with all people
-            resolved_names = all_people
-        else:
-            resolved_names = names
-        resolved_items.append((item, cost, resolved_names))
-    items = resolved_items
-    
-    # Rebuild person_list with resolved items
-    person_list = []
-    for item, cost, names in items:
-        normalized_names = normalize_names_list(names)
-        for name in normalized_names:
-            person_list.append(name)
-    person_list = list(set(person_list))  # Remove duplicates
-    
-    person_dict = dict.fromkeys(person_list)
+    Calculate stores this in st.session_state, and the results stay on screen
+    only while the current items and charges still match it.
+    """
+    return [(name, cost, tuple(people)) for name, cost, people in items], charges
 
-    for x in person_dict.keys():
-        person_dict[x] = 0
+def upload_content(uploaded_file):
+    """Raw bytes of an uploaded file (or of a path, for scripts)"""
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    with open(uploaded_file, "rb") as f:
+        return f.read()
 
-    person_dict_percent_of_bill = copy.deepcopy(person_dict)
-    person_dict_final = copy.deepcopy(person_dict)
-    
-    # New: Track items each person ate
-    person_items = {person: [] for person in person_list}
-    
-    # New: Track individual costs for each person
-    person_individual_costs = {person: 0 for person in person_list}
-
-    running_total_preTaxTip = 0
+def parse_csv_upload(content):
+    """Read CSV bytes into a serving table, showing a progress bar"""
+    # CSV files are read in chunks, so large uploads can show their progress
+    progress_bar = st.progress(0.0, text="Reading bill...")
+    def show_progress(rows_processed, bytes_read, total_bytes):
+        fraction = min(bytes_read / total_bytes, 1.0) if total_bytes else 0.0
+        progress_bar.progress(fraction, text=f"Read {rows_processed:,} rows ({bytes_read / 1_000_000:.1f} MB)")
+    try:
+        return read_serving_table(BytesIO(content), "csv", progress=show_progress)
+    finally:
+        progress_bar.empty()
 
-    for item, cost, names in items:
-        # Normalize names for this item
-        normalized_names = normalize_names_list(names)
-        if not normalized_names:  # Skip items with no valid names
-            continue
-            
-        split_cost_of_item = cost / len(normalized_names)
-        running_total_preTaxTip += split_cost_of_item * len(normalized_names)
+def show_validation_errors(error, file_name=None):
+    """Show the problems found in a rejected upload, one row per cell"""
+    where = ", ".join(part for part in (file_name, error.source) if part)
+    where = f" ({where})" if where else ""
+    st.error(f"The file was not split because it has problems{where}. Fix these cells and upload it again:")
+    st.dataframe(
+        [{'Row': e.row, 'Column': e.column, 'Value': "" if e.value is None else str(e.value), 'Problem': e.message}
+         for e in error.errors],
+        use_container_width=True,
+        hide_index=True,
+    )
 
-        for name in normalized_names:
-            person_dict[name] += split_cost_of_item
-            # Track what each person ate and their individual costs, including how many people shared the item
-            person_items[name].append((item, split_cost_of_item, len(normalized_names)))
-            person_individual_costs[name] += split_cost_of_item
+def parse_upload(content, file_type, show_progress=True):
+    """
+    Serving table of an uploaded bill (the first sheet of workbooks)
 
-    total_tax_tip_fees = tax_amount + tip_amount + extra_fees
+    Parsed tables are cached by file content, so reruns only redo the split.
+    Without the progress bar nothing is drawn, so uploads can be parsed from
+    worker threads.
+    """
+    if file_type == "csv":
+        if show_progress:
+            return parsed_uploads.get_or_parse(content, "csv", lambda: parse_csv_upload(content))
+        return parsed_uploads.get_or_parse(content, "csv", lambda: read_serving_table(BytesIO(content), "csv"))
+    sheet_tables = parsed_uploads.get_or_parse(
+        content, "excel-first-sheet", lambda: parse_workbook(content, workers=1, sheets=1))
+    return next(iter(sheet_tables.values()))
 
-    for person in person_dict_percent_of_bill.keys():
-        person_dict_percent_of_bill[person] = person_dict[person] / running_total_preTaxTip
+def owed_from_xl(filepath, tax_amount, tip_amount, file_type="excel", extra_fees=0.0, discount_amount=0.0):
+    """Read bill data from Excel or CSV file"""
+    try:
+        table = parse_upload(upload_content(filepath), file_type)
+        return split_serving_table(table, tax_amount, tip_amount, extra_fees, discount_amount)
+    except BillValidationError as e:
+        show_validation_errors(e)
+        return None, None, None
+    except Exception as e:
+        st.error(f"Error reading file: {str(e)}")
+        return None, None, None
 
-    for person in person_dict:
-        person_tip_to_pay = person_dict_percent_of_bill[person] * tip_amount
-        person_tax_to_pay = person_dict_percent_of_bill[person] * tax_amount
-        person_extra_fees_to_pay = person_dict_percent_of_bill[person] * extra_fees
-        person_discount_to_apply = person_dict_percent_of_bill[person] * discount_amount
-        person_tax_tip_fees_to_pay = person_tax_to_pay + person_tip_to_pay + person_extra_fees_to_pay
-        person_final_total = person_tax_tip_fees_to_pay + person_dict[person] - person_discount_to_apply
-        person_dict_final[person] = round(person_final_total, 2)
+def split_uploads(uploaded_files, tax_amount, tip_amount, file_type="excel", extra_fees=0.0, discount_amount=0.0):
+    """
+    Split several uploaded bills at once, each as its own bill
 
-    # New: Return detailed breakdown
-    detailed_results = {}
-    for person in person_list:
-        person_percentage = person_dict_percent_of_bill[person]
-        person_tax = person_dict_percent_of_bill[person] * tax_amount
-        person_tip = person_dict_percent_of_bill[person] * tip_amount
-        
-        person_extra_fees = person_dict_percent_of_bill[person] * extra_fees
-        person_discount = person_dict_percent_of_bill[person] * discount_amount
-        
-        detailed_results[person] = {
-            'items_eaten': person_items[person],
-            'subtotal_before_tax_tip': round(person_individual_costs[person], 2),
-            'percentage_of_bill': round(person_percentage * 100, 2),
-            'tax_amount': round(person_tax, 2),
-            'tip_amount': round(person_tip, 2),
-            'extra_fees_amount': round(person_extra_fees, 2),
-            'discount_amount': round(person_discount, 2),
-            'final_total': round(person_dict_final[person], 2)
-        }
+    Files are parsed and split concurrently on a thread pool, the way
+    owed_from_xl does one of them. Files that fail are reported on the page.
 
-    return detailed_results, person_dict_final, running_total_preTaxTip
+    Returns:
+        dict: {bill_name: money_owed result tuple} of the files that split
+    """
+    names = unique_bill_names([getattr(uploaded_file, "name", str(uploaded_file)) for uploaded_file in uploaded_files])
+    contents = {name: upload_content(uploaded_file) for name, uploaded_file in zip(names, uploaded_files)}
 
-def calculate_total_bill(items, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
-    """Calculate the total bill amount including tax, tip, extra fees, and discount"""
-    subtotal = sum(cost for _, cost, _ in items)
-    total = subtotal + tax_amount + tip_amount + extra_fees - discount_amount
-    return subtotal, total
+    def split_content(content):
+        table = parse_upload(content, file_type, show_progress=False)
+        return split_serving_table(table, tax_amount, tip_amount, extra_fees, discount_amount)
 
-def owed_from_xl(filepath, tax_amount, tip_amount, file_type="excel", extra_fees=0.0, discount_amount=0.0):
-    """Read bill data from Excel or CSV file"""
-    try:
-        if file_type == "csv":
-            df = pd.read_csv(filepath)
+    with st.spinner(f"Splitting {len(contents)} bills..."):
+        bill_results, failures = split_bills(contents, split_content)
+    for name, error in failures.items():
+        if isinstance(error, BillValidationError):
+            show_validation_errors(error, name)
         else:
-            df = pd.read_excel(filepath)
-        
-        items = []
-        for index, row in df.iterrows():
-            item_name = row['Item']
-            item_cost = row['amount']
-            # Determine number of servings per person column
-            consumers = []
-            for col in df.columns[2:]:
-                val = row[col]
-                if pd.isnull(val):
-                    continue
-                try:
-                    count = int(val)
-                except:
-                    # non-numeric (e.g., ✓), treat as one serving
-                    count = 1
-                consumers.extend([col] * count)
-            items.append((item_name, item_cost, consumers))
+            st.error(f"Error reading {name}: {str(error)}")
+    return bill_results
+
+def show_trip_ledger(bill_results, key):
+    """
+    Show what each person owes across several bills, with a column per bill
 
-        return money_owed(items, tax_amount, tip_amount, extra_fees, discount_amount)
+    Returns:
+        str: Name of the bill picked for the detailed breakdown
+    """
+    ledger = trip_ledger(bill_results)
+    st.subheader("🧳 Trip Ledger")
+    st.caption(f"Tax, tip and fees are applied to each of the {len(bill_results)} bills.")
+    st.dataframe(
+        [{'Person': person, 'Bills': totals['bills'], 'Total Owed': totals['final_total'],
+          **{bill: totals['by_bill'].get(bill, 0.0) for bill in bill_results}}
+         for person, totals in ledger.items()],
+        use_container_width=True,
+        hide_index=True,
+    )
+    return st.selectbox("Show breakdown for bill:", list(bill_results), key=key)
+
+def workbook_from_xl(filepath, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
+    """Split every sheet of an Excel workbook as its own bill"""
+    try:
+        content = upload_content(filepath)
+        sheet_tables = parsed_uploads.get_or_parse(content, "excel", lambda: parse_workbook(content))
+        return split_workbook_tables(sheet_tables, tax_amount, tip_amount, extra_fees, discount_amount)
+    except BillValidationError as e:
+        show_validation_errors(e)
+        return None, None
     except Exception as e:
         st.error(f"Error reading file: {str(e)}")
-        return None, None, None
+        return None, None
 
 def generate_text_export(simple_breakdown, detailed_breakdowns, totals):
     """Generate a text export of the bill breakdown"""
-    text_content = []
-    text_content.append("=" * 60)
-    text_content.append("FAIR SHARE BILL SPLITTER - BREAKDOWN")
-    text_content.append("=" * 60)
-    text_content.append("")
-    
-    # Simple breakdown
-    text_content.append("SIMPLE BREAKDOWN:")
-    text_content.append("-" * 30)
-    for person, amount in simple_breakdown.items():
-        text_content.append(f"{person}: ${amount:.2f}")
-    text_content.append("")
-    
-    # Totals
-    text_content.append("TOTALS:")
-    text_content.append("-" * 30)
-    text_content.append(f"Subtotal: ${totals['subtotal']:.2f}")
-    text_content.append(f"Tax: ${totals['tax']:.2f}")
-    text_content.append(f"Tip: ${totals['tip']:.2f}")
-    text_content.append(f"Extra Fees: ${totals['extra_fees']:.2f}")
-    if totals.get('discount', 0) > 0:
-        text_content.append(f"Discount: -${totals['discount']:.2f}")
-    text_content.append(f"TOTAL: ${totals['total']:.2f}")
-    text_content.append("")
-    
-    # Detailed breakdowns
-    text_content.append("DETAILED BREAKDOWN:")
-    text_content.append("-" * 30)
-    for person, details in detailed_breakdowns.items():
-        text_content.append(f"\n{person.upper()}:")
-        text_content.append("  Items eaten:")
-        # Display items with fractional portions
-        for item_data in details['items_eaten']:
-            if len(item_data) == 3:  # New format with num_people_shared
-                item, cost, num_people_shared = item_data
-                if num_people_shared == 1:
-                    text_content.append(f"    • {item}: ${cost:.2f}")
-                else:
-                    text_content.append(f"    • 1/{num_people_shared} of {item}: ${cost:.2f}")
-            else:  # Old format
-                item, cost = item_data
-                text_content.append(f"    • {item}: ${cost:.2f}")
-        text_content.append(f"  Item Total: ${details['subtotal_before_tax_tip']:.2f}")
-        text_content.append(f"  Bill %: {details['percentage_of_bill']:.1f}%")
-        text_content.append(f"  Tax ({details['percentage_of_bill']:.1f}%): ${details['tax_amount']:.2f}")
-        text_content.append(f"  Tip ({details['percentage_of_bill']:.1f}%): ${details['tip_amount']:.2f}")
-        text_content.append(f"  Extra Fees ({details['percentage_of_bill']:.1f}%): ${details['extra_fees_amount']:.2f}")
-        if details.get('discount_amount', 0) > 0:
-            text_content.append(f"  Discount ({details['percentage_of_bill']:.1f}%): -${details['discount_amount']:.2f}")
-        text_content.append(f"  FINAL TOTAL: ${details['final_total']:.2f}")
-    
-    return "\n".join(text_content)
+    buffer = StringIO()
+    write_text_report(buffer, simple_breakdown, detailed_breakdowns, totals)
+    return buffer.getvalue()
 
 def generate_pdf_export(simple_breakdown, detailed_breakdowns, totals):
     """Generate a PDF export of the bill breakdown"""
     buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    story.append(Paragraph("FAIR SHARE BILL SPLITTER", title_style))
-    story.append(Paragraph("Bill Breakdown Report", styles['Heading2']))
-    story.append(Spacer(1, 20))
-    
-    # Simple breakdown table
-    story.append(Paragraph("Simple Breakdown", styles['Heading3']))
-    simple_data = [["Person", "Amount Owed"]]
-    for person, amount in simple_breakdown.items():
-        simple_data.append([person, f"${amount:.2f}"])
-    
-    simple_table = Table(simple_data)
-    simple_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(simple_table)
-    story.append(Spacer(1, 20))
-    
-    # Totals
-    story.append(Paragraph("Totals", styles['Heading3']))
-    totals_data = [
-        ["Subtotal", f"${totals['subtotal']:.2f}"],
-        ["Tax", f"${totals['tax']:.2f}"],
-        ["Tip", f"${totals['tip']:.2f}"],
-        ["Extra Fees", f"${totals['extra_fees']:.2f}"]
-    ]
-    
-    # Add discount if present
-    if totals.get('discount', 0) > 0:
-        totals_data.append(["Discount", f"-${totals['discount']:.2f}"])
-    
-    totals_data.append(["TOTAL", f"${totals['total']:.2f}"])
-    
-    totals_table = Table(totals_data)
-    # Get the last row index dynamically
-    last_row = len(totals_data) - 1
-    totals_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, last_row), (-1, last_row), colors.darkblue),
-        ('TEXTCOLOR', (0, last_row), (-1, last_row), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, last_row), (-1, last_row), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, last_row), (-1, last_row), 14),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(totals_table)
-    story.append(Spacer(1, 20))
-    
-    # Detailed breakdowns
-    story.append(Paragraph("Detailed Breakdown", styles['Heading3']))
-    for person, details in detailed_breakdowns.items():
-        story.append(Paragraph(f"<b>{person}</b>", styles['Heading4']))
-        story.append(Paragraph("Items eaten:", styles['Normal']))
-        
-        # Display items with fractional portions
-        for item_data in details['items_eaten']:
-            if len(item_data) == 3:  # New format with num_people_shared
-                item, cost, num_people_shared = item_data
-                if num_people_shared == 1:
-                    story.append(Paragraph(f"  • {item}: ${cost:.2f}", styles['Normal']))
-                else:
-                    story.append(Paragraph(f"  • 1/{num_people_shared} of {item}: ${cost:.2f}", styles['Normal']))
-            else:  # Old format
-                item, cost = item_data
-                story.append(Paragraph(f"  • {item}: ${cost:.2f}", styles['Normal']))
-        
-        story.append(Paragraph(f"Item Total: ${details['subtotal_before_tax_tip']:.2f}", styles['Normal']))
-        story.append(Paragraph(f"Bill %: {details['percentage_of_bill']:.1f}%", styles['Normal']))
-        story.append(Paragraph(f"Tax ({details['percentage_of_bill']:.1f}%): ${details['tax_amount']:.2f}", styles['Normal']))
-        story.append(Paragraph(f"Tip ({details['percentage_of_bill']:.1f}%): ${details['tip_amount']:.2f}", styles['Normal']))
-        story.append(Paragraph(f"Extra Fees ({details['percentage_of_bill']:.1f}%): ${details['extra_fees_amount']:.2f}", styles['Normal']))
-        if details.get('discount_amount', 0) > 0:
-            story.append(Paragraph(f"Discount ({details['percentage_of_bill']:.1f}%): -${details['discount_amount']:.2f}", styles['Normal']))
-        story.append(Paragraph(f"<b>Final Total: ${details['final_total']:.2f}</b>", styles['Normal']))
-        story.append(Spacer(1, 10))
-    
-    doc.build(story)
-    buffer.seek(0)
+    stats = write_pdf_report(simple_breakdown, detailed_breakdowns, totals, buffer)
+    st.session_state['pdf_report_stats'] = stats
     return buffer.getvalue()
 
+def generate_statements_zip(simple_breakdown, detailed_breakdowns, totals):
+    """Generate a ZIP of one PDF statement per person, rendered on a process pool"""
+    buffer = BytesIO()
+    write_statements_zip({"": detailed_breakdowns}, buffer)
+    return buffer.getvalue()
+
+def show_export_buttons(simple_breakdown, detailed_breakdowns, totals, file_stem, key):
+    """
+    Text, PDF and statement ZIP download buttons whose reports are built only when asked for,
+    followed by the data exports
+
+    Each report is rendered on the first click of its Prepare button and kept
+    in rendered_exports under a hash of the result, so later reruns (and other
+    sessions with the same result) offer the download straight away.
+    """
+    digest = result_key(simple_breakdown, detailed_breakdowns, totals)
+    reports = (
+        ("text", "Text Report", "📄", ".txt", "text/plain", generate_text_export),
+        ("pdf", "PDF Report", "📋", ".pdf", "application/pdf", generate_pdf_export),
+        ("statements", "Statements (ZIP)", "🗂️", "_statements.zip", "application/zip", generate_statements_zip),
+    )
+    for column, (kind, name, icon, suffix, mime, generate) in zip(st.columns(len(reports)), reports):
+        with column:
+            content = rendered_exports.get((digest, kind))
+            if content is None and st.button(f"⚙️ Prepare {name}", key=f"{key}_prepare_{kind}"):
+                with st.spinner(f"Building {name.lower()}..."):
+                    content = rendered_exports.get_or_create(
+                        (digest, kind), lambda: generate(simple_breakdown, detailed_breakdowns, totals))
+            if content is not None:
+                st.download_button(
+                    label=f"{icon} Download {name}",
+                    data=content,
+                    file_name=file_stem + suffix,
+                    mime=mime,
+                    key=f"{key}_download_{kind}"
+                )
+                stats = st.session_state.get('pdf_report_stats')
+                if kind == "pdf" and stats is not None:
+                    st.caption(f"Last PDF: {stats.pages} pages in {stats.seconds:.2f}s ({stats.pages_per_second:.0f} pages/s)")
+    show_data_exports(detailed_breakdowns, digest, file_stem, key)
+
+def show_data_exports(detailed_breakdowns, digest, file_stem, key):
+    """
+    Per-person totals and per-item allocation lines as CSV, JSON Lines or Parquet
+
+    The tables are built on demand like the reports and cached in
+    rendered_exports under the same result hash, one entry per table and format.
+    """
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or parquet_available()]
+    file_format = st.selectbox("Data export format:", formats, key=f"{key}_data_format",
+                               help="Columnar tables for ledgers and spreadsheets")
+    if not parquet_available():
+        st.caption("Install pyarrow to export Parquet.")
+    extension, mime = EXPORT_FILE_TYPES[file_format]
+    names = {"people": "Per-Person Totals", "allocations": "Item Allocations"}
+    for column, table in zip(st.columns(len(EXPORT_TABLES)), EXPORT_TABLES):
+        with column:
+            cache_key = (digest, f"{table}.{file_format}")
+            content = rendered_exports.get(cache_key)
+            if content is None and st.button(f"⚙️ Prepare {names[table]}", key=f"{key}_prepare_{table}"):
+                with st.spinner(f"Building {names[table].lower()}..."):
+                    content = rendered_exports.get_or_create(
+                        cache_key, lambda: export_bytes(detailed_breakdowns, file_format, table))
+            if content is not None:
+                st.download_button(
+                    label=f"📊 Download {names[table]}",
+                    data=content,
+                    file_name=f"{file_stem}_{table}{extension}",
+                    mime=mime,
+                    key=f"{key}_download_{table}"
+                )
+
+def show_live_feed_snapshot(live_feed, charges, auto_refresh):
+    """
+    Counters and running totals of a live POS feed
+
+    Run as a fragment, so while the feed is followed only this part of the
+    page reruns each second.
+
+    Args:
+        live_feed: FeedRunner of the tab
+        charges: (tax, tip, extra_fees, discount) to split the tab with
+        auto_refresh: Whether the fragment polls the feed
+    """
+    if auto_refresh and not live_feed.running:
+        # The feed ended, so redraw the whole page once to drop the polling
+        st.rerun()
+    # The feed thread keeps applying events; each run reads a consistent snapshot
+    feed_snapshot = live_feed.split.snapshot(*charges, include_items=False)
+    if live_feed.error:
+        st.error(f"Feed stopped: {live_feed.error}")
+    st.write(f"**Events applied:** {feed_snapshot.events:,} • **Items on tab:** {feed_snapshot.items:,} • **Skipped lines:** {feed_snapshot.errors:,}")
+    if feed_snapshot.last_error:
+        st.caption(f"Last skipped line: {feed_snapshot.last_error}")
+    st.write(f"**Tab subtotal:** ${feed_snapshot.result[2]:.2f}")
+    st.json(feed_snapshot.result[1])
+
 st.title("Fair Share Bill Splitter")
 
 # UI Style Selector
@@ -400,9 +328,11 @@ if ui_style == "Classic UI":
         file_type = "csv" if file_format == "CSV (.csv)" else "excel"
         file_extensions = ["csv"] if file_format == "CSV (.csv)" else ["xlsx", "xls"]
         
-        uploaded_file = st.file_uploader(
-            f"Choose a {file_format.split(' ')[0]} file", 
-            type=file_extensions
+        uploaded_files = st.file_uploader(
+            f"Choose one or more {file_format.split(' ')[0]} files",
+            type=file_extensions,
+            accept_multiple_files=True,
+            help="Upload several receipts (e.g. from a trip) to split each one and total them per person"
         )
         
         # Show format demonstration table
@@ -418,17 +348,18 @@ if ui_style == "Classic UI":
             'Charlie': ['', '', '✓', '✓']
         }
         
-        sample_df = pd.DataFrame(sample_data)
-        st.dataframe(sample_df, use_container_width=True)
+        st.dataframe(sample_data, use_container_width=True)
         
         st.write("**Instructions:**")
         st.write("• **Item**: Name of the food item")
         st.write("• **amount**: Cost of the item")
-        st.write("• **Person columns**: Enter the number of servings eaten (e.g., 2 for two servings). Non-numeric entries count as one serving.")
+        st.write(f"• **Person columns**: Enter the number of servings eaten (e.g., 2 for two servings). Marks other than numbers count as one serving if they are one of {', '.join(f'`{mark}`' for mark in KNOWN_MARKS)}; anything else is rejected.")
         st.write("• **Empty cells**: Leave blank if the person didn't eat that item")
+        st.write("• **Long format**: For large groups, use the columns Item, amount, Person and Servings instead, with one row per person per item (rows of the same item together)")
         
         # Download sample template
         if st.button("📥 Download Sample Template"):
+            sample_df = load("pandas").DataFrame(sample_data)
             if file_format == "CSV (.csv)":
                 sample_df.to_csv("sample_bill_template.csv", index=False)
                 with open("sample_bill_template.csv", "r") as f:
@@ -439,6 +370,7 @@ if ui_style == "Classic UI":
                         mime="text/csv"
                     )
             else:
+                load("openpyxl")
                 sample_df.to_excel("sample_bill_template.xlsx", index=False)
                 with open("sample_bill_template.xlsx", "rb") as f:
                     st.download_button(
@@ -454,8 +386,33 @@ if ui_style == "Classic UI":
         tip_amount = st.number_input("Enter tip amount", min_value=0.0, format="%.2f", key="classic_excel_tip")
         extra_fees = st.number_input("Enter extra fees/surcharges", min_value=0.0, format="%.2f", key="classic_excel_extra_fees")
         
-        if uploaded_file and tax_amount and tip_amount:
-            detailed_result, simple_result, subtotal = owed_from_xl(uploaded_file, tax_amount, tip_amount, file_type, extra_fees)
+        if uploaded_files and tax_amount and tip_amount:
+            sheet_results = None
+            if len(uploaded_files) > 1:
+                # Each file is split as its own bill and totalled per person
+                bill_results = split_uploads(uploaded_files, tax_amount, tip_amount, file_type, extra_fees)
+                detailed_result, simple_result, subtotal = None, None, None
+                if bill_results:
+                    selected_bill = show_trip_ledger(bill_results, key="classic_trip_bill")
+                    detailed_result, simple_result, subtotal = bill_results[selected_bill]
+            elif file_type == "excel":
+                # Each sheet of a workbook is split as its own bill
+                sheet_results, workbook_totals = workbook_from_xl(uploaded_files[0], tax_amount, tip_amount, extra_fees)
+                detailed_result, simple_result, subtotal = None, None, None
+                if sheet_results:
+                    selected_sheet = next(iter(sheet_results))
+                    if len(sheet_results) > 1:
+                        st.subheader("📚 Workbook Roll-up")
+                        st.caption(f"Tax, tip and fees are applied to each of the {len(sheet_results)} sheets.")
+                        st.dataframe(
+                            [{'Person': person, 'Bills': totals['bills'], 'Total Owed': totals['final_total']}
+                             for person, totals in workbook_totals.items()],
+                            use_container_width=True
+                        )
+                        selected_sheet = st.selectbox("Show breakdown for sheet:", list(sheet_results))
+                    detailed_result, simple_result, subtotal = sheet_results[selected_sheet]
+            else:
+                detailed_result, simple_result, subtotal = owed_from_xl(uploaded_files[0], tax_amount, tip_amount, file_type, extra_fees)
             
             # Check if file reading was successful
             if detailed_result is not None:
@@ -512,36 +469,15 @@ if ui_style == "Classic UI":
                 # Export buttons for Excel results
                 st.divider()
                 st.subheader("📤 Export Results")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Prepare totals for export
-                    totals_excel = {
-                        'subtotal': subtotal,
-                        'tax': tax_amount,
-                        'tip': tip_amount,
-                        'extra_fees': extra_fees,
-                        'total': total_bill
-                    }
-                    
-                    # Generate text export
-                    text_content_excel = generate_text_export(simple_result, detailed_result, totals_excel)
-                    st.download_button(
-                        label="📄 Download Text Report",
-                        data=text_content_excel,
-                        file_name="bill_breakdown_excel.txt",
-                        mime="text/plain"
-                    )
-                
-                with col2:
-                    # Generate PDF export
-                    pdf_content_excel = generate_pdf_export(simple_result, detailed_result, totals_excel)
-                    st.download_button(
-                        label="📋 Download PDF Report",
-                        data=pdf_content_excel,
-                        file_name="bill_breakdown_excel.pdf",
-                        mime="application/pdf"
-                    )
+                # Prepare totals for export
+                totals_excel = {
+                    'subtotal': subtotal,
+                    'tax': tax_amount,
+                    'tip': tip_amount,
+                    'extra_fees': extra_fees,
+                    'total': total_bill
+                }
+                show_export_buttons(simple_result, detailed_result, totals_excel, "bill_breakdown_excel", key="excel_export")
         else:
             st.error("Failed to read the file. Please check the format and try again.")
     
@@ -557,28 +493,28 @@ if ui_style == "Classic UI":
 
         # Import partially completed session (JSON)
         with st.expander("📤 Import Partially Completed Session", expanded=False):
-            uploaded_session = st.file_uploader("Choose a session JSON file", type=["json"], key="classic_import_partial")
+            uploaded_session = st.file_uploader("Choose a session file", type=["fss", "json"], key="classic_import_partial")
             if uploaded_session is not None:
                 try:
-                    import json
-                    session_payload = json.load(uploaded_session)
-                    imported_count = int(session_payload.get('item_count', len(session_payload.get('items', []))))
-                    imported_items = session_payload.get('items', [])
-                    # Set item count first, then populate fields
-                    st.session_state['classic_manual_item_count'] = imported_count
-                    for i, item in enumerate(imported_items[:imported_count]):
+                    session_payload = load_session(uploaded_session.getvalue())
+                    imported_count = session_payload['item_count']
+                    imported_fields = {'classic_manual_item_count': imported_count}
+                    for i, item in enumerate(session_payload['items'][:imported_count]):
                         try:
                             name_i, price_i, people_i = item
                         except Exception:
                             # fallback if structure unexpected
                             continue
-                        st.session_state[f'classic_manual_item_name_{i}'] = name_i
-                        st.session_state[f'classic_manual_item_price_{i}'] = float(price_i) if isinstance(price_i, (int, float, str)) and str(price_i) != '' else 0.0
+                        imported_fields[f'classic_manual_item_name_{i}'] = name_i
+                        imported_fields[f'classic_manual_item_price_{i}'] = float(price_i) if isinstance(price_i, (int, float, str)) and str(price_i) != '' else 0.0
                         # If people is ["__EVERYONE__"] keep blank to indicate everyone
                         if isinstance(people_i, list) and len(people_i) == 1 and people_i[0] == "__EVERYONE__":
-                            st.session_state[f'classic_manual_item_people_{i}'] = ""
+                            imported_fields[f'classic_manual_item_people_{i}'] = ""
                         else:
-                            st.session_state[f'classic_manual_item_people_{i}'] = ", ".join(people_i) if isinstance(people_i, list) else str(people_i)
+                            imported_fields[f'classic_manual_item_people_{i}'] = ", ".join(people_i) if isinstance(people_i, list) else str(people_i)
+                    # Restore every field in one update
+                    st.session_state.update(imported_fields)
+                    st.session_state['classic_ignored_items'] = session_payload['ignored']
                     st.success(f"Loaded session with {imported_count} items.")
                     st.rerun()
                 except Exception as e:
@@ -628,17 +564,12 @@ if ui_style == "Classic UI":
         st.divider()
         with st.expander("💾 Export Partially Completed Session", expanded=False):
             try:
-                session_export = {
-                    'item_count': int(item_count),
-                    'items': items,
-                }
-                import json
-                json_blob = json.dumps(session_export, indent=2)
+                session_blob = dump_session(items, item_count, ignored=st.session_state['classic_ignored_items'])
                 st.download_button(
-                    label="Download Session JSON",
-                    data=json_blob,
-                    file_name="bill_splitter_session.json",
-                    mime="application/json",
+                    label="Download Session",
+                    data=session_blob,
+                    file_name=SESSION_FILE_NAME,
+                    mime=SESSION_MIME,
                     key="classic_export_partial_download"
                 )
             except Exception as e:
@@ -656,9 +587,13 @@ if ui_style == "Classic UI":
         with col4:
             discount_amount = st.number_input("Discount/Coupon Amount", min_value=0.0, format="%.2f", key="classic_manual_discount")
         
+        # Exclude ignored items from calculation
+        active_items = [row for idx, row in enumerate(items) if idx not in st.session_state.get('classic_ignored_items', set())]
+        classic_inputs = calculation_inputs(active_items, tax_amount, tip_amount, extra_fees, discount_amount)
+        # Results stay on screen after Calculate, so the export buttons' reruns keep them, until the inputs change
         if st.button("Calculate"):
-            # Exclude ignored items from calculation
-            active_items = [row for idx, row in enumerate(items) if idx not in st.session_state.get('classic_ignored_items', set())]
+            st.session_state['classic_calculated'] = classic_inputs
+        if st.session_state.get('classic_calculated') == classic_inputs:
             if active_items and any(active_items):  # Check if items list is not empty
                 detailed_result, simple_result, subtotal = money_owed(active_items, tax_amount, tip_amount, extra_fees, discount_amount)
                 
@@ -723,37 +658,16 @@ if ui_style == "Classic UI":
                 # Export buttons
                 st.divider()
                 st.subheader("📤 Export Results")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Prepare totals for export
-                    totals = {
-                        'subtotal': subtotal,
-                        'tax': tax_amount,
-                        'tip': tip_amount,
-                        'extra_fees': extra_fees,
-                        'discount': discount_amount,
-                        'total': total_bill
-                    }
-                    
-                    # Generate text export
-                    text_content = generate_text_export(simple_result, detailed_result, totals)
-                    st.download_button(
-                        label="📄 Download Text Report",
-                        data=text_content,
-                        file_name="bill_breakdown.txt",
-                        mime="text/plain"
-                    )
-                
-                with col2:
-                    # Generate PDF export
-                    pdf_content = generate_pdf_export(simple_result, detailed_result, totals)
-                    st.download_button(
-                        label="📋 Download PDF Report",
-                        data=pdf_content,
-                        file_name="bill_breakdown.pdf",
-                        mime="application/pdf"
-                    )
+                # Prepare totals for export
+                totals = {
+                    'subtotal': subtotal,
+                    'tax': tax_amount,
+                    'tip': tip_amount,
+                    'extra_fees': extra_fees,
+                    'discount': discount_amount,
+                    'total': total_bill
+                }
+                show_export_buttons(simple_result, detailed_result, totals, "bill_breakdown", key="classic_export")
             else:
                 st.error("Please enter at least one item with valid information.")
 
@@ -774,9 +688,10 @@ elif ui_style == "Compact UI":
         file_type_compact = "csv" if file_format_compact == "CSV (.csv)" else "excel"
         file_extensions_compact = ["csv"] if file_format_compact == "CSV (.csv)" else ["xlsx", "xls"]
         
-        uploaded_file_compact = st.file_uploader(
-            "Upload your bill file",
-            type=file_extensions_compact
+        uploaded_files_compact = st.file_uploader(
+            "Upload your bill files",
+            type=file_extensions_compact,
+            accept_multiple_files=True
         )
     
     with col2:
@@ -792,7 +707,7 @@ elif ui_style == "Compact UI":
                 'Alice': ['✓', '✓'],
                 'Bob': ['✓', '']
             }
-            sample_df_compact = pd.DataFrame(sample_data_compact)
+            sample_df_compact = load("pandas").DataFrame(sample_data_compact)
             
             if file_format_compact == "CSV (.csv)":
                 sample_df_compact.to_csv("compact_template.csv", index=False)
@@ -804,6 +719,7 @@ elif ui_style == "Compact UI":
                         mime="text/csv"
                     )
             else:
+                load("openpyxl")
                 sample_df_compact.to_excel("compact_template.xlsx", index=False)
                 with open("compact_template.xlsx", "rb") as f:
                     st.download_button(
@@ -827,10 +743,20 @@ elif ui_style == "Compact UI":
     discount_amount_compact = st.number_input("Discount/Coupon Amount", min_value=0.0, format="%.2f", key="compact_discount")
     
     # Process file or show manual entry
-    if uploaded_file_compact and tax_amount_compact and tip_amount_compact:
-        detailed_result_compact, simple_result_compact, subtotal_compact = owed_from_xl(
-            uploaded_file_compact, tax_amount_compact, tip_amount_compact, file_type_compact, extra_fees_compact, discount_amount_compact
-        )
+    if uploaded_files_compact and tax_amount_compact and tip_amount_compact:
+        if len(uploaded_files_compact) > 1:
+            # Each file is split as its own bill and totalled per person
+            bill_results_compact = split_uploads(
+                uploaded_files_compact, tax_amount_compact, tip_amount_compact, file_type_compact, extra_fees_compact, discount_amount_compact
+            )
+            detailed_result_compact, simple_result_compact, subtotal_compact = None, None, None
+            if bill_results_compact:
+                selected_bill_compact = show_trip_ledger(bill_results_compact, key="compact_trip_bill")
+                detailed_result_compact, simple_result_compact, subtotal_compact = bill_results_compact[selected_bill_compact]
+        else:
+            detailed_result_compact, simple_result_compact, subtotal_compact = owed_from_xl(
+                uploaded_files_compact[0], tax_amount_compact, tip_amount_compact, file_type_compact, extra_fees_compact, discount_amount_compact
+            )
         
         if detailed_result_compact is not None:
             # Compact results display
@@ -862,7 +788,7 @@ elif ui_style == "Compact UI":
                 with st.expander(f"{person} - ${details['final_total']:.2f}"):
                     col1, col2 = st.columns(2)
                     with col1:
-                        st.write(f"**Items:** {len(details['items_eaten'])}")
+                        st.write(f"**Items:** {details.item_count}")
                         st.write(f"**Subtotal:** ${details['subtotal_before_tax_tip']:.2f}")
                     with col2:
                         st.write(f"**Bill %:** {details['percentage_of_bill']:.1f}%")
@@ -902,15 +828,38 @@ elif ui_style == "Compact UI":
                     people_list = [name.strip() for name in item_people_compact.split(",") if name.strip()]
                 
                 if people_list:
-                    st.session_state['compact_items'].append((item_name_compact, item_price_compact, people_list))
+                    add_compact_item((item_name_compact, item_price_compact, people_list))
                     st.success(f"Added: {item_name_compact} - ${item_price_compact:.2f} for {', '.join(people_list)}")
                 else:
                     # If no names entered, treat as "everyone"
-                    st.session_state['compact_items'].append((item_name_compact, item_price_compact, ["__EVERYONE__"]))
+                    add_compact_item((item_name_compact, item_price_compact, ["__EVERYONE__"]))
                     st.success(f"Added: {item_name_compact} - ${item_price_compact:.2f} for everyone")
             else:
                 st.error("Please enter item name and price")
 
+    # Live tab applied event by event from a local POS feed
+    st.divider()
+    live_feed = st.session_state.get('live_feed')
+    with st.expander("📡 Live POS Feed", expanded=live_feed is not None):
+        st.caption('The POS writes one JSON order event per line, e.g. {"id": "t7-1", "item": "Pizza", "amount": 20, "people": ["Alice", "Bob"]} or {"event": "void", "id": "t7-1"}.')
+        feed_source = st.text_input("Feed file, or unix: followed by a socket path", key="live_feed_source")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("▶️ Start Feed", disabled=not feed_source or (live_feed is not None and live_feed.running)):
+                if live_feed is not None:
+                    live_feed.stop()
+                live_feed = st.session_state['live_feed'] = FeedRunner(feed_source)
+        with col2:
+            if live_feed is not None and st.button("⏹️ Stop Feed"):
+                live_feed.stop()
+                del st.session_state['live_feed']
+                live_feed = None
+        if live_feed is not None:
+            auto_refresh = live_feed.running and st.checkbox("Auto-refresh every second", value=True, key="live_feed_auto")
+            live_feed_view = st.fragment(show_live_feed_snapshot, run_every=1 if auto_refresh else None)
+            live_feed_view(live_feed, (tax_amount_compact, tip_amount_compact, extra_fees_compact, discount_amount_compact),
+                           auto_refresh)
+
 # Initialize ignored items tracking
 if 'ignored_items' not in st.session_state:
     st.session_state['ignored_items'] = set()
@@ -918,6 +867,7 @@ if 'ignored_items' not in st.session_state:
 # Display running list of items if any
 if 'compact_items' in st.session_state and st.session_state['compact_items']:
     st.subheader("📋 Items Entered (Compact Manual)")
+    compact_split, compact_keys = compact_split_state()
     
     # Display items with ignore/delete buttons
     for idx, (name, price, people) in enumerate(st.session_state['compact_items']):
@@ -934,105 +884,122 @@ if 'compact_items' in st.session_state and st.session_state['compact_items']:
         
         with col2:
             if st.button("❌ Delete", key=f"delete_{idx}", type="secondary"):
+                compact_split.remove_item(compact_keys.pop(idx))
                 st.session_state['compact_items'].pop(idx)
-                st.session_state['ignored_items'].discard(idx)
+                # Items after the deleted one move up a position
+                st.session_state['ignored_items'] = {
+                    i if i < idx else i - 1 for i in st.session_state['ignored_items'] if i != idx
+                }
                 st.rerun()
         
         with col3:
             if is_ignored:
                 if st.button("✅ Restore", key=f"restore_{idx}"):
+                    compact_split.restore_item(compact_keys[idx])
                     st.session_state['ignored_items'].discard(idx)
                     st.rerun()
             else:
                 if st.button("⚪ Ignore", key=f"ignore_{idx}"):
+                    compact_split.ignore_item(compact_keys[idx])
                     st.session_state['ignored_items'].add(idx)
                     st.rerun()
         
         if idx < len(st.session_state['compact_items']) - 1:
             st.divider()
     
+    # Live totals only touch the people on the bill, so they update instantly
+    if ui_style == "Compact UI":
+        st.write("**Running Totals:**")
+        st.json(compact_split.totals(tax_amount_compact, tip_amount_compact, extra_fees_compact, discount_amount_compact))
+    
     # Add export session button
     col1, col2 = st.columns([1, 3])
     with col1:
         if st.button("💾 Export Session"):
-            session_data = {
-                'items': st.session_state['compact_items'],
+            session_charges = {
                 'tax': tax_amount_compact if 'tax_amount_compact' in locals() else 0,
                 'tip': tip_amount_compact if 'tip_amount_compact' in locals() else 0,
                 'extra_fees': extra_fees_compact if 'extra_fees_compact' in locals() else 0,
                 'discount': discount_amount_compact if 'discount_amount_compact' in locals() else 0
             }
-            import json
-            json_str = json.dumps(session_data, indent=2)
+            session_blob = dump_session(st.session_state['compact_items'], charges=session_charges,
+                                        ignored=st.session_state.get('ignored_items', set()))
             st.download_button(
                 label="📥 Download Session",
-                data=json_str,
-                file_name="bill_splitter_session.json",
-                mime="application/json"
+                data=session_blob,
+                file_name=SESSION_FILE_NAME,
+                mime=SESSION_MIME
             )
     
     with col2:
-        uploaded_session = st.file_uploader("📤 Import Session", type=['json'], help="Upload a previously saved session file")
+        uploaded_session = st.file_uploader("📤 Import Session", type=['fss', 'json'], help="Upload a previously saved session file")
         if uploaded_session is not None:
             try:
-                import json
-                session_data = json.load(uploaded_session)
-                st.session_state['compact_items'] = session_data.get('items', [])
-                st.success(f"✅ Session loaded! {len(session_data.get('items', []))} items imported.")
+                session_data = load_session(uploaded_session.getvalue())
+                st.session_state['compact_items'] = session_data['items']
+                st.session_state['ignored_items'] = session_data['ignored']
+                st.session_state.pop('compact_item_keys', None)
+                st.success(f"✅ Session loaded! {len(session_data['items'])} items imported.")
                 st.rerun()
             except Exception as e:
                 st.error(f"Error loading session: {str(e)}")
 
 # Calculate Bill button for manual compact items
-if st.button("Calculate Bill (Compact)"):
-    if 'compact_items' in st.session_state and st.session_state['compact_items']:
-        # Filter out ignored items
-        active_items = [item for idx, item in enumerate(st.session_state['compact_items']) 
-                       if idx not in st.session_state['ignored_items']]
-        
-        detailed_result_compact_manual, simple_result_compact_manual, subtotal_compact_manual = money_owed(
-            active_items, tax_amount_compact, tip_amount_compact, extra_fees_compact, discount_amount_compact
-        )
-        total_bill_compact_manual = subtotal_compact_manual + tax_amount_compact + tip_amount_compact + extra_fees_compact - discount_amount_compact
-        st.subheader("📊 Compact Manual Bill Summary")
-        # Display on new lines to handle large numbers better
-        st.write(f"**Subtotal:** ${subtotal_compact_manual:.2f}")
-        st.write(f"**Tax:** ${tax_amount_compact:.2f}")
-        st.write(f"**Tip:** ${tip_amount_compact:.2f}")
-        st.write(f"**Extra Fees:** ${extra_fees_compact:.2f}")
-        st.write(f"**Discount:** -${discount_amount_compact:.2f}")
-        st.write(f"**Total Bill:** ${total_bill_compact_manual:.2f}")
-        # Display item summary
-        with st.expander("📝 View Item Summary", expanded=False):
-            for idx, (item_name, cost, people) in enumerate(active_items):
-                st.write(f"**{item_name}** - ${cost:.2f}")
-                for person in people:
-                    if person == "__EVERYONE__":
-                        st.write(f"  • Everyone")
-                    else:
-                        st.write(f"  • {person}")
-                if idx < len(active_items) - 1:
-                    st.divider()
-        
-        st.subheader("💰 Final Amounts (Compact Manual)")
-        st.json(simple_result_compact_manual)
-        st.subheader("👥 Individual Breakdowns (Compact Manual)")
-        for person, details in detailed_result_compact_manual.items():
-            with st.expander(f"{person} - ${details['final_total']:.2f}"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**Items:** {len(details['items_eaten'])}")
-                    st.write(f"**Subtotal:** ${details['subtotal_before_tax_tip']:.2f}")
-                with col2:
-                    st.write(f"**Bill %:** {details['percentage_of_bill']:.1f}%")
-                    st.write(f"**Total:** ${details['final_total']:.2f}")
+if ui_style == "Compact UI":
+    # Filter out ignored items
+    active_items = [item for idx, item in enumerate(st.session_state['compact_items']) 
+                   if idx not in st.session_state['ignored_items']]
+    compact_inputs = calculation_inputs(active_items, tax_amount_compact, tip_amount_compact, extra_fees_compact,
+                                        discount_amount_compact)
+    # Results stay on screen after Calculate, so the export buttons' reruns keep them, until the inputs change
+    if st.button("Calculate Bill (Compact)"):
+        if st.session_state['compact_items']:
+            st.session_state['compact_calculated'] = compact_inputs
+        else:
+            st.error("Please add some items before calculating the bill.")
+    if st.session_state.get('compact_calculated') == compact_inputs:
+        if st.session_state['compact_items']:
+            compact_split, _ = compact_split_state()
+            detailed_result_compact_manual, simple_result_compact_manual, subtotal_compact_manual = compact_split.result(
+                tax_amount_compact, tip_amount_compact, extra_fees_compact, discount_amount_compact
+            )
+            total_bill_compact_manual = subtotal_compact_manual + tax_amount_compact + tip_amount_compact + extra_fees_compact - discount_amount_compact
+            st.subheader("📊 Compact Manual Bill Summary")
+            # Display on new lines to handle large numbers better
+            st.write(f"**Subtotal:** ${subtotal_compact_manual:.2f}")
+            st.write(f"**Tax:** ${tax_amount_compact:.2f}")
+            st.write(f"**Tip:** ${tip_amount_compact:.2f}")
+            st.write(f"**Extra Fees:** ${extra_fees_compact:.2f}")
+            st.write(f"**Discount:** -${discount_amount_compact:.2f}")
+            st.write(f"**Total Bill:** ${total_bill_compact_manual:.2f}")
+            # Display item summary
+            with st.expander("📝 View Item Summary", expanded=False):
+                for idx, (item_name, cost, people) in enumerate(active_items):
+                    st.write(f"**{item_name}** - ${cost:.2f}")
+                    for person in people:
+                        if person == "__EVERYONE__":
+                            st.write(f"  • Everyone")
+                        else:
+                            st.write(f"  • {person}")
+                    if idx < len(active_items) - 1:
+                        st.divider()
         
-        # Export buttons for Compact UI
-        st.divider()
-        st.subheader("📤 Export Results")
-        col1, col2 = st.columns(2)
+            st.subheader("💰 Final Amounts (Compact Manual)")
+            st.json(simple_result_compact_manual)
+            st.subheader("👥 Individual Breakdowns (Compact Manual)")
+            for person, details in detailed_result_compact_manual.items():
+                with st.expander(f"{person} - ${details['final_total']:.2f}"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"**Items:** {details.item_count}")
+                        st.write(f"**Subtotal:** ${details['subtotal_before_tax_tip']:.2f}")
+                    with col2:
+                        st.write(f"**Bill %:** {details['percentage_of_bill']:.1f}%")
+                        st.write(f"**Total:** ${details['final_total']:.2f}")
         
-        with col1:
+            # Export buttons for Compact UI
+            st.divider()
+            st.subheader("📤 Export Results")
             # Prepare totals for export
             totals_compact = {
                 'subtotal': subtotal_compact_manual,
@@ -1042,24 +1009,23 @@ if st.button("Calculate Bill (Compact)"):
                 'discount': discount_amount_compact,
                 'total': total_bill_compact_manual
             }
-            
-            # Generate text export
-            text_content_compact = generate_text_export(simple_result_compact_manual, detailed_result_compact_manual, totals_compact)
-            st.download_button(
-                label="📄 Download Text Report",
-                data=text_content_compact,
-                file_name="bill_breakdown_compact.txt",
-                mime="text/plain"
-            )
-        
-        with col2:
-            # Generate PDF export
-            pdf_content_compact = generate_pdf_export(simple_result_compact_manual, detailed_result_compact_manual, totals_compact)
-            st.download_button(
-                label="📋 Download PDF Report",
-                data=pdf_content_compact,
-                file_name="bill_breakdown_compact.pdf",
-                mime="application/pdf"
-            )
+            show_export_buttons(simple_result_compact_manual, detailed_result_compact_manual, totals_compact,
+                                "bill_breakdown_compact", key="compact_export")
+
+# Report what the lazily loaded dependencies cost this session so far
+with st.sidebar.expander("⏱️ Dependency Import Cost"):
+    import_costs = import_cost_report()
+    if import_costs:
+        for module_name, seconds in import_costs:
+            st.write(f"• **{module_name}**: {seconds * 1000:.0f} ms")
     else:
-        st.error("Please add some items before calculating the bill.")
+        st.write("No heavy dependencies loaded yet. pandas, openpyxl and reportlab load on first upload or PDF export.")
+
+# Uploads parsed so far are shared by every session of this server
+with st.sidebar.expander("🗄️ Upload Cache"):
+    cache_stats = parsed_uploads.stats()
+    st.write(f"• Cached uploads: {cache_stats['entries']}")
+    st.write(f"• Memory: {cache_stats['nbytes'] / 1_000_000:.1f} / {cache_stats['max_bytes'] / 1_000_000:.0f} MB")
+    st.write(f"• Hits / misses: {cache_stats['hits']} / {cache_stats['misses']}")
+    export_stats = rendered_exports.stats()
+    st.write(f"• Cached reports: {export_stats['entries']} ({export_stats['nbytes'] / 1_000_000:.1f} MB)")
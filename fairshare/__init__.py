@@ -0,0 +1,10 @@
+"""
+FairShare Bill Splitter
+Importable bill splitting code shared by the Streamlit apps, scripts and tests
+
+The process pools of fairshare.core.batch, fairshare.workbook and
+fairshare.report import multiprocessing and concurrent.futures only when a
+pool is started, so the apps do not pay for them on every load. Their
+workers are spawned rather than forked, as forking a threaded server such
+as Streamlit's can leave a child holding a lock that is never released.
+"""
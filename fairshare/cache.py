@@ -0,0 +1,218 @@
+"""
+Caches of parsed bill uploads and rendered reports, keyed by content hashes
+
+Streamlit reruns the whole script whenever a widget changes, so without a
+cache every change of tax or tip re-reads the uploaded file. Parsed serving
+tables are kept per (content hash, format) with least-recently-used
+eviction under a memory cap, shared by every session of the server process.
+
+Text and PDF reports are likewise built only when a download is asked for
+and kept per (result hash, kind), so showing a result never renders a PDF
+and downloading it again, or from another session, does not render it twice.
+"""
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+from .core import AMOUNT_FIELDS, SplitResult
+
+# Memory cap and entry limit of the shared upload cache
+PARSED_CACHE_BYTES = 256 * 1024 * 1024
+PARSED_CACHE_ENTRIES = 64
+
+# Memory cap and entry limit of the shared report cache
+EXPORT_CACHE_BYTES = 64 * 1024 * 1024
+EXPORT_CACHE_ENTRIES = 128
+
+def content_key(content, file_format):
+    """
+    Cache key of an upload
+
+    Args:
+        content: Raw bytes of the file
+        file_format: Format string the file is parsed with (e.g. "csv")
+
+    Returns:
+        tuple: (content digest, file_format)
+    """
+    return hashlib.blake2b(content, digest_size=20).digest(), file_format
+
+def _update_part(digest, data):
+    """Add one length-prefixed part to a digest, so parts cannot run together"""
+    digest.update(len(data).to_bytes(8, "little"))
+    digest.update(data)
+
+def _json_bytes(value):
+    """Canonical JSON bytes of a plain value; anything else is written as its str"""
+    return json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+
+def result_key(simple_breakdown, detailed_breakdowns, totals):
+    """
+    Cache key of a split result, for caching the reports built from it
+
+    A SplitResult is hashed through its columns, so large results are not
+    expanded into per-person dicts just to be hashed.
+
+    Args:
+        simple_breakdown: {person: final_total}
+        detailed_breakdowns: SplitResult or {person: details}
+        totals: Bill totals dict shown in the report
+
+    Returns:
+        bytes: Digest of everything the reports show
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    _update_part(digest, _json_bytes([simple_breakdown, totals]))
+    if isinstance(detailed_breakdowns, SplitResult):
+        _update_part(digest, _json_bytes([list(detailed_breakdowns.people), list(detailed_breakdowns.item_names),
+                                          [int(item) for item in detailed_breakdowns.everyone_items]]))
+        columns = [detailed_breakdowns.item_shares, detailed_breakdowns.item_servings,
+                   detailed_breakdowns.row_items, detailed_breakdowns.row_people]
+        columns.extend(detailed_breakdowns.columns[field] for field in AMOUNT_FIELDS)
+        for column in columns:
+            _update_part(digest, column.tobytes())
+    else:
+        _update_part(digest, _json_bytes({person: dict(details) for person, details in detailed_breakdowns.items()}))
+    return digest.digest()
+
+def estimate_nbytes(value):
+    """
+    Rough memory footprint of a parsed value
+
+    Counts numpy arrays by their buffers and walks tuples, lists and dicts;
+    anything else counts as its sys.getsizeof.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(value, (str, bytes, int, float)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a memory cap
+
+    Entries larger than the whole cap are returned but never stored.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the cached value of key, or None, without counting a miss
+
+        Args:
+            key: Hashable cache key
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_or_create(self, key, create):
+        """
+        Return the cached value of key, creating it only on a cache miss
+
+        Args:
+            key: Hashable cache key
+            create: Callable returning the value, called on a miss
+
+        Returns:
+            The cached or freshly created value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Created outside the lock so other sessions are not held up
+        value = create()
+        nbytes = estimate_nbytes(value)
+        if nbytes <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (value, nbytes)
+                    self._nbytes += nbytes
+                    self._evict()
+        return value
+
+    def _evict(self):
+        """Drop least recently used entries until within both limits"""
+        while self._entries and (self._nbytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+
+    def clear(self):
+        """Drop every entry and reset the hit counters"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Current cache usage
+
+        Returns:
+            dict: entries, nbytes, max_bytes, hits and misses
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'nbytes': self._nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+class ParsedUploadCache(LRUCache):
+    """
+    Thread-safe LRU cache of parsed uploads with a memory cap
+
+    Entries larger than the whole cap are returned but never stored.
+    """
+
+    def __init__(self, max_bytes=PARSED_CACHE_BYTES, max_entries=PARSED_CACHE_ENTRIES):
+        super().__init__(max_bytes, max_entries)
+
+    def get_or_parse(self, content, file_format, parse):
+        """
+        Return the parsed form of content, parsing it only on a cache miss
+
+        Args:
+            content: Raw bytes of the file
+            file_format: Format string the file is parsed with
+            parse: Callable returning the parsed value, called on a miss
+
+        Returns:
+            The cached or freshly parsed value
+        """
+        return self.get_or_create(content_key(content, file_format), parse)
+
+# Shared by every Streamlit session in this process
+parsed_uploads = ParsedUploadCache()
+
+# Text and PDF reports keyed by (result_key(...), kind), shared the same way
+rendered_exports = LRUCache(EXPORT_CACHE_BYTES, EXPORT_CACHE_ENTRIES)
@@ -0,0 +1,253 @@
+"""
+Headless command-line bill splitter
+
+Splits one or many bill files (the data/sample_bill_template.csv layout) and
+streams one row per person as CSV or JSON Lines, or a text breakdown report
+per bill, without importing Streamlit:
+
+    python -m fairshare data/*.csv --tax 8.50 --tip 15 --format jsonl -o owed.jsonl
+
+With --statements, every person also gets a PDF statement, rendered on a
+process pool into one ZIP archive.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from .core import AMOUNT_FIELDS
+from .ingest import file_type_for, split_bill_file
+from .ledger import unique_bill_names
+from .report import safe_file_stem, write_statements_zip, write_text_report
+from .scan import parse_row_filter, split_filtered_csv
+from .validate import BillValidationError
+from .workbook import split_workbook
+
+OUTPUT_FORMATS = ("csv", "jsonl", "text")
+
+# Columns of every output row
+OUTPUT_FIELDS = ("bill", "person") + AMOUNT_FIELDS
+
+def build_parser():
+    """Build the argument parser for the fairshare command"""
+    parser = argparse.ArgumentParser(
+        prog="fairshare",
+        description="Split bill files and stream what each person owes as CSV, JSON Lines or text reports.",
+    )
+    parser.add_argument("files", nargs="+", help="Bill files (.csv, .xlsx or .xls)")
+    parser.add_argument("--tax", type=float, default=0.0, help="Tax amount applied to each bill")
+    parser.add_argument("--tip", type=float, default=0.0, help="Tip amount applied to each bill")
+    parser.add_argument("--fees", type=float, default=0.0, help="Extra fees/surcharges applied to each bill")
+    parser.add_argument("--discount", type=float, default=0.0, help="Discount amount applied to each bill")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="Output format (default: csv)")
+    parser.add_argument("-o", "--output", help="Write to this file instead of stdout")
+    parser.add_argument(
+        "--all-sheets", action="store_true",
+        help="Split every sheet of Excel workbooks as its own bill (default: first sheet only)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes for parsing workbook sheets (default: one per core)",
+    )
+    parser.add_argument(
+        "--exact-cents", action="store_true",
+        help="Split in integer cents so each bill's amounts add up exactly",
+    )
+    parser.add_argument(
+        "--where", action="append", type=parse_row_filter, metavar="COLUMN=VALUE",
+        help="Only split the CSV rows whose COLUMN equals VALUE or lies in LOW..HIGH (repeatable); "
+             "large exports are memory-mapped and scanned without loading them",
+    )
+    parser.add_argument(
+        "--statements", metavar="ZIP",
+        help="Also write a PDF statement per person to this ZIP archive, one folder per bill "
+             "when there are several (rendered on --workers processes)",
+    )
+    return parser
+
+def iter_person_rows(bill_name, detailed_result):
+    """
+    Yield one output row per person of a split bill
+
+    Args:
+        bill_name: Name reported in the bill column
+        detailed_result: Detailed result returned by money_owed
+
+    Yields:
+        dict: Row keyed by OUTPUT_FIELDS
+    """
+    for person, details in detailed_result.items():
+        row = {"bill": bill_name, "person": person}
+        for field in AMOUNT_FIELDS:
+            row[field] = details[field]
+        yield row
+
+def make_row_writer(stream, output_format):
+    """
+    Create a function that writes one row to stream in the given format
+
+    Args:
+        stream: Text stream to write to
+        output_format: "csv" or "jsonl"
+
+    Returns:
+        callable: write_row(row)
+    """
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        return writer.writerow
+
+    def write_json_line(row):
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write("\n")
+    return write_json_line
+
+def make_text_bill_writer(stream, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
+    """
+    Create a function that writes the text breakdown report of one split bill
+
+    Args:
+        stream: Text stream to write to
+        tax_amount: Tax amount applied to each bill
+        tip_amount: Tip amount applied to each bill
+        extra_fees: Extra fees applied to each bill
+        discount_amount: Discount applied to each bill
+
+    Returns:
+        callable: write_bill(bill_name, result) taking a money_owed result tuple
+    """
+    charges = {'tax': tax_amount, 'tip': tip_amount, 'extra_fees': extra_fees, 'discount': discount_amount}
+    written = 0
+
+    def write_bill(bill_name, result):
+        nonlocal written
+        detailed_result, simple_result, subtotal = result
+        totals = dict(charges, subtotal=subtotal,
+                      total=subtotal + tax_amount + tip_amount + extra_fees - discount_amount)
+        if written:
+            stream.write("\n")
+        write_text_report(stream, simple_result, detailed_result, totals, title=bill_name)
+        written += 1
+    return write_bill
+
+def split_files(paths, write_row, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0,
+                exact_cents=False, errors=None, all_sheets=False, workers=None, filters=None, on_bill=None):
+    """
+    Split each bill file and write its per-person rows as soon as it is done
+
+    Args:
+        paths: Bill file paths
+        write_row: Row writer from make_row_writer, or None to write no rows
+        tax_amount: Tax amount applied to each bill
+        tip_amount: Tip amount applied to each bill
+        extra_fees: Extra fees applied to each bill
+        discount_amount: Discount applied to each bill
+        exact_cents: Split in integer cents (see money_owed)
+        errors: Stream that unreadable files and the bad cells of rejected
+            files are reported to (default: stderr)
+        all_sheets: Split every sheet of Excel workbooks as a bill named
+            "path:sheet" instead of only the first sheet
+        workers: Worker processes for parsing workbook sheets
+        filters: Optional {column: value or (low, high)} selecting the rows
+            of CSV files to split (see fairshare.scan)
+        on_bill: Optional callable(bill_name, result) also called with the
+            money_owed result tuple of every split bill
+
+    Returns:
+        int: Number of files that could not be split
+    """
+    failures = 0
+    for path in paths:
+        try:
+            if file_type_for(path) == "csv" and filters:
+                bills = {path: split_filtered_csv(path, filters, tax_amount, tip_amount, extra_fees, discount_amount,
+                                                  exact_cents)}
+            elif file_type_for(path) == "csv":
+                bills = {path: split_bill_file(path, tax_amount, tip_amount, extra_fees, discount_amount, exact_cents)}
+            elif filters:
+                raise ValueError("row filters (--where) only apply to CSV files")
+            else:
+                sheet_results, _ = split_workbook(
+                    path, tax_amount, tip_amount, extra_fees, discount_amount, exact_cents,
+                    workers=workers, sheets=None if all_sheets else 1,
+                )
+                bills = ({f"{path}:{name}": result for name, result in sheet_results.items()} if all_sheets
+                         else {path: result for result in sheet_results.values()})
+        except BillValidationError as e:
+            # One line per bad cell, like a compiler reports errors
+            source = f"{path} ({e.source})" if e.source else path
+            for cell_error in e.errors:
+                print(f"fairshare: {source}: {cell_error}", file=errors or sys.stderr)
+            failures += 1
+            continue
+        except Exception as e:
+            print(f"fairshare: {path}: {e}", file=errors or sys.stderr)
+            failures += 1
+            continue
+        for bill_name, result in bills.items():
+            if write_row is not None:
+                for row in iter_person_rows(bill_name, result[0]):
+                    write_row(row)
+            if on_bill is not None:
+                on_bill(bill_name, result)
+    return failures
+
+def statement_folders(bill_results):
+    """
+    Archive folder of each bill's statements
+
+    Args:
+        bill_results: {bill_name: money_owed result tuple}
+
+    Returns:
+        dict: {folder: detailed_result}, a single bill going at the top level
+            and several each in a folder named after its file (and sheet)
+    """
+    if len(bill_results) == 1:
+        return {"": detailed_result for detailed_result, _, _ in bill_results.values()}
+    folders = unique_bill_names(safe_file_stem(os.path.basename(bill_name)) for bill_name in bill_results)
+    return {folder: detailed_result for folder, (detailed_result, _, _) in zip(folders, bill_results.values())}
+
+def main(argv=None):
+    """
+    Run the fairshare command
+
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Exit status, 1 if any bill file could not be split
+    """
+    args = build_parser().parse_args(argv)
+    bill_results = {}
+    stream = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "text":
+            write_row = None
+            write_bill = make_text_bill_writer(stream, args.tax, args.tip, args.fees, args.discount)
+        else:
+            write_row = make_row_writer(stream, args.format)
+            write_bill = None
+
+        def on_bill(bill_name, result):
+            if write_bill is not None:
+                write_bill(bill_name, result)
+            if args.statements:
+                bill_results[bill_name] = result
+
+        failures = split_files(
+            args.files, write_row, args.tax, args.tip, args.fees, args.discount,
+            exact_cents=args.exact_cents, all_sheets=args.all_sheets, workers=args.workers,
+            filters=dict(args.where) if args.where else None, on_bill=on_bill,
+        )
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    if bill_results:
+        stats = write_statements_zip(statement_folders(bill_results), args.statements, args.workers)
+        print(f"fairshare: {stats.people} statements ({stats.pages} pages) written to {args.statements} "
+              f"in {stats.seconds:.2f}s", file=sys.stderr)
+    return 1 if failures else 0
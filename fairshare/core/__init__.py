@@ -0,0 +1,18 @@
+"""
+Core FairShare split engine, free of Streamlit and report dependencies
+"""
+
+from .normalize import normalize_name, normalize_names_bulk, normalize_names_list
+from .engine import (
+    CENT_FRACTIONS,
+    EVERYONE_MARKER,
+    SPLIT_ENGINES,
+    BillAccumulator,
+    allocate_cents,
+    calculate_total_bill,
+    money_owed,
+    to_cents,
+)
+from .batch import iter_money_owed_batch, money_owed_batch
+from .incremental import IncrementalSplit
+from .results import AMOUNT_FIELDS, DETAIL_FIELDS, PersonBreakdown, SplitResult
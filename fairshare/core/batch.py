@@ -0,0 +1,85 @@
+"""
+Batch API that splits many independent bills across a process pool
+"""
+
+import os
+
+from .engine import SPLIT_ENGINES, money_owed
+
+# Small bills are grouped into one task until it holds about this many items
+BATCH_CHUNK_ITEMS = 5000
+
+def _chunk_bills(bills, chunk_items):
+    """Group (index, bill) pairs into tasks of roughly chunk_items items"""
+    chunk = []
+    chunk_size = 0
+    for index, bill in enumerate(bills):
+        items = bill[0] if isinstance(bill[0], list) else list(bill[0])
+        chunk.append((index, (items,) + tuple(bill[1:])))
+        chunk_size += max(len(items), 1)
+        if chunk_size >= chunk_items:
+            yield chunk
+            chunk = []
+            chunk_size = 0
+    if chunk:
+        yield chunk
+
+def _split_chunk(chunk, engine, exact_cents):
+    """Split every bill of a chunk inside one worker process"""
+    return [(index, money_owed(*bill, engine=engine, exact_cents=exact_cents)) for index, bill in chunk]
+
+def iter_money_owed_batch(bills, workers=None, chunk_items=BATCH_CHUNK_ITEMS, engine="python", exact_cents=False):
+    """
+    Split many bills in parallel, yielding each result as soon as it is ready
+    
+    Args:
+        bills: Iterable of money_owed argument tuples
+            (items, tax_amount, tip_amount[, extra_fees, discount_amount])
+        workers: Number of worker processes (default: one per core); with a
+            single worker bills are split in the calling process
+        chunk_items: Approximate number of items sent to a worker per task
+        engine: Split engine passed to money_owed
+        exact_cents: Split in integer cents (see money_owed)
+    
+    Yields:
+        tuple: (bill_index, (detailed_results, person_dict_final, running_total_preTaxTip))
+            in completion order
+    """
+    if engine not in SPLIT_ENGINES:
+        raise ValueError(f"Unknown split engine: {engine!r} (expected one of {SPLIT_ENGINES})")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = _chunk_bills(bills, chunk_items)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _split_chunk(chunk, engine, exact_cents)
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_split_chunk, chunk, engine, exact_cents) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def money_owed_batch(bills, workers=None, chunk_items=BATCH_CHUNK_ITEMS, engine="python", exact_cents=False):
+    """
+    Split many independent bills across a process pool
+    
+    Args:
+        bills: Iterable of money_owed argument tuples
+            (items, tax_amount, tip_amount[, extra_fees, discount_amount])
+        workers: Number of worker processes (default: one per core); with a
+            single worker bills are split in the calling process
+        chunk_items: Approximate number of items sent to a worker per task
+        engine: Split engine passed to money_owed
+        exact_cents: Split in integer cents (see money_owed)
+    
+    Returns:
+        list: money_owed result tuple for each bill, in input order
+    """
+    results = dict(iter_money_owed_batch(bills, workers, chunk_items, engine, exact_cents))
+    return [results[index] for index in range(len(results))]
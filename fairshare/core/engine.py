@@ -0,0 +1,254 @@
+"""
+Core bill splitting engine
+Splits items among the people who ate them and allocates tax, tip, extra
+fees and discount by each person's share of the bill
+"""
+
+from array import array
+
+from .normalize import normalize_names_list
+from .results import AMOUNT_FIELDS, SplitResult
+
+# Marker used in an item's people list to share it among everyone on the bill
+EVERYONE_MARKER = "__EVERYONE__"
+
+# Split engines accepted by money_owed
+SPLIT_ENGINES = ("python", "numpy")
+
+# Integer sub-cent units used to split shared items in exact_cents mode
+CENT_FRACTIONS = 10 ** 6
+
+def money_owed(items, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, engine="python", exact_cents=False):
+    """
+    Calculate how much each person owes with a detailed breakdown
+    
+    Args:
+        items: Iterable of tuples (item_name, cost, [people_who_ate_it]); a
+            generator works too, items are only read once
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        engine: "python" for the item-by-item loop, "numpy" for the vectorized
+            engine used on very large bills
+        exact_cents: Work in integer cents and hand out leftover pennies with
+            largest-remainder rounding, so the final amounts add up to the bill
+    
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip),
+            where detailed_results is a SplitResult mapping each person to a
+            dict-like breakdown
+    """
+    if engine not in SPLIT_ENGINES:
+        raise ValueError(f"Unknown split engine: {engine!r} (expected one of {SPLIT_ENGINES})")
+    if engine == "numpy":
+        # Imported here so numpy is only loaded when the vectorized engine is used
+        from .vectorized import money_owed_vectorized
+        return money_owed_vectorized(items, tax_amount, tip_amount, extra_fees, discount_amount, exact_cents)
+
+    bill = BillAccumulator(exact_cents)
+    bill.add_items(items)
+    return bill.distribute(tax_amount, tip_amount, extra_fees, discount_amount)
+
+class BillAccumulator:
+    """
+    Single-pass accumulator behind money_owed
+    
+    Items are read once: names are normalized a single time per item and each
+    serving is added straight into per-person running subtotals and recorded
+    as an (item index, person index) row. Items shared with everyone are held
+    back until the full list of people is known. distribute() then allocates
+    tax, tip, fees and discount in one pass over the people.
+    """
+
+    def __init__(self, exact_cents=False):
+        self.exact_cents = exact_cents
+        self.person_index = {}
+        # Per-person subtotal, in dollars or in CENT_FRACTIONS units of a cent
+        self.person_totals = []
+        self.item_names = []
+        self.item_shares = array('d')
+        self.item_servings = array('q')
+        self.row_items = array('q')
+        self.row_people = array('q')
+        # (item index, cost) of the items shared with everyone
+        self.everyone_items = []
+        # Pre-tax total in dollars or in whole cents
+        self.running_total = 0
+
+    def _person(self, name):
+        """Index of a person, adding them to the bill on first sight"""
+        idx = self.person_index.get(name)
+        if idx is None:
+            idx = self.person_index[name] = len(self.person_totals)
+            self.person_totals.append(0)
+        return idx
+
+    def _add_item_columns(self, item, serving_cost, num_servings):
+        self.item_names.append(item)
+        self.item_shares.append(serving_cost)
+        self.item_servings.append(num_servings)
+        return len(self.item_names) - 1
+
+    def _serving_split(self, cost, num_servings):
+        """Add an item to the running total and split its cost over its servings"""
+        if self.exact_cents:
+            cost_cents = to_cents(cost)
+            self.running_total += cost_cents
+            # Servings are split in fractions of a cent so that no diner collects
+            # the leftover penny of every shared item
+            serving_units, leftover_units = divmod(cost_cents * CENT_FRACTIONS, num_servings)
+            return serving_units / (CENT_FRACTIONS * 100), serving_units, leftover_units
+        self.running_total += cost
+        serving_cost = cost / num_servings
+        return serving_cost, serving_cost, 0
+
+    def add_item(self, item, cost, names):
+        """Add one (item_name, cost, [people_who_ate_it]) line to the bill"""
+        if EVERYONE_MARKER in names:
+            # Named people on an everyone item still join the bill
+            for name in normalize_names_list([n for n in names if n != EVERYONE_MARKER]):
+                self._person(name)
+            self.everyone_items.append((self._add_item_columns(item, 0.0, 0), cost))
+            return
+
+        normalized_names = normalize_names_list(names)
+        if not normalized_names:  # Skip items with no valid names
+            return
+
+        num_servings = len(normalized_names)
+        serving_cost, serving_units, leftover_units = self._serving_split(cost, num_servings)
+        item_idx = self._add_item_columns(item, serving_cost, num_servings)
+
+        person_index = self.person_index
+        person_totals = self.person_totals
+        row_people = self.row_people
+        for name in normalized_names:
+            idx = person_index.get(name)
+            if idx is None:
+                idx = self._person(name)
+            person_totals[idx] += serving_units
+            row_people.append(idx)
+        self.row_items.extend([item_idx] * num_servings)
+        if leftover_units:
+            for idx in row_people[len(row_people) - num_servings:][:leftover_units]:
+                person_totals[idx] += 1
+
+    def add_items(self, items):
+        """Add every (item_name, cost, [people_who_ate_it]) line from an iterable"""
+        for item, cost, names in items:
+            self.add_item(item, cost, names)
+
+    def distribute(self, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
+        """
+        Allocate tax, tip, extra fees and discount by each person's share
+        
+        Call once, after every item has been added.
+        
+        Returns:
+            tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+        """
+        people = list(self.person_index)
+        person_totals = self.person_totals
+        everyone_items = []
+        if people:
+            num_people = len(people)
+            for item_idx, cost in self.everyone_items:
+                serving_cost, serving_units, leftover_units = self._serving_split(cost, num_people)
+                self.item_shares[item_idx] = serving_cost
+                self.item_servings[item_idx] = num_people
+                for idx in range(num_people):
+                    person_totals[idx] += serving_units + (idx < leftover_units)
+                everyone_items.append(item_idx)
+
+        if self.exact_cents:
+            columns, running_total_preTaxTip = self._distribute_cents(tax_amount, tip_amount, extra_fees, discount_amount)
+        else:
+            columns, running_total_preTaxTip = self._distribute_float(tax_amount, tip_amount, extra_fees, discount_amount)
+
+        detailed_results = SplitResult(people, self.item_names, self.item_shares, self.item_servings,
+                                       self.row_items, self.row_people, everyone_items, columns)
+        person_dict_final = dict(zip(people, columns['final_total']))
+        return detailed_results, person_dict_final, running_total_preTaxTip
+
+    def _distribute_float(self, tax_amount, tip_amount, extra_fees, discount_amount):
+        running_total_preTaxTip = self.running_total
+        columns = {field: array('d') for field in AMOUNT_FIELDS}
+        for subtotal in self.person_totals:
+            person_percentage = subtotal / running_total_preTaxTip if running_total_preTaxTip else 0.0
+            person_tax = person_percentage * tax_amount
+            person_tip = person_percentage * tip_amount
+            person_extra_fees = person_percentage * extra_fees
+            person_discount = person_percentage * discount_amount
+            columns['subtotal_before_tax_tip'].append(round(subtotal, 2))
+            columns['percentage_of_bill'].append(round(person_percentage * 100, 2))
+            columns['tax_amount'].append(round(person_tax, 2))
+            columns['tip_amount'].append(round(person_tip, 2))
+            columns['extra_fees_amount'].append(round(person_extra_fees, 2))
+            columns['discount_amount'].append(round(person_discount, 2))
+            columns['final_total'].append(round(person_tax + person_tip + person_extra_fees + subtotal - person_discount, 2))
+        return columns, running_total_preTaxTip
+
+    def _distribute_cents(self, tax_amount, tip_amount, extra_fees, discount_amount):
+        running_total_cents = self.running_total
+        subtotals = allocate_cents(running_total_cents, self.person_totals)
+        tax_cents = allocate_cents(to_cents(tax_amount), subtotals)
+        tip_cents = allocate_cents(to_cents(tip_amount), subtotals)
+        extra_fees_cents = allocate_cents(to_cents(extra_fees), subtotals)
+        discount_cents = allocate_cents(to_cents(discount_amount), subtotals)
+
+        columns = {field: array('d') for field in AMOUNT_FIELDS}
+        for idx, subtotal in enumerate(subtotals):
+            final_cents = subtotal + tax_cents[idx] + tip_cents[idx] + extra_fees_cents[idx] - discount_cents[idx]
+            person_percentage = subtotal / running_total_cents if running_total_cents else 0.0
+            columns['subtotal_before_tax_tip'].append(subtotal / 100)
+            columns['percentage_of_bill'].append(round(person_percentage * 100, 2))
+            columns['tax_amount'].append(tax_cents[idx] / 100)
+            columns['tip_amount'].append(tip_cents[idx] / 100)
+            columns['extra_fees_amount'].append(extra_fees_cents[idx] / 100)
+            columns['discount_amount'].append(discount_cents[idx] / 100)
+            columns['final_total'].append(final_cents / 100)
+        return columns, running_total_cents / 100
+
+def to_cents(amount):
+    """Convert a dollar amount to a whole number of cents"""
+    return int(round(amount * 100))
+
+def allocate_cents(total_cents, weights):
+    """
+    Split a whole number of cents in proportion to integer weights
+    
+    Every share is rounded down, then the leftover pennies go to the largest
+    remainders (ties go to the earliest weight), so the shares always add
+    up to total_cents exactly.
+    
+    Args:
+        total_cents: Amount to split, in cents
+        weights: Non-negative integer weight for each share
+    
+    Returns:
+        list: Cents allocated to each weight
+    """
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+
+    shares = []
+    remainders = []
+    for weight in weights:
+        share, remainder = divmod(total_cents * weight, weight_sum)
+        shares.append(share)
+        remainders.append(remainder)
+
+    leftover = total_cents - sum(shares)
+    if leftover:
+        by_remainder = sorted(range(len(weights)), key=lambda idx: -remainders[idx])
+        for idx in by_remainder[:leftover]:
+            shares[idx] += 1
+    return shares
+
+def calculate_total_bill(items, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
+    """Calculate the total bill amount including tax, tip, extra fees, and discount"""
+    subtotal = sum(cost for _, cost, _ in items)
+    total = subtotal + tax_amount + tip_amount + extra_fees - discount_amount
+    return subtotal, total
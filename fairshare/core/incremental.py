@@ -0,0 +1,208 @@
+"""
+Incremental split state for bills that are edited one item at a time
+"""
+
+from array import array
+
+from .engine import EVERYONE_MARKER
+from .normalize import normalize_names_list
+from .results import AMOUNT_FIELDS, SplitResult
+
+class IncrementalSplit:
+    """
+    Running split that is updated item by item
+    
+    Adding, removing, ignoring or restoring an item only touches the people
+    on that item. Items shared with everyone are kept as one running total
+    that is spread over the current people when charges are distributed, so
+    redistributing tax, tip, fees and discount is a single O(people) step.
+    The results match money_owed on the active (not ignored) items.
+    """
+
+    def __init__(self, items=()):
+        # key -> (item_name, cost, normalized_names, shared_with_everyone)
+        self._items = {}
+        self._ignored = set()
+        self._next_key = 0
+        # Subtotal and items (key -> servings) of every person on an active item
+        self._person_totals = {}
+        self._person_items = {}
+        # Number of active items naming each person
+        self._person_refs = {}
+        self._named_total = 0.0
+        self._everyone_total = 0.0
+        self._everyone_keys = {}
+        for item, cost, names in items:
+            self.add_item(item, cost, names)
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def people(self):
+        """Normalized names of everyone on the active items"""
+        return list(self._person_refs)
+
+    def add_item(self, item, cost, names):
+        """
+        Add an (item_name, cost, [people_who_ate_it]) line to the bill
+        
+        Returns:
+            int: Key used to remove, ignore or restore the item later
+        """
+        shared_with_everyone = EVERYONE_MARKER in names
+        normalized_names = normalize_names_list([n for n in names if n != EVERYONE_MARKER])
+        key = self._next_key
+        self._next_key += 1
+        self._items[key] = (item, cost, normalized_names, shared_with_everyone)
+        self._apply(key, 1)
+        return key
+
+    def remove_item(self, key):
+        """Delete an item from the bill"""
+        if key not in self._ignored:
+            self._apply(key, -1)
+        self._ignored.discard(key)
+        del self._items[key]
+
+    def ignore_item(self, key):
+        """Leave an item out of the split without deleting it"""
+        if key not in self._ignored:
+            self._apply(key, -1)
+            self._ignored.add(key)
+
+    def restore_item(self, key):
+        """Bring an ignored item back into the split"""
+        if key in self._ignored:
+            self._ignored.discard(key)
+            self._apply(key, 1)
+
+    def is_ignored(self, key):
+        """Whether an item is currently left out of the split"""
+        return key in self._ignored
+
+    def _apply(self, key, sign):
+        """Add (sign=1) or take back (sign=-1) one item's contribution"""
+        item, cost, normalized_names, shared_with_everyone = self._items[key]
+        for name in set(normalized_names):
+            refs = self._person_refs.get(name, 0) + sign
+            if refs:
+                self._person_refs[name] = refs
+            else:
+                del self._person_refs[name]
+
+        if shared_with_everyone:
+            self._everyone_total += sign * cost
+            if sign > 0:
+                self._everyone_keys[key] = None
+            else:
+                del self._everyone_keys[key]
+            return
+        if not normalized_names:
+            return
+
+        self._named_total += sign * cost
+        split_cost_of_item = cost / len(normalized_names)
+        for name in normalized_names:
+            person_items = self._person_items.setdefault(name, {})
+            servings = person_items.get(key, 0) + sign
+            if servings:
+                person_items[key] = servings
+                self._person_totals[name] = self._person_totals.get(name, 0.0) + sign * split_cost_of_item
+            else:
+                del person_items[key]
+                if not person_items:
+                    # Drop the running float total with the last item so no rounding residue is left
+                    del self._person_items[name]
+                    del self._person_totals[name]
+                else:
+                    self._person_totals[name] -= split_cost_of_item
+
+    def _subtotals(self):
+        """Per-person subtotals and the pre-tax total of the active items"""
+        people = self.people
+        if not people:
+            return {}, 0.0
+        everyone_share = self._everyone_total / len(people)
+        subtotals = {person: self._person_totals.get(person, 0.0) + everyone_share for person in people}
+        return subtotals, self._named_total + self._everyone_total
+
+    def totals(self, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0):
+        """
+        Final amount owed per person, without the itemized breakdown
+        
+        Returns:
+            dict: person -> final total (same as money_owed's person_dict_final)
+        """
+        return self.result(tax_amount, tip_amount, extra_fees, discount_amount, include_items=False)[1]
+
+    def result(self, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, include_items=True):
+        """
+        Distribute tax, tip, extra fees and discount over the current subtotals
+        
+        Args:
+            tax_amount: Total tax amount
+            tip_amount: Total tip amount
+            extra_fees: Total extra fees/surcharges
+            discount_amount: Total discount amount
+            include_items: Also build the detailed results (otherwise an empty
+                dict is returned in their place)
+        
+        Returns:
+            tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+        """
+        subtotals, running_total_preTaxTip = self._subtotals()
+        people = list(subtotals)
+
+        columns = {field: array('d') for field in AMOUNT_FIELDS}
+        for subtotal in subtotals.values():
+            person_percentage = subtotal / running_total_preTaxTip if running_total_preTaxTip else 0.0
+            person_tax = person_percentage * tax_amount
+            person_tip = person_percentage * tip_amount
+            person_extra_fees = person_percentage * extra_fees
+            person_discount = person_percentage * discount_amount
+            columns['subtotal_before_tax_tip'].append(round(subtotal, 2))
+            columns['percentage_of_bill'].append(round(person_percentage * 100, 2))
+            columns['tax_amount'].append(round(person_tax, 2))
+            columns['tip_amount'].append(round(person_tip, 2))
+            columns['extra_fees_amount'].append(round(person_extra_fees, 2))
+            columns['discount_amount'].append(round(person_discount, 2))
+            columns['final_total'].append(round(person_tax + person_tip + person_extra_fees + subtotal - person_discount, 2))
+
+        person_dict_final = dict(zip(people, columns['final_total']))
+        detailed_results = self._split_result(people, columns) if include_items else {}
+        return detailed_results, person_dict_final, running_total_preTaxTip
+
+    def _split_result(self, people, columns):
+        """Columnar SplitResult of the active items"""
+        item_names = []
+        item_shares = array('d')
+        item_servings = array('q')
+        everyone_items = []
+        item_index = {}
+        for key, (item, cost, normalized_names, shared_with_everyone) in self._items.items():
+            if key in self._ignored:
+                continue
+            if shared_with_everyone:
+                if not people:
+                    continue
+                num_servings = len(people)
+                everyone_items.append(len(item_names))
+            elif normalized_names:
+                num_servings = len(normalized_names)
+            else:
+                continue
+            item_index[key] = len(item_names)
+            item_names.append(item)
+            item_shares.append(cost / num_servings)
+            item_servings.append(num_servings)
+
+        row_items = array('q')
+        row_people = array('q')
+        for person_idx, person in enumerate(people):
+            for key, servings in self._person_items.get(person, {}).items():
+                row_items.extend([item_index[key]] * servings)
+                row_people.extend([person_idx] * servings)
+
+        return SplitResult(people, item_names, item_shares, item_servings,
+                           row_items, row_people, everyone_items, columns)
@@ -0,0 +1,98 @@
+"""
+Name normalization shared by every split engine
+Raw name entries are normalized once per distinct string and the results
+are interned, so repeated names across items cost a cache lookup
+"""
+
+import sys
+from functools import lru_cache
+
+# Number of distinct raw name strings kept by the normalization cache
+NAME_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _normalize_cached(name):
+    return sys.intern(name.strip().title())
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _normalize_entry(name_entry):
+    """Normalized names in one raw entry, e.g. 'alice, BOB' -> ('Alice', 'Bob')"""
+    return tuple(sys.intern(name) for name in (part.strip().title() for part in name_entry.split(',')) if name)
+
+def normalize_name(name):
+    """
+    Normalize a name by trimming whitespace and converting to title case
+    
+    Args:
+        name: Raw name string
+    
+    Returns:
+        str: Normalized name (trimmed and title case)
+    """
+    if not name or not isinstance(name, str):
+        return ""
+    return _normalize_cached(name)
+
+def normalize_names_list(names):
+    """
+    Normalize a list of names by trimming whitespace and converting to title case
+    
+    Args:
+        names: List of name strings (can include comma-separated values)
+    
+    Returns:
+        list: List of normalized names
+    """
+    if not names:
+        return []
+
+    normalized = []
+    for name_entry in names:
+        if name_entry and isinstance(name_entry, str):
+            normalized.extend(_normalize_entry(name_entry))
+    return normalized
+
+def normalize_names_bulk(values):
+    """
+    Normalize a whole column or list of raw name entries at once
+    
+    Each distinct entry is normalized only once. A pandas Series or Index is
+    factorized and its distinct entries are split, trimmed and title-cased
+    with vectorized string operations.
+    
+    Args:
+        values: pandas Series/Index or iterable of raw name entries (each
+            may hold comma-separated names; non-strings count as no names)
+    
+    Returns:
+        list: Tuple of normalized names for each value
+    """
+    if hasattr(values, 'factorize') and hasattr(values, 'str'):
+        return _normalize_pandas(values)
+
+    normalized = {}
+    results = []
+    for name_entry in values:
+        if not name_entry or not isinstance(name_entry, str):
+            results.append(())
+            continue
+        names = normalized.get(name_entry)
+        if names is None:
+            names = normalized[name_entry] = _normalize_entry(name_entry)
+        results.append(names)
+    return results
+
+def _normalize_pandas(values):
+    """normalize_names_bulk for a pandas Series or Index"""
+    import pandas as pd
+
+    codes, uniques = values.factorize()
+    uniques = pd.Series(uniques, dtype=object)
+    entries = uniques[[isinstance(value, str) for value in uniques]]
+    names = entries.str.split(',').explode().str.strip().str.title()
+    names = names[names != '']
+
+    normalized_uniques = [()] * len(uniques)
+    for position, group in names.groupby(level=0, sort=False):
+        normalized_uniques[position] = tuple(sys.intern(name) for name in group)
+    return [normalized_uniques[code] if code >= 0 else () for code in codes.tolist()]
@@ -0,0 +1,136 @@
+"""
+Compact, column-oriented split results
+"""
+
+from array import array
+from collections.abc import Mapping
+
+# Per-person numeric fields of a detailed breakdown, in display order
+AMOUNT_FIELDS = (
+    'subtotal_before_tax_tip',
+    'percentage_of_bill',
+    'tax_amount',
+    'tip_amount',
+    'extra_fees_amount',
+    'discount_amount',
+    'final_total',
+)
+
+# Keys of each person's detailed breakdown
+DETAIL_FIELDS = ('items_eaten',) + AMOUNT_FIELDS
+
+class SplitResult(Mapping):
+    """
+    detailed_results of a split, stored column-wise
+    
+    Item names, per-serving costs and serving counts are stored once per
+    item, and every serving is one (item index, person index) row in shared
+    arrays. Items shared with everyone are stored once instead of once per
+    person. Indexing by person returns a lazy PersonBreakdown that reads
+    like the classic {'items_eaten': [...], 'final_total': ...} dict, and
+    items_eaten tuples are only built when asked for.
+    """
+
+    __slots__ = (
+        'people', 'item_names', 'item_shares', 'item_servings',
+        'row_items', 'row_people', 'everyone_items', 'columns',
+        '_person_index', '_row_order', '_row_starts',
+    )
+
+    def __init__(self, people, item_names, item_shares, item_servings, row_items, row_people,
+                 everyone_items, columns):
+        """
+        Args:
+            people: Normalized name of each person index
+            item_names: Name of each item
+            item_shares: Cost of one serving of each item
+            item_servings: Number of servings of each item
+            row_items: Item index of each serving (items shared with everyone excluded)
+            row_people: Person index of each serving
+            everyone_items: Indices of the items shared with everyone
+            columns: AMOUNT_FIELDS name -> value for each person index
+        """
+        self.people = people
+        self.item_names = item_names
+        self.item_shares = item_shares
+        self.item_servings = item_servings
+        self.row_items = row_items
+        self.row_people = row_people
+        self.everyone_items = everyone_items
+        self.columns = columns
+        self._person_index = {person: idx for idx, person in enumerate(people)}
+        self._row_order = None
+        self._row_starts = None
+
+    def __getitem__(self, person):
+        return PersonBreakdown(self, self._person_index[person])
+
+    def __iter__(self):
+        return iter(self.people)
+
+    def __len__(self):
+        return len(self.people)
+
+    def __contains__(self, person):
+        return person in self._person_index
+
+    def __repr__(self):
+        return f"SplitResult({len(self.people)} people, {len(self.item_names)} items)"
+
+    def _group_rows(self):
+        """Index the serving rows by person (once, on first itemized access)"""
+        row_people = self.row_people
+        order = array('q', sorted(range(len(row_people)), key=row_people.__getitem__))
+        starts = array('q', bytes(8 * (len(self.people) + 1)))
+        for person_idx in row_people:
+            starts[person_idx + 1] += 1
+        for idx in range(len(self.people)):
+            starts[idx + 1] += starts[idx]
+        self._row_order = order
+        self._row_starts = starts
+
+    def item_count(self, person_idx):
+        """Number of servings a person had, without building items_eaten"""
+        if self._row_starts is None:
+            self._group_rows()
+        own_servings = self._row_starts[person_idx + 1] - self._row_starts[person_idx]
+        return own_servings + len(self.everyone_items)
+
+    def items_eaten(self, person_idx):
+        """(item, split_cost, num_people_shared) for each serving a person had"""
+        if self._row_starts is None:
+            self._group_rows()
+        names, shares, servings = self.item_names, self.item_shares, self.item_servings
+        row_items = self.row_items
+        rows = self._row_order[self._row_starts[person_idx]:self._row_starts[person_idx + 1]]
+        items_eaten = [(names[i], shares[i], servings[i]) for i in [row_items[row] for row in rows]]
+        items_eaten.extend((names[i], shares[i], servings[i]) for i in self.everyone_items)
+        return items_eaten
+
+class PersonBreakdown(Mapping):
+    """Read-only, dict-like view of one person's detailed breakdown"""
+
+    __slots__ = ('_result', '_index')
+
+    def __init__(self, result, index):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == 'items_eaten':
+            return self._result.items_eaten(self._index)
+        return self._result.columns[key][self._index]
+
+    def __iter__(self):
+        return iter(DETAIL_FIELDS)
+
+    def __len__(self):
+        return len(DETAIL_FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    @property
+    def item_count(self):
+        """Number of servings in items_eaten, without building the list"""
+        return self._result.item_count(self._index)
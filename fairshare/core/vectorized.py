@@ -0,0 +1,177 @@
+"""
+Vectorized NumPy split engine for bills with many line items
+"""
+
+from array import array
+
+import numpy as np
+
+from .engine import CENT_FRACTIONS, EVERYONE_MARKER, to_cents
+from .normalize import normalize_names_list
+from .results import AMOUNT_FIELDS, SplitResult
+
+def money_owed_vectorized(items, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, exact_cents=False):
+    """
+    Vectorized version of money_owed for bills with many line items
+    
+    Names are normalized once per item to build an items x people serving
+    matrix (stored sparsely as one row per serving). Subtotals, bill
+    percentages and the tax/tip/fee/discount allocations are then computed
+    as array operations.
+    
+    Args:
+        items: Iterable of tuples (item_name, cost, [people_who_ate_it])
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        exact_cents: Split in integer cents with largest-remainder rounding
+    
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+    """
+    item_names = []
+    item_costs = []
+    row_items = []
+    row_people = []
+    everyone_items = []
+    person_index = {}
+
+    for item, cost, names in items:
+        has_everyone = EVERYONE_MARKER in names
+        normalized_names = normalize_names_list([n for n in names if n != EVERYONE_MARKER])
+        for name in normalized_names:
+            if name not in person_index:
+                person_index[name] = len(person_index)
+        if has_everyone:
+            # Resolved once all people on the bill are known
+            everyone_items.append(len(item_names))
+        elif normalized_names:
+            item_idx = len(item_names)
+            row_items.extend([item_idx] * len(normalized_names))
+            row_people.extend(person_index[name] for name in normalized_names)
+        else:
+            continue
+        item_names.append(item)
+        item_costs.append(cost)
+
+    return split_serving_matrix(item_names, item_costs, row_items, row_people, list(person_index),
+                                tax_amount, tip_amount, extra_fees, discount_amount, exact_cents,
+                                everyone_items)
+
+def split_serving_matrix(item_names, item_costs, row_items, row_people, people,
+                         tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, exact_cents=False,
+                         everyone_items=()):
+    """
+    Split a bill given as a sparse items x people serving matrix
+    
+    Args:
+        item_names: Name of each item
+        item_costs: Cost of each item
+        row_items: Item index of each serving
+        row_people: Person index of each serving
+        people: Normalized name of each person index
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        exact_cents: Split in integer cents with largest-remainder rounding
+        everyone_items: Indices of items shared with everyone, which get one
+            serving per person and have no rows of their own
+    
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+    """
+    named_items = np.asarray(row_items, dtype=np.int64)
+    named_people = np.asarray(row_people, dtype=np.int64)
+    everyone_items = list(everyone_items) if people else []
+    num_people = len(people)
+
+    row_items, row_people = named_items, named_people
+    if everyone_items:
+        # Each everyone item gets one serving per person on the bill
+        everyone = np.asarray(everyone_items, dtype=np.int64)
+        row_items = np.concatenate([named_items, np.repeat(everyone, num_people)])
+        row_people = np.concatenate([named_people, np.tile(np.arange(num_people, dtype=np.int64), len(everyone))])
+
+    servings_per_item = np.bincount(row_items, minlength=len(item_names))
+    if exact_cents:
+        item_shares, amounts, running_total_preTaxTip = _split_cents(
+            item_costs, row_items, row_people, servings_per_item, num_people,
+            tax_amount, tip_amount, extra_fees, discount_amount)
+    else:
+        item_shares, amounts, running_total_preTaxTip = _split_float(
+            item_costs, row_items, row_people, servings_per_item, num_people,
+            tax_amount, tip_amount, extra_fees, discount_amount)
+
+    columns = {field: array('d', [round(value, 2) for value in values.tolist()])
+               for field, values in zip(AMOUNT_FIELDS, amounts)}
+    detailed_results = SplitResult(
+        people, list(item_names), array('d', item_shares.tobytes()), array('q', servings_per_item.astype(np.int64).tobytes()),
+        array('q', named_items.tobytes()), array('q', named_people.tobytes()), everyone_items, columns)
+    person_dict_final = dict(zip(people, columns['final_total']))
+    return detailed_results, person_dict_final, running_total_preTaxTip
+
+def _split_float(item_costs, row_items, row_people, servings_per_item, num_people,
+                 tax_amount, tip_amount, extra_fees, discount_amount):
+    """Per-serving costs and per-person amounts in float dollars"""
+    item_costs = np.asarray(item_costs, dtype=float)
+
+    # Cost vector split over the serving count of each item
+    item_shares = np.divide(item_costs, servings_per_item, out=np.zeros(len(item_costs)), where=servings_per_item > 0)
+    row_shares = item_shares[row_items]
+    subtotals = np.bincount(row_people, weights=row_shares, minlength=num_people)
+    running_total_preTaxTip = float(row_shares.sum())
+
+    if running_total_preTaxTip:
+        percent_of_bill = subtotals / running_total_preTaxTip
+    else:
+        percent_of_bill = np.zeros(num_people)
+
+    # One column per charge: tax, tip, extra fees, discount
+    charges = np.outer(percent_of_bill, [tax_amount, tip_amount, extra_fees, discount_amount])
+    finals = subtotals + charges[:, 0] + charges[:, 1] + charges[:, 2] - charges[:, 3]
+    amounts = (subtotals, percent_of_bill * 100, charges[:, 0], charges[:, 1], charges[:, 2], charges[:, 3], finals)
+    return item_shares, amounts, running_total_preTaxTip
+
+def _split_cents(item_costs, row_items, row_people, servings_per_item, num_people,
+                 tax_amount, tip_amount, extra_fees, discount_amount):
+    """Per-serving costs and per-person amounts in integer cents (see BillAccumulator)"""
+    item_cents = np.rint(np.asarray(item_costs, dtype=float) * 100).astype(np.int64)
+
+    # Split each item over its servings in sub-cent units; the first servings get the leftover units
+    by_item = np.argsort(row_items, kind='stable')
+    first_row = np.concatenate(([0], np.cumsum(servings_per_item)[:-1]))
+    serving_rank = np.empty(len(row_items), dtype=np.int64)
+    serving_rank[by_item] = np.arange(len(row_items)) - first_row[row_items[by_item]]
+    item_units, item_leftover = np.divmod(item_cents * CENT_FRACTIONS, np.maximum(servings_per_item, 1))
+    row_units = item_units[row_items] + (serving_rank < item_leftover[row_items])
+
+    person_units = np.zeros(num_people, dtype=np.int64)
+    np.add.at(person_units, row_people, row_units)
+    running_total_cents = int(item_cents[servings_per_item > 0].sum())
+
+    # Round subtotals to whole cents, leftover cents to the largest remainders
+    order = np.arange(num_people)
+    subtotals, remainders = np.divmod(person_units, CENT_FRACTIONS)
+    winners = np.lexsort((order, -remainders))[:running_total_cents - int(subtotals.sum())]
+    subtotals[winners] += 1
+
+    charge_cents = [to_cents(amount) for amount in (tax_amount, tip_amount, extra_fees, discount_amount)]
+    charges = np.zeros((num_people, 4), dtype=np.int64)
+    if running_total_cents:
+        for col, total_cents in enumerate(charge_cents):
+            shares, remainders = np.divmod(subtotals * total_cents, running_total_cents)
+            # Leftover pennies go to the largest remainders, ties to the earliest person
+            winners = np.lexsort((order, -remainders))[:total_cents - int(shares.sum())]
+            shares[winners] += 1
+            charges[:, col] = shares
+        percent_of_bill = subtotals / running_total_cents
+    else:
+        percent_of_bill = np.zeros(num_people)
+    finals = subtotals + charges[:, 0] + charges[:, 1] + charges[:, 2] - charges[:, 3]
+
+    item_shares = item_units / (CENT_FRACTIONS * 100)
+    amounts = (subtotals / 100, percent_of_bill * 100, charges[:, 0] / 100, charges[:, 1] / 100,
+               charges[:, 2] / 100, charges[:, 3] / 100, finals / 100)
+    return item_shares, amounts, running_total_cents / 100
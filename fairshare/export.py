@@ -0,0 +1,186 @@
+"""
+Machine-readable exports of a split for ledgers and spreadsheets
+
+Two tables can be exported, as CSV, JSON Lines or Parquet:
+
+- people: one row per person with every amount field (see AMOUNT_FIELDS);
+- allocations: one row per (person, item) with the servings the person had,
+  the item's total servings, the cost of one serving and the amount.
+
+Both are built as whole columns straight from a SplitResult's arrays, so a
+large event is exported without formatting any row in Python. Parquet needs
+pyarrow, which is optional and only imported when a Parquet export is made.
+
+    from fairshare.export import write_export
+    write_export(detailed_result, "allocations.parquet", "parquet", table="allocations")
+"""
+
+import importlib.util
+import io
+
+from .core import AMOUNT_FIELDS, SplitResult
+from .lazy import load
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_TABLES = ("people", "allocations")
+
+# Columns of the allocations table
+ALLOCATION_FIELDS = ("person", "item", "servings", "item_servings", "share_per_serving", "amount")
+
+# Download file extension and MIME type of each format
+EXPORT_FILE_TYPES = {
+    "csv": (".csv", "text/csv"),
+    "jsonl": (".jsonl", "application/x-ndjson"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+def parquet_available():
+    """Whether pyarrow is installed, without importing it"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def person_columns(detailed_breakdowns):
+    """
+    Columns of the people table
+
+    Args:
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+
+    Returns:
+        dict: {'person': names, field: values for each AMOUNT_FIELDS field}
+    """
+    np = load("numpy")
+    if isinstance(detailed_breakdowns, SplitResult):
+        columns = {'person': np.array(detailed_breakdowns.people, dtype=object)}
+        columns.update((field, np.asarray(detailed_breakdowns.columns[field], dtype=float)) for field in AMOUNT_FIELDS)
+        return columns
+    columns = {'person': np.array(list(detailed_breakdowns), dtype=object)}
+    columns.update((field, np.array([details.get(field, 0.0) for details in detailed_breakdowns.values()], dtype=float))
+                   for field in AMOUNT_FIELDS)
+    return columns
+
+def _split_allocations(result):
+    """Allocation columns of a SplitResult, from its serving rows"""
+    np = load("numpy")
+    num_people, num_items = len(result.people), len(result.item_names)
+    everyone = np.asarray(result.everyone_items, dtype=np.int64)
+    # Items shared with everyone are stored once, so they are expanded to a row per person here
+    person_index = np.concatenate([np.asarray(result.row_people, dtype=np.int64),
+                                   np.repeat(np.arange(num_people, dtype=np.int64), len(everyone))])
+    item_index = np.concatenate([np.asarray(result.row_items, dtype=np.int64), np.tile(everyone, num_people)])
+    # One line per (person, item), in person then item order, counting the person's servings
+    pairs, servings = np.unique(person_index * max(num_items, 1) + item_index, return_counts=True)
+    person_index, item_index = np.divmod(pairs, max(num_items, 1))
+    shares = np.asarray(result.item_shares, dtype=float)[item_index]
+    return {
+        'person': np.array(result.people, dtype=object)[person_index],
+        'item': np.array(result.item_names, dtype=object)[item_index],
+        'servings': servings,
+        'item_servings': np.asarray(result.item_servings, dtype=np.int64)[item_index],
+        'share_per_serving': shares,
+        'amount': np.round(shares * servings, 2),
+    }
+
+def allocation_columns(detailed_breakdowns):
+    """
+    Columns of the allocations table
+
+    Args:
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+
+    Returns:
+        dict: ALLOCATION_FIELDS columns, one row per (person, item) in person order
+    """
+    np = load("numpy")
+    if isinstance(detailed_breakdowns, SplitResult):
+        return _split_allocations(detailed_breakdowns)
+
+    lines = {}
+    for person, details in detailed_breakdowns.items():
+        for item_data in details['items_eaten']:
+            item, cost = item_data[0], item_data[1]
+            item_servings = item_data[2] if len(item_data) == 3 else 1
+            line = lines.get((person, item))
+            if line is None:
+                lines[(person, item)] = [person, item, 1, item_servings, cost]
+            else:
+                line[2] += 1
+    persons, items, servings, item_servings, shares = zip(*lines.values()) if lines else ((),) * 5
+    shares = np.array(shares, dtype=float)
+    servings = np.array(servings, dtype=np.int64)
+    return {
+        'person': np.array(persons, dtype=object),
+        'item': np.array(items, dtype=object),
+        'servings': servings,
+        'item_servings': np.array(item_servings, dtype=np.int64),
+        'share_per_serving': shares,
+        'amount': np.round(shares * servings, 2),
+    }
+
+def export_columns(detailed_breakdowns, table="people"):
+    """
+    Columns of one export table
+
+    Args:
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        table: "people" or "allocations"
+
+    Returns:
+        dict: {column name: array}
+    """
+    if table == "people":
+        return person_columns(detailed_breakdowns)
+    if table == "allocations":
+        return allocation_columns(detailed_breakdowns)
+    raise ValueError(f"unknown export table {table!r}, expected one of {EXPORT_TABLES}")
+
+def write_export(detailed_breakdowns, output, file_format="csv", table="people"):
+    """
+    Write one export table of a split
+
+    Args:
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        output: File path, or a binary stream (Parquet) or text stream (CSV
+            and JSON Lines)
+        file_format: "csv", "jsonl" or "parquet"
+        table: "people" or "allocations"
+
+    Raises:
+        ImportError: If Parquet is asked for and pyarrow is not installed
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {file_format!r}, expected one of {EXPORT_FORMATS}")
+    columns = export_columns(detailed_breakdowns, table)
+    if file_format == "parquet":
+        try:
+            pa = load("pyarrow")
+            pq = load("pyarrow.parquet")
+        except ImportError as e:
+            raise ImportError("Parquet exports need pyarrow (pip install pyarrow)") from e
+        pq.write_table(pa.table(columns), output)
+        return
+
+    frame = load("pandas").DataFrame(columns, copy=False)
+    if file_format == "csv":
+        frame.to_csv(output, index=False, lineterminator="\n")
+    else:
+        frame.to_json(output, orient="records", lines=True, force_ascii=False)
+
+def export_bytes(detailed_breakdowns, file_format="csv", table="people"):
+    """
+    One export table of a split as bytes, e.g. for a download button
+
+    Args:
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        file_format: "csv", "jsonl" or "parquet"
+        table: "people" or "allocations"
+
+    Returns:
+        bytes: The exported file (CSV and JSON Lines in UTF-8)
+    """
+    if file_format == "parquet":
+        output = io.BytesIO()
+        write_export(detailed_breakdowns, output, file_format, table)
+        return output.getvalue()
+    output = io.StringIO()
+    write_export(detailed_breakdowns, output, file_format, table)
+    return output.getvalue().encode("utf-8")
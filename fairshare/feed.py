@@ -0,0 +1,392 @@
+"""
+Live tabs from a local point-of-sale feed of JSON Lines order events
+
+The POS appends one JSON object per line to a file, or writes them to a
+local Unix socket:
+
+    {"event": "add", "id": "t7-1", "item": "Pizza", "amount": 20.0, "people": ["alice", "Bob"]}
+    {"event": "void", "id": "t7-1"}
+
+"event" defaults to "add". "people" is a list or a comma-separated string;
+an empty or missing list shares the item with everyone on the tab. An "id"
+is only needed to void the line later.
+
+An asyncio task tails the feed and applies each batch of lines to a running
+IncrementalSplit, so every event only touches the people on its item.
+FeedRunner runs that task on a background thread for Streamlit, whose
+reruns poll a FeedSnapshot of the current state.
+
+    python -m fairshare.feed orders.jsonl --standin 20000 --rate 5000
+"""
+
+import asyncio
+import codecs
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+from .core import EVERYONE_MARKER, IncrementalSplit
+
+# Bytes read from the feed at a time; every complete line read is applied as one batch
+FEED_READ_BYTES = 256 * 1024
+
+# Seconds to wait before looking for new lines at the end of a feed file
+FEED_POLL_SECONDS = 0.05
+
+# People who order in the stand-in feed
+STANDIN_PEOPLE = ("alice", "Bob", "charlie", "Dana", "eve", "Frank")
+
+class FeedSnapshot(namedtuple("FeedSnapshot", "events items errors last_error updated_at result")):
+    """
+    State of a live tab at one moment
+
+    events counts the lines applied, items the lines currently on the tab,
+    errors the lines skipped (last_error says why the last one was) and
+    updated_at is the time.time() of the last applied batch, or None.
+    result is the split tuple (detailed_results, person_dict_final,
+    running_total_preTaxTip) for the charges the snapshot was taken with.
+    """
+    __slots__ = ()
+
+def parse_feed_event(line):
+    """
+    Parse one feed line
+
+    Args:
+        line: JSON text of one event
+
+    Returns:
+        tuple: ("add", id or None, (item_name, cost, [people])) or
+            ("void", id, None)
+
+    Raises:
+        ValueError: If the line is not a valid event
+    """
+    payload = json.loads(line)
+    if not isinstance(payload, dict):
+        raise ValueError("feed event is not a JSON object")
+    kind = payload.get("event", "add")
+    if kind == "add":
+        if "item" not in payload or "amount" not in payload:
+            raise ValueError("add event needs an item and an amount")
+        people = payload.get("people") or []
+        if isinstance(people, str):
+            people = [people]
+        names = [name for name in people if isinstance(name, str) and name.strip()]
+        amount = float(payload["amount"])
+        if not math.isfinite(amount):
+            # NaN or infinity would poison every share on the tab
+            raise ValueError(f"amount is not a finite number: {payload['amount']!r}")
+        return kind, payload.get("id"), (str(payload["item"]), amount, names or [EVERYONE_MARKER])
+    if kind in ("void", "remove"):
+        if payload.get("id") is None:
+            raise ValueError(f"{kind} event needs an id")
+        return "void", payload["id"], None
+    raise ValueError(f"unknown feed event {kind!r}")
+
+class FeedSplit:
+    """
+    Running split of a live tab, safe to read from another thread
+
+    Batches of lines are applied under a lock, so a Streamlit rerun taking a
+    snapshot never sees a half-applied batch.
+    """
+
+    def __init__(self):
+        self._split = IncrementalSplit()
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.events = 0
+        self.errors = 0
+        self.last_error = None
+        self.updated_at = None
+
+    def apply_lines(self, lines):
+        """
+        Apply a batch of feed lines; blank lines are ignored and bad ones counted
+
+        Args:
+            lines: Iterable of JSON text lines
+        """
+        events = []
+        errors = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                events.append(parse_feed_event(line))
+            except (ValueError, TypeError) as e:
+                errors.append(str(e))
+
+        with self._lock:
+            split = self._split
+            keys = self._keys
+            applied = 0
+            for kind, event_id, item in events:
+                if kind == "add":
+                    key = split.add_item(*item)
+                    if event_id is not None:
+                        previous = keys.get(event_id)
+                        if previous is not None:
+                            # A repeated id replaces the earlier line
+                            split.remove_item(previous)
+                        keys[event_id] = key
+                else:
+                    key = keys.pop(event_id, None)
+                    if key is None:
+                        errors.append(f"void of unknown id {event_id!r}")
+                        continue
+                    split.remove_item(key)
+                applied += 1
+            self.events += applied
+            if errors:
+                self.errors += len(errors)
+                self.last_error = errors[-1]
+            self.updated_at = time.time()
+
+    def snapshot(self, tax_amount=0.0, tip_amount=0.0, extra_fees=0.0, discount_amount=0.0, include_items=True):
+        """
+        Current state of the tab, split with the given charges
+
+        Args:
+            tax_amount: Total tax amount
+            tip_amount: Total tip amount
+            extra_fees: Total extra fees/surcharges
+            discount_amount: Total discount amount
+            include_items: Also build the itemized breakdown (see IncrementalSplit.result)
+
+        Returns:
+            FeedSnapshot
+        """
+        with self._lock:
+            result = self._split.result(tax_amount, tip_amount, extra_fees, discount_amount, include_items)
+            return FeedSnapshot(self.events, len(self._split), self.errors, self.last_error, self.updated_at, result)
+
+def _complete_lines(pending, data):
+    """Split buffered text into complete lines and the unfinished rest"""
+    lines = (pending + data).split("\n")
+    return lines[:-1], lines[-1]
+
+async def tail_file(path, from_start=True, poll_interval=FEED_POLL_SECONDS):
+    """
+    Yield batches of complete lines appended to a file, like tail -f
+
+    Args:
+        path: Feed file path
+        from_start: Read the lines already in the file first (otherwise
+            start at its current end)
+        poll_interval: Seconds to wait at the end of the file
+
+    Yields:
+        list: Complete lines read since the last batch
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = ""
+        while True:
+            data = f.read(FEED_READ_BYTES)
+            if not data:
+                await asyncio.sleep(poll_interval)
+                continue
+            lines, pending = _complete_lines(pending, data)
+            if lines:
+                yield lines
+
+async def read_socket(path):
+    """
+    Yield batches of complete lines written to a Unix socket until it closes
+
+    Args:
+        path: Path of the socket the POS listens on
+
+    Yields:
+        list: Complete lines received since the last batch
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    # Bytes of a character split across reads wait for the next read
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        pending = ""
+        while True:
+            data = await reader.read(FEED_READ_BYTES)
+            if not data:
+                break
+            lines, pending = _complete_lines(pending, decoder.decode(data))
+            if lines:
+                yield lines
+        if pending.strip():
+            # The last line may end without a newline when the POS closes the socket
+            yield [pending]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def feed_lines(source, from_start=True):
+    """
+    Async line batches of a feed source
+
+    Args:
+        source: Feed file path, or "unix:" followed by a socket path
+        from_start: For files, read the lines already in the file first
+    """
+    if source.startswith("unix:"):
+        return read_socket(source[len("unix:"):])
+    return tail_file(source, from_start)
+
+async def ingest_feed(source, feed_split, from_start=True):
+    """
+    Apply every batch of a feed to a FeedSplit until the feed ends or is cancelled
+
+    Args:
+        source: Feed file path, or "unix:" followed by a socket path
+        feed_split: FeedSplit to update
+        from_start: For files, read the lines already in the file first
+    """
+    async for lines in feed_lines(source, from_start):
+        feed_split.apply_lines(lines)
+
+class FeedRunner:
+    """
+    Tails a feed on a background thread with its own event loop
+
+    Streamlit reruns the script on every interaction, so the runner is kept
+    in st.session_state and each rerun reads runner.split.snapshot(...).
+    The thread holds no reference to the runner, so when the session ends
+    and drops it the feed task is cancelled and the thread exits.
+    """
+
+    def __init__(self, source, from_start=True):
+        self.source = source
+        self.split = FeedSplit()
+        self._loop = asyncio.new_event_loop()
+        # The task exists before the thread starts, so stop() can always cancel it
+        self._task = self._loop.create_task(ingest_feed(source, self.split, from_start))
+        self._stop = weakref.finalize(self, _cancel_feed, self._loop, self._task)
+        self._thread = threading.Thread(target=_run_feed, args=(self._loop, self._task), name="fairshare-feed",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        """Whether the feed is still being read"""
+        return self._thread.is_alive()
+
+    @property
+    def error(self):
+        """Exception that ended the feed, or None"""
+        if self._task.done() and not self._task.cancelled():
+            return self._task.exception()
+        return None
+
+    def stop(self, timeout=5.0):
+        """Cancel the feed task and wait for the thread to finish"""
+        self._stop()
+        self._thread.join(timeout)
+
+def _run_feed(loop, task):
+    """Run a FeedRunner's task on its thread until it ends or is cancelled"""
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(task)
+    except BaseException:
+        # FeedRunner.error reads the exception off the task
+        pass
+    finally:
+        loop.close()
+
+def _cancel_feed(loop, task):
+    """Cancel a FeedRunner's task from any thread"""
+    try:
+        loop.call_soon_threadsafe(task.cancel)
+    except RuntimeError:
+        # The loop closed on its own in the meantime
+        pass
+
+async def write_standin_feed(path, count, rate=1000.0, seed=0):
+    """
+    Append stand-in order events to a feed file, for trying a live tab without a POS
+
+    About one line in twenty voids an earlier line and one in ten is
+    shared with everyone.
+
+    Args:
+        path: Feed file path
+        count: Number of events to write
+        rate: Events per second
+        seed: Random seed of the orders
+    """
+    import random
+
+    rng = random.Random(seed)
+    batch = max(1, int(rate // 20))
+    with open(path, "a", encoding="utf-8") as f:
+        for start in range(0, count, batch):
+            lines = []
+            for n in range(start, min(start + batch, count)):
+                if n > 0 and rng.random() < 0.05:
+                    event = {"event": "void", "id": f"line-{rng.randrange(n)}"}
+                else:
+                    people = [] if rng.random() < 0.1 else rng.sample(STANDIN_PEOPLE, rng.randint(1, 3))
+                    event = {"id": f"line-{n}", "item": f"Item {n % 40}", "amount": round(rng.uniform(2, 40), 2),
+                             "people": people}
+                lines.append(json.dumps(event))
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            await asyncio.sleep(batch / rate)
+
+async def _run_standin(path, count, rate):
+    """Write a stand-in feed while ingesting it; returns the FeedSplit and seconds taken"""
+    feed_split = FeedSplit()
+    open(path, "w").close()
+    start = time.perf_counter()
+    ingest = asyncio.ensure_future(ingest_feed(path, feed_split))
+    await write_standin_feed(path, count, rate)
+    while feed_split.events + feed_split.errors < count:
+        await asyncio.sleep(FEED_POLL_SECONDS)
+    ingest.cancel()
+    return feed_split, time.perf_counter() - start
+
+def main(argv=None):
+    """Tail a feed (or a stand-in feed written on the fly) and print the running totals"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m fairshare.feed", description=main.__doc__)
+    parser.add_argument("source", help='Feed file path, or "unix:" followed by a socket path')
+    parser.add_argument("--standin", type=int, metavar="COUNT", help="Write COUNT stand-in events to the file first")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Stand-in events per second (default: 1000)")
+    parser.add_argument("--tax", type=float, default=0.0, help="Tax amount of the tab")
+    parser.add_argument("--tip", type=float, default=0.0, help="Tip amount of the tab")
+    args = parser.parse_args(argv)
+
+    if args.standin:
+        feed_split, seconds = asyncio.run(_run_standin(args.source, args.standin, args.rate))
+        print(f"{args.standin} events in {seconds:.2f}s ({args.standin / seconds:,.0f} events/s)")
+        snapshot = feed_split.snapshot(args.tax, args.tip, include_items=False)
+        print(f"{snapshot.items} items on the tab, {snapshot.errors} lines skipped")
+        for person, total in snapshot.result[1].items():
+            print(f"{person}: ${total:.2f}")
+        return 0
+
+    runner = FeedRunner(args.source)
+    try:
+        while runner.running:
+            time.sleep(1)
+            snapshot = runner.split.snapshot(args.tax, args.tip, include_items=False)
+            totals = ", ".join(f"{person} ${total:.2f}" for person, total in snapshot.result[1].items())
+            print(f"{snapshot.events} events, {snapshot.items} items: {totals}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+    if runner.error:
+        print(f"fairshare.feed: {runner.error}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,508 @@
+"""
+Reading bill files into split items
+
+Two bill layouts are read, told apart by their header:
+
+- Wide, as in data/sample_bill_template.csv: an Item column, an amount
+  column and one column per person holding the number of servings they ate
+  (non-numeric marks such as ✓ count as one serving).
+- Long: Item, amount, Person and optional Servings and Line columns, with
+  one row per person on an item. Consecutive rows with the same Item and
+  amount (and Line, when given) belong to the same item, so file size
+  follows the actual assignments.
+"""
+
+import io
+import os
+from array import array
+from collections import namedtuple
+
+from .core import EVERYONE_MARKER, normalize_names_bulk, normalize_names_list
+from .lazy import load
+from .validate import check_bill_table, is_blank, is_long_format, item_runs, long_format_columns
+
+# Rows of a CSV bill parsed at a time when streaming
+CSV_CHUNK_ROWS = 20000
+
+def file_type_for(source):
+    """
+    Guess the file type of a bill file from its name
+
+    Args:
+        source: Path or file-like object with a name (e.g. a Streamlit upload)
+
+    Returns:
+        str: "csv" or "excel"
+    """
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    return "csv" if os.fspath(name).lower().endswith(".csv") else "excel"
+
+def read_bill_table(source, file_type=None):
+    """
+    Load a bill file into a pandas DataFrame
+
+    Args:
+        source: Path or file-like object
+        file_type: "csv" or "excel" (default: guessed from the file name)
+
+    Returns:
+        pandas.DataFrame with the file's columns
+    """
+    pd = load("pandas")
+    if file_type is None:
+        file_type = file_type_for(source)
+    if file_type == "csv":
+        return pd.read_csv(source)
+    load("openpyxl")
+    return pd.read_excel(source)
+
+class ServingTable(namedtuple("ServingTable", "item_names item_costs item_index person_index servings people everyone_items")):
+    """
+    Long (item, person, servings) table of a bill
+
+    item_index, person_index and servings are parallel int64 arrays with one
+    row per person who ate an item. Items nobody ate are left out, and items
+    marked for everyone are listed in everyone_items without rows of their own.
+    """
+    __slots__ = ()
+
+def _mark_servings(values, blank_servings):
+    """
+    Servings given by an array of cell marks
+
+    Numbers give that many servings (truncated, negative counts give none),
+    blank or whitespace-only cells give blank_servings, as the validator
+    treats them, and any other mark such as ✓ gives one. Cells hold a
+    handful of distinct marks, so each one is converted once.
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    codes, distinct_marks = pd.factorize(values)
+    distinct = pd.Series(distinct_marks, dtype=object)
+    numeric = pd.to_numeric(distinct, errors="coerce").to_numpy(dtype=float)
+    blank = distinct.astype(str).str.strip().eq("").to_numpy()
+    mark_servings = np.where(blank, blank_servings,
+                             np.where(np.isfinite(numeric), np.trunc(np.clip(numeric, 0, None)), 1)).astype(np.int64)
+    # Blank cells factorize to -1, which picks the appended blank_servings
+    return np.append(mark_servings, blank_servings)[codes]
+
+def long_serving_table(df):
+    """
+    Build a ServingTable from a long-format bill table
+
+    Each row names one person (or several, comma-separated) on an item with
+    an optional servings count; a blank count means one serving. A person
+    of __EVERYONE__ shares the item with everyone on the bill. An optional
+    Line column tells apart consecutive POS lines of the same item and amount.
+
+    Args:
+        df: DataFrame with Item, amount, Person and optional Servings and Line columns
+
+    Returns:
+        ServingTable: Servings in file order
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    items, amounts, persons, servings_column, lines = long_format_columns(df)
+    row_items, item_starts = item_runs(items, amounts, lines)
+    if servings_column is None:
+        row_servings = np.ones(len(df), dtype=np.int64)
+    else:
+        row_servings = _mark_servings(servings_column.to_numpy(dtype=object), blank_servings=1)
+
+    everyone_rows = (persons == EVERYONE_MARKER).to_numpy()
+    row_names = normalize_names_bulk(persons.where(~everyone_rows))
+    name_counts = np.fromiter(map(len, row_names), dtype=np.int64, count=len(row_names))
+    flat_rows = np.repeat(np.arange(len(df), dtype=np.int64), name_counts)
+    flat_names = np.array([name for names in row_names for name in names], dtype=object)
+
+    everyone_items = np.zeros(len(item_starts), dtype=bool)
+    everyone_items[row_items[everyone_rows]] = True
+    flat_items = row_items[flat_rows]
+    flat_servings = row_servings[flat_rows]
+    # People on everyone items join the bill but their rows give no servings
+    on_bill = (flat_servings > 0) | everyone_items[flat_items]
+    flat_items, flat_names, flat_servings = flat_items[on_bill], flat_names[on_bill], flat_servings[on_bill]
+    # People are numbered in order of first appearance, like money_owed does
+    person_codes, people = pd.factorize(flat_names)
+    named = ~everyone_items[flat_items]
+    flat_items, person_codes, flat_servings = flat_items[named], person_codes[named], flat_servings[named]
+
+    kept = everyone_items.copy()
+    kept[flat_items] = True
+    new_index = np.cumsum(kept) - 1
+    first_rows = item_starts[kept]
+    return ServingTable(
+        items.to_numpy(dtype=object)[first_rows].tolist(),
+        amounts.to_numpy()[first_rows].tolist(),
+        new_index[flat_items].astype(np.int64),
+        person_codes.astype(np.int64),
+        flat_servings,
+        people.tolist(),
+        new_index[everyone_items].tolist(),
+    )
+
+def bill_serving_table(df):
+    """
+    Build a ServingTable from a bill table in either layout
+
+    Args:
+        df: Wide or long-format bill DataFrame (see the module docstring)
+
+    Returns:
+        ServingTable of the bill
+    """
+    if is_long_format(df.columns):
+        return long_serving_table(df)
+    return wide_serving_table(df)
+
+def wide_serving_table(df):
+    """
+    Melt a wide bill table into a ServingTable
+
+    Person cells are coerced to numbers in bulk: numbers give that many
+    servings (truncated, negative counts give none), blank or whitespace-only
+    cells give none and any other mark such as ✓ counts as one serving. Rows
+    with a blank Item and amount give no servings, whatever their marks.
+
+    Args:
+        df: DataFrame with Item and amount columns followed by person columns
+
+    Returns:
+        ServingTable: Servings in row-major (item, then person column) order
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    marks = df.iloc[:, 2:]
+    person_columns = list(marks.columns)
+
+    counts = _mark_servings(marks.to_numpy(dtype=object).ravel(), blank_servings=0).reshape(marks.shape)
+    counts[is_blank(df['Item'].to_numpy(dtype=object)) & is_blank(df['amount'].to_numpy(dtype=object))] = 0
+
+    # A column header such as "Scott, Callie" counts for each of its people
+    header_names = normalize_names_bulk(person_columns)
+    everyone_columns = [j for j, column in enumerate(person_columns) if column == EVERYONE_MARKER]
+    name_columns = [j for j, names in enumerate(header_names) for _ in names if j not in everyone_columns]
+    column_names = np.array([name for j, names in enumerate(header_names) if j not in everyone_columns
+                             for name in names], dtype=object)
+
+    expanded = counts[:, name_columns]
+    rows, cells = np.nonzero(expanded)
+    # People are numbered in order of first appearance, like money_owed does
+    person_codes, people = pd.factorize(column_names[cells])
+
+    everyone_rows = counts[:, everyone_columns].any(axis=1) if everyone_columns else np.zeros(len(df), dtype=bool)
+    named = ~everyone_rows[rows]
+    rows, person_codes, servings = rows[named], person_codes[named], expanded[rows[named], cells[named]]
+
+    kept = everyone_rows.copy()
+    kept[rows] = True
+    new_index = np.cumsum(kept) - 1
+    return ServingTable(
+        df['Item'].to_numpy()[kept].tolist(),
+        df['amount'].to_numpy()[kept].tolist(),
+        new_index[rows].astype(np.int64),
+        person_codes.astype(np.int64),
+        servings,
+        people.tolist(),
+        new_index[everyone_rows].tolist(),
+    )
+
+def serving_table_from_items(items):
+    """
+    Build a ServingTable from (item_name, cost, [people]) tuples
+
+    Repeated names on an item become one row with that many servings.
+
+    Args:
+        items: Iterable of tuples (item_name, cost, [people_who_ate_it])
+
+    Returns:
+        ServingTable of the items
+    """
+    np = load("numpy")
+    person_index = {}
+    item_names = []
+    item_costs = []
+    item_rows = array('q')
+    person_rows = array('q')
+    servings = array('q')
+    everyone_items = []
+    for item, cost, names in items:
+        has_everyone = EVERYONE_MARKER in names
+        counts = {}
+        for name in normalize_names_list([n for n in names if n != EVERYONE_MARKER]):
+            counts[name] = counts.get(name, 0) + 1
+        for name in counts:
+            person_index.setdefault(name, len(person_index))
+        if has_everyone:
+            everyone_items.append(len(item_names))
+        elif counts:
+            item_idx = len(item_names)
+            for name, count in counts.items():
+                item_rows.append(item_idx)
+                person_rows.append(person_index[name])
+                servings.append(count)
+        else:
+            continue
+        item_names.append(item)
+        item_costs.append(cost)
+    return ServingTable(
+        item_names, item_costs,
+        np.frombuffer(item_rows, dtype=np.int64),
+        np.frombuffer(person_rows, dtype=np.int64),
+        np.frombuffer(servings, dtype=np.int64),
+        list(person_index), everyone_items,
+    )
+
+def items_from_table(df):
+    """
+    Convert a bill table into (item_name, cost, [people]) tuples
+
+    Args:
+        df: Wide or long-format bill DataFrame
+
+    Returns:
+        list: Items with each person repeated once per serving
+    """
+    table = bill_serving_table(df)
+    consumers = [[] for _ in table.item_names]
+    for item_idx in table.everyone_items:
+        consumers[item_idx].append(EVERYONE_MARKER)
+    people = table.people
+    for item_idx, person_idx, count in zip(table.item_index.tolist(), table.person_index.tolist(), table.servings.tolist()):
+        consumers[item_idx].extend([people[person_idx]] * count)
+    return list(zip(table.item_names, table.item_costs, consumers))
+
+def split_serving_table(table, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, exact_cents=False):
+    """
+    Split a ServingTable with the vectorized engine
+
+    Args:
+        table: ServingTable of the bill
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        exact_cents: Split in integer cents (see money_owed)
+
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+    """
+    np = load("numpy")
+    from .core.vectorized import split_serving_matrix
+
+    row_items = np.repeat(table.item_index, table.servings)
+    row_people = np.repeat(table.person_index, table.servings)
+    return split_serving_matrix(table.item_names, table.item_costs, row_items, row_people, table.people,
+                                tax_amount, tip_amount, extra_fees, discount_amount, exact_cents,
+                                table.everyone_items)
+
+class ServingTableBuilder:
+    """
+    Accumulates the serving tables of consecutive chunks of one bill
+
+    People keep their first-appearance numbering across chunks and the
+    servings are held in compact int64 columns, so the chunks themselves
+    can be dropped once added.
+    """
+
+    def __init__(self):
+        self.person_index = {}
+        self.item_names = []
+        self.item_costs = []
+        self.item_index = array('q')
+        self.person_rows = array('q')
+        self.servings = array('q')
+        self.everyone_items = []
+
+    def add_table(self, table):
+        """Append the ServingTable of the next chunk"""
+        np = load("numpy")
+        item_offset = len(self.item_names)
+        person_index = self.person_index
+        person_codes = np.array([person_index.setdefault(name, len(person_index)) for name in table.people],
+                                dtype=np.int64)
+        self.item_names.extend(table.item_names)
+        self.item_costs.extend(table.item_costs)
+        self.item_index.frombytes((table.item_index + item_offset).astype(np.int64).tobytes())
+        self.person_rows.frombytes(person_codes[table.person_index].tobytes())
+        self.servings.frombytes(table.servings.astype(np.int64).tobytes())
+        self.everyone_items.extend(item_idx + item_offset for item_idx in table.everyone_items)
+
+    def table(self):
+        """ServingTable of every chunk added so far"""
+        np = load("numpy")
+        return ServingTable(
+            self.item_names, self.item_costs,
+            np.frombuffer(self.item_index, dtype=np.int64),
+            np.frombuffer(self.person_rows, dtype=np.int64),
+            np.frombuffer(self.servings, dtype=np.int64),
+            list(self.person_index), self.everyone_items,
+        )
+
+class _ByteCounter(io.RawIOBase):
+    """Raw reader that counts the bytes pulled from an underlying binary file"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        return size
+
+def _source_size(source):
+    """Size in bytes of a path or binary file, or None if it cannot be told"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, "size", None)
+    if size is None and hasattr(source, "seek") and hasattr(source, "tell"):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END) - position
+        source.seek(position)
+    return size
+
+def stream_csv_serving_table(source, chunk_rows=CSV_CHUNK_ROWS, progress=None, validate=True):
+    """
+    Read a CSV bill in fixed-size chunks into a ServingTable
+
+    Only one chunk of raw rows is held in memory at a time, so peak memory
+    depends on chunk_rows rather than on the size of the file. Each chunk is
+    validated as it is read, so a malformed file is rejected at its first
+    bad chunk without reading the rest. In long format the rows of an item
+    that runs on past a chunk are validated with the next chunk, so checks
+    across an item's rows do not depend on chunk_rows.
+
+    Args:
+        source: Path or binary file-like object (e.g. a Streamlit upload)
+        chunk_rows: Number of rows parsed at a time
+        progress: Optional callable(rows_processed, bytes_read, total_bytes)
+            called after each chunk; total_bytes is None if unknown
+        validate: Check each chunk with check_bill_table
+
+    Returns:
+        ServingTable: Same table bill_serving_table gives for the whole file
+
+    Raises:
+        BillValidationError: If a chunk fails validation
+    """
+    pd = load("pandas")
+    total_bytes = _source_size(source)
+    opened = isinstance(source, (str, os.PathLike))
+    raw = open(source, "rb") if opened else source
+    try:
+        counter = _ByteCounter(raw)
+        builder = ServingTableBuilder()
+        rows_processed = 0
+        carry = None
+        with pd.read_csv(io.BufferedReader(counter), chunksize=chunk_rows) as chunks:
+            for chunk in chunks:
+                # Row 1 is the header
+                first_row = rows_processed + 2
+                rows_processed += len(chunk)
+                if carry is not None:
+                    # Held-back rows are checked again with the rest of their item
+                    first_row -= len(carry)
+                    chunk = pd.concat([carry, chunk], ignore_index=True)
+                if validate:
+                    check_bill_table(chunk, first_row=first_row)
+                if not len(chunk):
+                    # A header-only file gives one empty chunk
+                    continue
+                if is_long_format(chunk.columns):
+                    # The last item may continue in the next chunk, so its rows are held back
+                    items, amounts, _, _, lines = long_format_columns(chunk)
+                    last_item_start = item_runs(items, amounts, lines)[1][-1]
+                    chunk, carry = chunk.iloc[:last_item_start], chunk.iloc[last_item_start:]
+                    if len(chunk):
+                        builder.add_table(long_serving_table(chunk))
+                else:
+                    builder.add_table(wide_serving_table(chunk))
+                if progress is not None:
+                    progress(rows_processed, counter.bytes_read, total_bytes)
+        if carry is not None:
+            builder.add_table(long_serving_table(carry))
+    finally:
+        if opened:
+            raw.close()
+    return builder.table()
+
+def read_serving_table(source, file_type=None, chunk_rows=CSV_CHUNK_ROWS, progress=None, validate=True):
+    """
+    Read a bill file into a ServingTable, streaming CSV files in chunks
+
+    Args:
+        source: Path or file-like object
+        file_type: "csv" or "excel" (default: guessed from the file name)
+        chunk_rows: Number of CSV rows parsed at a time
+        progress: Optional callable(rows_processed, bytes_read, total_bytes)
+            for CSV files (see stream_csv_serving_table)
+        validate: Check the bill with check_bill_table before building the table
+
+    Returns:
+        ServingTable of the bill
+
+    Raises:
+        BillValidationError: If the bill fails validation
+    """
+    if file_type is None:
+        file_type = file_type_for(source)
+    if file_type == "csv":
+        return stream_csv_serving_table(source, chunk_rows, progress, validate)
+    df = read_bill_table(source, file_type)
+    if validate:
+        check_bill_table(df)
+    return bill_serving_table(df)
+
+def read_bill_items(source, file_type=None, validate=True):
+    """
+    Read a bill file into split items
+
+    Args:
+        source: Path or file-like object
+        file_type: "csv" or "excel" (default: guessed from the file name)
+        validate: Check the bill with check_bill_table first
+
+    Returns:
+        list: (item_name, cost, [people]) tuples ready for money_owed
+
+    Raises:
+        BillValidationError: If the bill fails validation
+    """
+    df = read_bill_table(source, file_type)
+    if validate:
+        check_bill_table(df)
+    return items_from_table(df)
+
+def split_bill_file(source, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, exact_cents=False,
+                    file_type=None, progress=None, validate=True):
+    """
+    Read a bill file and split it straight from its serving table
+
+    Args:
+        source: Path or file-like object
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        exact_cents: Split in integer cents (see money_owed)
+        file_type: "csv" or "excel" (default: guessed from the file name)
+        progress: Optional callable(rows_processed, bytes_read, total_bytes)
+            for CSV files, which are read in chunks
+        validate: Check the bill with check_bill_table before splitting
+
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+
+    Raises:
+        BillValidationError: If the bill fails validation
+    """
+    table = read_serving_table(source, file_type, progress=progress, validate=validate)
+    return split_serving_table(table, tax_amount, tip_amount, extra_fees, discount_amount, exact_cents)
@@ -0,0 +1,100 @@
+"""
+On-demand loading of heavy optional dependencies
+
+pandas, openpyxl and reportlab are only needed once someone uploads a file
+or asks for a PDF, so the app imports them on first use through this module.
+Each first import is timed, which gives a per-session report of what those
+dependencies cost. Running ``python -m fairshare.lazy`` measures the cold
+import cost of every heavy dependency in a fresh interpreter instead.
+"""
+
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+# Dependencies the apps load lazily, plus streamlit itself for comparison
+HEAVY_DEPENDENCIES = ("streamlit", "pandas", "numpy", "openpyxl", "reportlab.platypus", "pyarrow")
+
+# Seconds spent on the first import of each dependency in this process
+_import_costs = {}
+
+@contextmanager
+def track_import(module_name):
+    """
+    Time the import statements in the block and record them under module_name
+
+    Only the first import is recorded; if the module is already loaded
+    the block runs untimed.
+
+    Args:
+        module_name: Dependency name to report the cost under
+    """
+    if module_name in _import_costs or module_name in sys.modules:
+        yield
+        return
+    start = time.perf_counter()
+    yield
+    _import_costs[module_name] = time.perf_counter() - start
+
+def load(module_name):
+    """
+    Import a module on first use and record how long the import took
+
+    Args:
+        module_name: Dotted module name, e.g. "pandas"
+
+    Returns:
+        The imported module
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with track_import(module_name):
+        module = importlib.import_module(module_name)
+    return module
+
+def import_cost_report():
+    """
+    Dependencies imported through this module so far
+
+    Returns:
+        list: (module_name, seconds) tuples, most expensive first
+    """
+    return sorted(_import_costs.items(), key=lambda entry: entry[1], reverse=True)
+
+def measure_import_costs(module_names=HEAVY_DEPENDENCIES):
+    """
+    Measure the cold import cost of each module in a fresh interpreter
+
+    Args:
+        module_names: Dotted module names to measure
+
+    Returns:
+        dict: {module_name: seconds, or None if the module is not installed}
+    """
+    import subprocess
+
+    costs = {}
+    for module_name in module_names:
+        code = (
+            "import time; start = time.perf_counter(); "
+            f"import {module_name}; print(time.perf_counter() - start)"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True
+        )
+        costs[module_name] = float(completed.stdout) if completed.returncode == 0 else None
+    return costs
+
+def main():
+    """Print the cold import cost of the heavy dependencies"""
+    print("Cold import cost per dependency:")
+    for module_name, seconds in measure_import_costs().items():
+        if seconds is None:
+            print(f"  {module_name:<20} not installed")
+        else:
+            print(f"  {module_name:<20} {seconds * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Splitting the many bills of a trip at once into one ledger per person
+
+Every bill is split independently on a thread pool, so the whole batch
+takes about as long as its slowest bill: parsing spends most of its time
+in pandas, numpy and openpyxl code and file reads rather than holding the
+interpreter. The results are then totalled per person, keeping what each
+person owes on every bill for drill-down.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .workbook import workbook_rollup
+
+def unique_bill_names(names):
+    """
+    Make bill names unique by numbering repeats
+
+    Args:
+        names: Bill names such as uploaded file names, in order
+
+    Returns:
+        list: The names, with a repeated name getting " (2)", " (3)", ...
+    """
+    seen = {}
+    unique = []
+    for name in names:
+        count = seen[name] = seen.get(name, 0) + 1
+        unique.append(name if count == 1 else f"{name} ({count})")
+    return unique
+
+def split_bills(sources, split_bill, workers=None):
+    """
+    Split every bill concurrently on a thread pool
+
+    Args:
+        sources: {bill_name: source} of the bills, in display order
+        split_bill: Callable(source) returning a money_owed result tuple;
+            called from worker threads, so it must not touch the UI
+        workers: Number of threads (default: the ThreadPoolExecutor default)
+
+    Returns:
+        tuple: (bill_results, failures) where bill_results maps each bill
+            that split to its result tuple and failures maps each bill that
+            did not to its exception, both in the order of sources
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(split_bill, source) for name, source in sources.items()}
+    bill_results = {}
+    failures = {}
+    for name, future in futures.items():
+        error = future.exception()
+        if error is None:
+            bill_results[name] = future.result()
+        else:
+            failures[name] = error
+    return bill_results, failures
+
+def trip_ledger(bill_results):
+    """
+    Total what each person owes across the bills of a trip
+
+    Args:
+        bill_results: {bill_name: money_owed result tuple}
+
+    Returns:
+        dict: {person: totals} with the amounts of workbook_rollup, 'bills'
+            (the number of bills the person is on) and 'by_bill' ({bill_name:
+            final_total} in bill order, for drill-down)
+    """
+    ledger = workbook_rollup(bill_results)
+    for totals in ledger.values():
+        totals['by_bill'] = {}
+    for bill_name, (detailed_result, _, _) in bill_results.items():
+        for person, details in detailed_result.items():
+            ledger[person]['by_bill'][bill_name] = details['final_total']
+    return ledger
@@ -0,0 +1,554 @@
+"""
+Text and PDF reports of a split bill, fast enough for events with thousands of people
+
+Text reports are written to any text stream one person at a time, from
+line templates whose format methods are looked up once, so a huge report
+is never held in memory as a list of lines or one joined string.
+
+In PDF reports each person's breakdown is laid out as one compact table (items, then the
+cost lines) instead of a Paragraph per line, so reportlab neither parses
+markup for every line nor shuffles tens of thousands of flowables. The
+paragraph and table styles are built once per process, column widths are
+fixed so tables are not measured cell by cell, and the document is written
+straight to the target file or stream rather than to an in-memory copy.
+
+    python -m fairshare.report --people 2000 -o event.pdf
+"""
+
+import io
+import os
+import re
+import time
+import zipfile
+from collections import namedtuple
+from functools import lru_cache
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from .core import AMOUNT_FIELDS, SplitResult
+from .lazy import track_import
+from .ledger import unique_bill_names
+
+# Width in points of the description and amount columns of every table
+DESCRIPTION_WIDTH = 360
+AMOUNT_WIDTH = 110
+
+# Font size of table cells, and the width left for a description inside the cell padding
+TABLE_FONT_SIZE = 9
+DESCRIPTION_TEXT_WIDTH = DESCRIPTION_WIDTH - 12
+
+# Descriptions this short fit their column whatever the characters, so are not measured
+SHORT_DESCRIPTION = int(DESCRIPTION_TEXT_WIDTH / (1.1 * TABLE_FONT_SIZE))
+
+# Flowables laid out ahead of the page being written
+STORY_CHUNK = 256
+
+class ReportStats(namedtuple("ReportStats", "people pages seconds")):
+    """
+    Size of a written report and how long it took
+
+    people is the number of breakdowns written, pages the page count and
+    seconds the wall-clock time of the layout and write.
+    """
+    __slots__ = ()
+
+    @property
+    def pages_per_second(self):
+        """Throughput of the write, in pages per second"""
+        return self.pages / self.seconds if self.seconds > 0 else float("inf")
+
+class TextLayout(namedtuple("TextLayout", "person item shared_item charges discount footer")):
+    """
+    Line templates of a text breakdown, as bound format methods
+
+    item and shared_item are called with (item, cost, num_people_shared);
+    person, charges, discount and footer with a dict of the person's
+    AMOUNT_FIELDS plus 'person' and 'person_upper'.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_templates(cls, **templates):
+        """Build a layout from template strings, looking up their format methods once"""
+        item_templates = ('item', 'shared_item')
+        return cls(**{name: template.format if name in item_templates else template.format_map
+                      for name, template in templates.items()})
+
+# Layout of the downloadable text report
+EXPORT_LAYOUT = TextLayout.from_templates(
+    person="\n{person_upper}:\n  Items eaten:\n",
+    item="    • {0}: ${1:.2f}\n",
+    shared_item="    • 1/{2} of {0}: ${1:.2f}\n",
+    charges=("  Item Total: ${subtotal_before_tax_tip:.2f}\n"
+             "  Bill %: {percentage_of_bill:.1f}%\n"
+             "  Tax ({percentage_of_bill:.1f}%): ${tax_amount:.2f}\n"
+             "  Tip ({percentage_of_bill:.1f}%): ${tip_amount:.2f}\n"
+             "  Extra Fees ({percentage_of_bill:.1f}%): ${extra_fees_amount:.2f}\n"),
+    discount="  Discount ({percentage_of_bill:.1f}%): -${discount_amount:.2f}\n",
+    footer="  FINAL TOTAL: ${final_total:.2f}\n",
+)
+
+# Layout printed by scripts/enhanced_functions.print_detailed_breakdown
+CONSOLE_LAYOUT = TextLayout.from_templates(
+    person="\n📋 {person} - ${final_total:.2f}\n   Items eaten:\n",
+    item="   • {0}: ${1:.2f}\n",
+    shared_item="   • 1/{2} of {0}: ${1:.2f}\n",
+    charges=("   Items Subtotal: ${subtotal_before_tax_tip:.2f}\n"
+             "   Bill Percentage: {percentage_of_bill:.1f}%\n"
+             "   Tax ({percentage_of_bill:.1f}%): ${tax_amount:.2f}\n"
+             "   Tip ({percentage_of_bill:.1f}%): ${tip_amount:.2f}\n"),
+    discount="   Discount ({percentage_of_bill:.1f}%): -${discount_amount:.2f}\n",
+    footer="   Final Total: ${final_total:.2f}\n" + "-" * 30 + "\n",
+)
+
+def _person_amounts(detailed_breakdowns):
+    """Yield (person, details, AMOUNT_FIELDS values) of each person, reading SplitResult columns directly"""
+    if isinstance(detailed_breakdowns, SplitResult):
+        columns = [detailed_breakdowns.columns[field] for field in AMOUNT_FIELDS]
+        yield from zip(detailed_breakdowns.keys(), detailed_breakdowns.values(), zip(*columns))
+        return
+    for person, details in detailed_breakdowns.items():
+        yield person, details, [details.get(field, 0.0) for field in AMOUNT_FIELDS]
+
+def write_person_breakdowns(stream, detailed_breakdowns, layout=EXPORT_LAYOUT):
+    """
+    Write every person's itemized breakdown to a text stream
+
+    Each person is formatted into one string and written with a single
+    write, so the stream never waits on more than one breakdown.
+
+    Args:
+        stream: Text stream, e.g. sys.stdout or an open file
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        layout: TextLayout of the lines
+    """
+    write = stream.write
+    item_line, shared_item_line = layout.item, layout.shared_item
+    for person, details, amounts in _person_amounts(detailed_breakdowns):
+        # Every amount is read once, however often the templates show it
+        fields = dict(zip(AMOUNT_FIELDS, amounts))
+        fields['person'] = person
+        fields['person_upper'] = person.upper()
+        parts = [layout.person(fields)]
+        for item_data in details['items_eaten']:
+            if len(item_data) == 3 and item_data[2] != 1:
+                parts.append(shared_item_line(*item_data))
+            else:
+                # Old (item, cost) pairs, or items the person had alone
+                parts.append(item_line(*item_data[:2]))
+        parts.append(layout.charges(fields))
+        if fields['discount_amount'] > 0:
+            parts.append(layout.discount(fields))
+        parts.append(layout.footer(fields))
+        write("".join(parts))
+
+def write_text_report(stream, simple_breakdown, detailed_breakdowns, totals, title=None):
+    """
+    Write the bill breakdown report as text
+
+    Args:
+        stream: Text stream the report is written to
+        simple_breakdown: {person: final_total}
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        totals: Dict with 'subtotal', 'tax', 'tip', 'extra_fees', 'total'
+            and optionally 'discount'
+        title: Optional bill name written under the heading
+    """
+    rule = "=" * 60 + "\n"
+    stream.write(f"{rule}FAIR SHARE BILL SPLITTER - BREAKDOWN\n{rule}")
+    if title:
+        stream.write(f"Bill: {title}\n")
+    stream.write("\nSIMPLE BREAKDOWN:\n" + "-" * 30 + "\n")
+    stream.writelines(f"{person}: ${amount:.2f}\n" for person, amount in simple_breakdown.items())
+    stream.write("\nTOTALS:\n" + "-" * 30 + "\n")
+    stream.writelines(f"{label}: {amount}\n" for label, amount in totals_table_rows(totals))
+    stream.write("\nDETAILED BREAKDOWN:\n" + "-" * 30 + "\n")
+    write_person_breakdowns(stream, detailed_breakdowns)
+
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """
+    Paragraph and table styles of the report, built once per process
+
+    Returns:
+        dict: ParagraphStyle objects under 'title', 'subtitle', 'heading',
+            'cell' and 'header_cell' and TableStyle objects under 'summary',
+            'totals' and 'person'
+    """
+    with track_import("reportlab"):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.platypus import TableStyle
+
+    sample = getSampleStyleSheet()
+    # A box and row rules draw far fewer lines than a full cell grid
+    grid = [
+        ('BOX', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+        ('FONTSIZE', (0, 0), (-1, -1), TABLE_FONT_SIZE),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ]
+    return {
+        'title': ParagraphStyle('ReportTitle', parent=sample['Heading1'], fontSize=16, spaceAfter=30,
+                                alignment=1),  # Center alignment
+        'subtitle': sample['Heading2'],
+        'heading': sample['Heading3'],
+        # Descriptions too long for their table column are wrapped in these
+        'cell': ParagraphStyle('ReportCell', fontName='Helvetica', fontSize=TABLE_FONT_SIZE,
+                               leading=TABLE_FONT_SIZE + 2),
+        'header_cell': ParagraphStyle('ReportHeaderCell', fontName='Helvetica-Bold', fontSize=TABLE_FONT_SIZE,
+                                      leading=TABLE_FONT_SIZE + 2),
+        'summary': TableStyle(grid + [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ]),
+        # Negative indices pick the TOTAL row whether or not there is a discount row
+        'totals': TableStyle(grid + [
+            ('BACKGROUND', (0, -1), (-1, -1), colors.darkblue),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]),
+        'person': TableStyle(grid + [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 0.5, colors.grey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]),
+    }
+
+@lru_cache(maxsize=None)
+def _deflate_canvas():
+    """
+    Canvas class of the reports, built once per process
+
+    Page streams are only deflated, not also ASCII85-encoded in pure Python
+    as reportlab does by default. Each page's stream is set as the page is
+    finished, so rl_config stays as it is for other documents.
+    """
+    with track_import("reportlab"):
+        from reportlab.pdfbase.pdfdoc import PDFStream, PDFZCompress
+        from reportlab.pdfgen.canvas import Canvas
+
+    class DeflateCanvas(Canvas):
+        def showPage(self):
+            super().showPage()
+            page = self._doc.Pages.pages[-1]
+            if page.stream and page.compression:
+                page.Contents = PDFStream(content=page.stream, filters=[PDFZCompress])
+
+    return DeflateCanvas
+
+class _StoryFeed(list):
+    """
+    Story that is filled from an iterator of flowables as the build consumes it
+
+    reportlab's build loop checks len() of the story before every flowable,
+    so topping the list up there keeps only about STORY_CHUNK flowables (and
+    the breakdowns behind them) alive at a time.
+    """
+
+    def __init__(self, flowables, chunk=STORY_CHUNK):
+        super().__init__()
+        self._pending = iter(flowables)
+        self._chunk = chunk
+
+    def __len__(self):
+        size = super().__len__()
+        if size < self._chunk and self._pending is not None:
+            more = list(islice(self._pending, self._chunk))
+            if len(more) < self._chunk:
+                self._pending = None
+            self.extend(more)
+            size += len(more)
+        return size
+
+def item_line(item_data):
+    """
+    Description and cost of one eaten item
+
+    Args:
+        item_data: (item, cost, num_people_shared) or the older (item, cost)
+
+    Returns:
+        tuple: (description, cost)
+    """
+    if len(item_data) == 3:
+        item, cost, num_people_shared = item_data
+        if num_people_shared != 1:
+            return f"1/{num_people_shared} of {item}", cost
+        return str(item), cost
+    item, cost = item_data
+    return str(item), cost
+
+def person_table_rows(person, details):
+    """
+    Rows of one person's breakdown table
+
+    Args:
+        person: Person name
+        details: Detailed breakdown of the person (see money_owed)
+
+    Returns:
+        list: [description, amount] rows, headed by the person and ending in
+            the final total
+    """
+    share = f"{details['percentage_of_bill']:.1f}%"
+    rows = [[person, "Amount"]]
+    for item_data in details['items_eaten']:
+        description, cost = item_line(item_data)
+        rows.append([description, f"${cost:.2f}"])
+    rows.append(["Item Total", f"${details['subtotal_before_tax_tip']:.2f}"])
+    rows.append(["Bill %", share])
+    rows.append([f"Tax ({share})", f"${details['tax_amount']:.2f}"])
+    rows.append([f"Tip ({share})", f"${details['tip_amount']:.2f}"])
+    rows.append([f"Extra Fees ({share})", f"${details['extra_fees_amount']:.2f}"])
+    if details.get('discount_amount', 0) > 0:
+        rows.append([f"Discount ({share})", f"-${details['discount_amount']:.2f}"])
+    rows.append(["Final Total", f"${details['final_total']:.2f}"])
+    return rows
+
+def totals_table_rows(totals):
+    """[label, amount] rows of the bill totals, ending in the TOTAL row"""
+    rows = [
+        ["Subtotal", f"${totals['subtotal']:.2f}"],
+        ["Tax", f"${totals['tax']:.2f}"],
+        ["Tip", f"${totals['tip']:.2f}"],
+        ["Extra Fees", f"${totals['extra_fees']:.2f}"],
+    ]
+    if totals.get('discount', 0) > 0:
+        rows.append(["Discount", f"-${totals['discount']:.2f}"])
+    rows.append(["TOTAL", f"${totals['total']:.2f}"])
+    return rows
+
+def _table(rows, style, repeat_rows=1):
+    """
+    Fixed-width report table; long tables continue on the next page under a repeated header row
+
+    Descriptions wider than their column are wrapped in a Paragraph so they
+    do not run over the amounts. The rest stay plain strings, which reportlab
+    draws without parsing markup.
+    """
+    with track_import("reportlab"):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.platypus import Paragraph, Table
+
+    styles = pdf_styles()
+    # Bold is the wider face, so measuring in it never lets a description overflow
+    rows = [row if len(row[0]) <= SHORT_DESCRIPTION
+            or stringWidth(row[0], 'Helvetica-Bold', TABLE_FONT_SIZE) <= DESCRIPTION_TEXT_WIDTH
+            else [Paragraph(escape(row[0]), styles['header_cell' if number < repeat_rows else 'cell']), *row[1:]]
+            for number, row in enumerate(rows)]
+    return Table(rows, colWidths=(DESCRIPTION_WIDTH, AMOUNT_WIDTH), style=style, repeatRows=repeat_rows,
+                 hAlign='LEFT')
+
+def write_pdf_report(simple_breakdown, detailed_breakdowns, totals, output):
+    """
+    Write the bill breakdown report as a PDF
+
+    Args:
+        simple_breakdown: {person: final_total}
+        detailed_breakdowns: SplitResult or {person: details} (see money_owed)
+        totals: Dict with 'subtotal', 'tax', 'tip', 'extra_fees', 'total'
+            and optionally 'discount'
+        output: File path or binary stream the PDF is written to
+
+    Returns:
+        ReportStats of the report
+    """
+    with track_import("reportlab"):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    start = time.perf_counter()
+    styles = pdf_styles()
+    table = _table
+    people = 0
+
+    def story():
+        nonlocal people
+        yield Paragraph("FAIR SHARE BILL SPLITTER", styles['title'])
+        yield Paragraph("Bill Breakdown Report", styles['subtitle'])
+        yield Spacer(1, 20)
+        yield Paragraph("Simple Breakdown", styles['heading'])
+        yield table([["Person", "Amount Owed"]] + [[person, f"${amount:.2f}"]
+                                                   for person, amount in simple_breakdown.items()], styles['summary'])
+        yield Spacer(1, 20)
+        yield Paragraph("Totals", styles['heading'])
+        yield table(totals_table_rows(totals), styles['totals'], repeat_rows=0)
+        yield Spacer(1, 20)
+        yield Paragraph("Detailed Breakdown", styles['heading'])
+        for person, details in detailed_breakdowns.items():
+            # Each breakdown is only turned into a table shortly before its page is laid out
+            yield table(person_table_rows(person, details), styles['person'])
+            yield Spacer(1, 8)
+            people += 1
+
+    doc = SimpleDocTemplate(output, pagesize=letter, title="Bill Breakdown Report")
+    doc.build(_StoryFeed(story()), canvasmaker=_deflate_canvas())
+    return ReportStats(people, doc.page, time.perf_counter() - start)
+
+def write_statement_pdf(person, details, output):
+    """
+    Write one person's statement as a PDF
+
+    Args:
+        person: Person name
+        details: Detailed breakdown of the person (see money_owed)
+        output: File path or binary stream the PDF is written to
+
+    Returns:
+        int: Number of pages written
+    """
+    with track_import("reportlab"):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = pdf_styles()
+    doc = SimpleDocTemplate(output, pagesize=letter, title=f"Statement for {person}")
+    doc.build([
+        Paragraph("FAIR SHARE BILL SPLITTER", styles['title']),
+        Paragraph(f"Statement for {escape(person)}", styles['subtitle']),
+        Spacer(1, 20),
+        _table(person_table_rows(person, details), styles['person']),
+    ], canvasmaker=_deflate_canvas())
+    return doc.page
+
+def safe_file_stem(name):
+    """Name with every run of characters that are unsafe in file names replaced by _"""
+    return re.sub(r"[^\w\- ]+", "_", str(name)).strip() or "unnamed"
+
+def statement_names(people):
+    """
+    ZIP member names of the statements of a bill's people
+
+    Args:
+        people: Person names, in order
+
+    Returns:
+        list: "Name.pdf" file names, with characters that are not safe in
+            file names replaced and repeats numbered
+    """
+    return [f"{stem}.pdf" for stem in unique_bill_names(safe_file_stem(person) for person in people)]
+
+def _render_statements(group):
+    """Render a group of (member_name, person, details) statements; runs in pool workers"""
+    statements = []
+    for member_name, person, details in group:
+        output = io.BytesIO()
+        pages = write_statement_pdf(person, details, output)
+        statements.append((member_name, output.getvalue(), pages))
+    return statements
+
+def _add_statements(archive, groups):
+    """Write rendered statement groups to an open ZipFile; returns the pages written"""
+    pages = 0
+    for group in groups:
+        for member_name, pdf, statement_pages in group:
+            archive.writestr(member_name, pdf)
+            pages += statement_pages
+    return pages
+
+def write_statements_zip(bills, output, workers=None):
+    """
+    Render one PDF statement per person on a process pool into a ZIP archive
+
+    Statements are written to the archive in bill order and, within a bill,
+    sorted by file name, whatever order the workers finish in, so the same
+    bills always give the same archive listing.
+
+    Args:
+        bills: {folder: detailed_breakdowns}; statements of each bill go in
+            its folder of the archive, "" meaning the top level
+        output: File path or binary stream the ZIP is written to
+        workers: Number of worker processes (default: one per core); with a
+            single worker statements are rendered in the calling process
+
+    Returns:
+        ReportStats of all the statements
+    """
+    start = time.perf_counter()
+    statements = []
+    for folder, detailed_breakdowns in bills.items():
+        # Workers get plain dicts, not views into the whole SplitResult
+        people = [(person, dict(details)) for person, details in detailed_breakdowns.items()]
+        prefix = f"{folder.strip('/')}/" if folder else ""
+        member_names = statement_names(person for person, _ in people)
+        statements.extend(sorted((prefix + member_name, person, details)
+                                 for member_name, (person, details) in zip(member_names, people)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(statements))
+    # PDFs are already compressed, so members are stored as they are
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+        if workers <= 1:
+            pages = _add_statements(archive, [_render_statements(statements)])
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # A few groups per worker, so the pool stays busy without a round trip per person
+            group_size = -(-len(statements) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_render_statements, statements[first:first + group_size])
+                           for first in range(0, len(statements), group_size)]
+                pages = _add_statements(archive, (future.result() for future in futures))
+    return ReportStats(len(statements), pages, time.perf_counter() - start)
+
+def standin_items(people, items_per_person=6, seed=0):
+    """
+    Items of a stand-in event bill, for measuring report throughput
+
+    Args:
+        people: Number of people at the event
+        items_per_person: Items each person orders, about half of them shared
+        seed: Random seed of the bill
+
+    Returns:
+        list: (item_name, cost, [people]) items for money_owed
+    """
+    import random
+
+    rng = random.Random(seed)
+    names = [f"Guest {n + 1}" for n in range(people)]
+    items = []
+    for n in range(people * items_per_person // 2):
+        diners = rng.sample(names, min(rng.randint(1, 3), people))
+        items.append((f"Dish {n % 90 + 1}", round(rng.uniform(4, 60), 2), diners))
+    return items
+
+def main(argv=None):
+    """Split a stand-in event bill and write its PDF report, printing the throughput"""
+    import argparse
+    import tempfile
+
+    from .core import money_owed
+
+    parser = argparse.ArgumentParser(prog="python -m fairshare.report", description=main.__doc__)
+    parser.add_argument("--people", type=int, default=2000, help="People at the stand-in event (default: 2000)")
+    parser.add_argument("--items", type=int, default=6, help="Items each person orders (default: 6)")
+    parser.add_argument("-o", "--output", help="PDF path (default: a temporary file, removed afterwards)")
+    args = parser.parse_args(argv)
+
+    items = standin_items(args.people, args.items)
+    food = sum(cost for _, cost, _ in items)
+    tax_amount, tip_amount = round(food * 0.08, 2), round(food * 0.18, 2)
+    detailed_result, simple_result, subtotal = money_owed(items, tax_amount, tip_amount)
+    totals = {'subtotal': subtotal, 'tax': tax_amount, 'tip': tip_amount, 'extra_fees': 0.0,
+              'total': subtotal + tax_amount + tip_amount}
+    output = args.output or tempfile.mkstemp(suffix=".pdf")[1]
+    try:
+        stats = write_pdf_report(simple_result, detailed_result, totals, output)
+        size = os.path.getsize(output)
+    finally:
+        if not args.output:
+            os.remove(output)
+    print(f"{stats.people} people, {stats.pages} pages, {size / 1_000_000:.1f} MB in {stats.seconds:.2f}s "
+          f"({stats.pages_per_second:.1f} pages/s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
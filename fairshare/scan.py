@@ -0,0 +1,281 @@
+"""
+Pulling the rows of one event out of very large CSV exports
+
+Point-of-sale systems export every tab of a venue into one CSV, often
+several gigabytes, when only the rows of one event (or date, or table) make
+up the bill. The file is memory-mapped and scanned block by block with
+numpy: delimiters are located with vectorized byte comparisons (commas and
+newlines inside quoted fields are skipped), the filter columns are compared
+in place, and matching rows come back as byte ranges of the mapping. Only
+those rows are then handed to pandas, as memoryview slices of the mapping,
+so extracting one event never copies the rest of the file.
+
+Exports are read in the long format of fairshare.ingest: Item, amount and
+Person columns (plus Servings) alongside any others, such as the event ID,
+date or table number the rows are filtered on.
+
+Filters map a column name (matched case-insensitively) to either a value,
+compared as text, or a (low, high) pair of inclusive text bounds, either of
+which may be None. Bounds compare the start of the field, so ISO dates
+(2024-05-31) select whole days even when the column holds times as well.
+"""
+
+import csv
+import io
+import mmap
+
+from .ingest import CSV_CHUNK_ROWS, split_serving_table, stream_csv_serving_table
+from .lazy import load
+
+# Bytes of the mapping scanned at a time
+MMAP_BLOCK_BYTES = 16 * 1024 * 1024
+
+_NEWLINE, _QUOTE, _COMMA, _CR = 10, 34, 44, 13
+
+def parse_row_filter(text):
+    """
+    Parse a COLUMN=VALUE or COLUMN=LOW..HIGH filter (either bound may be empty)
+
+    Args:
+        text: Filter text, e.g. "event_id=E42" or "date=2024-05-01..2024-05-03"
+
+    Returns:
+        tuple: (column, value) or (column, (low, high))
+    """
+    column, separator, value = text.partition("=")
+    if not separator or not column.strip():
+        raise ValueError(f"expected COLUMN=VALUE or COLUMN=LOW..HIGH, got {text!r}")
+    if ".." in value:
+        low, _, high = value.partition("..")
+        return column.strip(), (low or None, high or None)
+    return column.strip(), value
+
+def _filter_positions(header_line, filters):
+    """Column positions of the filters, in the order of filters"""
+    header = next(csv.reader([header_line.decode("utf-8-sig").rstrip("\r\n")]), [])
+    by_name = {}
+    for position, column in enumerate(header):
+        by_name.setdefault(column.strip().lower(), position)
+    positions = []
+    for column in filters:
+        position = by_name.get(column.strip().lower())
+        if position is None:
+            raise ValueError(f"filter column {column!r} is not in the CSV header")
+        positions.append(position)
+    return positions
+
+def _field_bounds(block, line_starts, line_ends, commas, position):
+    """Start and end of field number position on each line, without enclosing quotes"""
+    np = load("numpy")
+    padded = np.append(commas, np.full(position + 1, len(block) + 1, dtype=np.int64))
+    first_comma = np.searchsorted(commas, line_starts)
+    starts = line_starts if position == 0 else padded[first_comma + position - 1] + 1
+    ends = np.minimum(padded[first_comma + position], line_ends)
+    # Lines with fewer fields get an empty field
+    starts = np.minimum(starts, ends)
+    quoted = (ends - starts >= 2) & (block[np.minimum(starts, len(block) - 1)] == _QUOTE) \
+        & (block[np.maximum(ends - 1, 0)] == _QUOTE)
+    return starts + quoted, ends - quoted
+
+def _gather(block, starts, ends, width):
+    """Fixed-width byte strings of the fields, zero-padded past their ends"""
+    np = load("numpy")
+    offsets = starts[:, None] + np.arange(width)
+    inside = offsets < ends[:, None]
+    chars = np.where(inside, block[np.minimum(offsets, len(block) - 1)], 0).astype(np.uint8)
+    return np.ascontiguousarray(chars).view(f"S{width}").ravel()
+
+def _field_matches(block, starts, ends, value):
+    """Mask of the fields equal to value, or within a (low, high) pair of bounds"""
+    np = load("numpy")
+    if isinstance(value, tuple):
+        low, high = (None if bound is None else str(bound).encode("utf-8") for bound in value)
+        width = max(len(bound) for bound in (low, high, b"x") if bound is not None)
+        fields = _gather(block, starts, ends, width)
+        matches = np.ones(len(starts), dtype=bool)
+        if low is not None:
+            matches &= fields >= low
+        if high is not None:
+            matches &= fields <= high
+        return matches
+    wanted = str(value).encode("utf-8")
+    matches = (ends - starts) == len(wanted)
+    if wanted:
+        candidates = np.flatnonzero(matches)
+        matches[candidates] = _gather(block, starts[candidates], ends[candidates], len(wanted)) == wanted
+    return matches
+
+def _outside_quotes(positions, quotes):
+    """Delimiter positions that are not inside a quoted field"""
+    np = load("numpy")
+    if len(quotes) == 0:
+        return positions
+    # Each quote flips the quoted state of every delimiter after it
+    flips = np.bincount(np.searchsorted(positions, quotes), minlength=len(positions) + 1)[:len(positions)]
+    return positions[(np.cumsum(flips) & 1) == 0]
+
+def _last_line_end(buffer, data, start, end):
+    """Offset just past the last newline outside quotes in buffer[start:end], or None"""
+    np = load("numpy")
+    newline = buffer.rfind(b"\n", start, end)
+    while newline != -1 and np.count_nonzero(data[start:newline] == _QUOTE) % 2:
+        newline = buffer.rfind(b"\n", start, newline)
+    return None if newline == -1 else newline + 1
+
+def _block_matches(block, filters, positions, final):
+    """
+    Scan one block of whole lines
+
+    Returns:
+        tuple: (line_starts, line_ends, matches, consumed) where consumed is
+            the number of bytes of the block made of complete lines
+    """
+    np = load("numpy")
+    quotes = np.flatnonzero(block == _QUOTE)
+    newlines = _outside_quotes(np.flatnonzero(block == _NEWLINE), quotes)
+    if final and (len(newlines) == 0 or newlines[-1] != len(block) - 1) and len(block):
+        # Last line of the file without a trailing newline
+        newlines = np.append(newlines, len(block))
+    if len(newlines) == 0:
+        return None
+    consumed = int(min(newlines[-1] + 1, len(block)))
+    line_starts = np.concatenate(([0], newlines[:-1] + 1))
+    line_ends = newlines - (block[np.maximum(newlines - 1, 0)] == _CR) * (newlines > line_starts)
+    commas = _outside_quotes(np.flatnonzero(block[:consumed] == _COMMA), quotes)
+
+    matches = line_ends > line_starts
+    for position, value in zip(positions, filters.values()):
+        starts, ends = _field_bounds(block, line_starts, line_ends, commas, position)
+        matches &= _field_matches(block, starts, ends, value)
+    return line_starts, np.minimum(newlines + 1, len(block)), matches, consumed
+
+def scan_csv(buffer, filters, block_bytes=MMAP_BLOCK_BYTES):
+    """
+    Find the rows of a CSV that pass every filter
+
+    Args:
+        buffer: Whole CSV file as bytes or an mmap, header line first
+        filters: {column: value or (low, high)} (see the module docstring)
+        block_bytes: Bytes scanned at a time; blocks grow if one line is longer
+
+    Returns:
+        tuple: (header_end, runs) where header_end is the offset just past the
+            header line and runs is a list of (start, end) byte offsets of
+            consecutive matching rows, newlines included
+    """
+    np = load("numpy")
+    header_end = buffer.find(b"\n") + 1 or len(buffer)
+    positions = _filter_positions(buffer[:header_end], filters)
+    # Blocks without the text of every exact-match filter cannot match and are skipped
+    required = [str(value).encode("utf-8") for value in filters.values() if not isinstance(value, tuple) and value != ""]
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    runs = []
+    try:
+        start = header_end
+        size = block_bytes
+        while start < len(data):
+            end = min(start + size, len(data))
+            if any(buffer.find(value, start, end) == -1 for value in required):
+                next_start = len(data) if end == len(data) else _last_line_end(buffer, data, start, end)
+                if next_start is not None:
+                    start, size = next_start, block_bytes
+                    continue
+            scanned = _block_matches(data[start:end], filters, positions, final=end == len(data))
+            if scanned is None:
+                # One line longer than the block, so look further
+                size *= 2
+                continue
+            line_starts, line_ends, matches, consumed = scanned
+            # Consecutive matching lines are merged into one run
+            edges = np.diff(np.concatenate(([0], matches.astype(np.int8), [0])))
+            for first, last in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1):
+                run = (start + int(line_starts[first]), start + int(line_ends[last]))
+                if runs and runs[-1][1] == run[0]:
+                    run = (runs.pop()[0], run[1])
+                runs.append(run)
+            start += consumed
+            size = block_bytes
+    finally:
+        # The mapping cannot be closed while numpy still views it
+        del data
+    return header_end, runs
+
+class _SliceReader(io.RawIOBase):
+    """Raw reader over a sequence of memoryview slices, read in order"""
+
+    def __init__(self, slices):
+        self.slices = list(slices)
+        self.size = sum(len(piece) for piece in self.slices)
+        self._index = 0
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._index < len(self.slices):
+            piece = self.slices[self._index]
+            size = min(len(buffer), len(piece) - self._offset)
+            if size > 0:
+                buffer[:size] = piece[self._offset:self._offset + size]
+                self._offset += size
+                return size
+            self._index += 1
+            self._offset = 0
+        return 0
+
+def read_filtered_serving_table(path, filters, chunk_rows=CSV_CHUNK_ROWS, block_bytes=MMAP_BLOCK_BYTES,
+                                validate=True):
+    """
+    Read only the rows of a large CSV bill that pass the filters
+
+    The file is memory-mapped and scanned with scan_csv; the header and the
+    matching rows are then parsed straight from slices of the mapping.
+
+    Args:
+        path: Path of the CSV file
+        filters: {column: value or (low, high)} (see the module docstring)
+        chunk_rows: Number of matching rows parsed at a time
+        block_bytes: Bytes of the file scanned at a time
+        validate: Check the matching rows with check_bill_table
+
+    Returns:
+        ServingTable of the matching rows
+
+    Raises:
+        ValueError: If a filter column is not in the header or no row matches
+        BillValidationError: If the matching rows fail validation
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header_end, runs = scan_csv(mapped, filters, block_bytes)
+        if not runs:
+            raise ValueError(f"no rows match {filters}")
+        view = memoryview(mapped)
+        slices = [view[:header_end]] + [view[start:end] for start, end in runs]
+        try:
+            return stream_csv_serving_table(_SliceReader(slices), chunk_rows, validate=validate)
+        finally:
+            for piece in slices:
+                piece.release()
+            view.release()
+
+def split_filtered_csv(path, filters, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0,
+                       exact_cents=False, validate=True):
+    """
+    Split only the rows of a large CSV bill that pass the filters
+
+    Args:
+        path: Path of the CSV file
+        filters: {column: value or (low, high)} (see the module docstring)
+        tax_amount: Total tax amount
+        tip_amount: Total tip amount
+        extra_fees: Total extra fees/surcharges
+        discount_amount: Total discount amount
+        exact_cents: Split in integer cents (see money_owed)
+        validate: Check the matching rows with check_bill_table
+
+    Returns:
+        tuple: (detailed_results, person_dict_final, running_total_preTaxTip)
+    """
+    table = read_filtered_serving_table(path, filters, validate=validate)
+    return split_serving_table(table, tax_amount, tip_amount, extra_fees, discount_amount, exact_cents)
@@ -0,0 +1,137 @@
+"""
+Compact binary save files for partially completed sessions
+
+A session file starts with a magic string and a format version, followed by
+a zlib-compressed body of length-prefixed sections. Items are stored column
+by column: item names and prices, the number of people on each item, and
+people as codes into a table of distinct names. Loading decodes each column
+in one go. Older JSON session files are still read.
+"""
+
+import json
+import struct
+import zlib
+from array import array
+from itertools import accumulate
+
+SESSION_MAGIC = b"FSSESS"
+SESSION_VERSION = 1
+
+# File name and MIME type offered for downloaded sessions
+SESSION_FILE_NAME = "bill_splitter_session.fss"
+SESSION_MIME = "application/octet-stream"
+
+_HEADER = struct.Struct("<6sH")
+_SECTION_LENGTH = struct.Struct("<Q")
+
+def _pack_strings(strings):
+    """Character lengths and UTF-8 blob of a list of strings"""
+    return array('Q', map(len, strings)).tobytes(), "".join(strings).encode("utf-8")
+
+def _unpack_strings(length_bytes, blob):
+    """Strings packed by _pack_strings"""
+    lengths = array('Q')
+    lengths.frombytes(length_bytes)
+    text = blob.decode("utf-8")
+    ends = list(accumulate(lengths))
+    return [text[end - length:end] for end, length in zip(ends, lengths)]
+
+def dump_session(items, item_count=None, charges=None, ignored=()):
+    """
+    Encode a session in the compact binary format
+
+    Args:
+        items: List of (item_name, cost, [people]) tuples
+        item_count: Number of item rows shown (default: len(items))
+        charges: Optional dict of tax, tip, extra_fees and discount amounts
+        ignored: Indices of items excluded from the split
+
+    Returns:
+        bytes: Session file contents
+    """
+    person_codes = {}
+    people_counts = array('Q')
+    codes = array('Q')
+    for _, _, people in items:
+        people_counts.append(len(people))
+        codes.extend(person_codes.setdefault(str(person), len(person_codes)) for person in people)
+
+    meta = {
+        'item_count': len(items) if item_count is None else int(item_count),
+        'charges': dict(charges or {}),
+    }
+    name_lengths, name_blob = _pack_strings([str(item[0] if item[0] is not None else "") for item in items])
+    person_lengths, person_blob = _pack_strings(list(person_codes))
+    sections = (
+        json.dumps(meta).encode("utf-8"),
+        name_lengths,
+        name_blob,
+        array('d', (float(item[1] or 0.0) for item in items)).tobytes(),
+        people_counts.tobytes(),
+        codes.tobytes(),
+        person_lengths,
+        person_blob,
+        array('Q', sorted(ignored)).tobytes(),
+    )
+    body = b"".join(_SECTION_LENGTH.pack(len(section)) + section for section in sections)
+    # Fastest zlib level: the columns already compress well
+    return _HEADER.pack(SESSION_MAGIC, SESSION_VERSION) + zlib.compress(body, 1)
+
+def _load_binary(data):
+    _, version = _HEADER.unpack_from(data)
+    if version != SESSION_VERSION:
+        raise ValueError(f"Unsupported session format version {version} (expected {SESSION_VERSION})")
+    body = memoryview(zlib.decompress(data[_HEADER.size:]))
+    sections = []
+    offset = 0
+    while offset < len(body):
+        (length,) = _SECTION_LENGTH.unpack_from(body, offset)
+        offset += _SECTION_LENGTH.size
+        sections.append(bytes(body[offset:offset + length]))
+        offset += length
+    meta_bytes, name_lengths, name_blob, price_bytes, count_bytes, code_bytes, person_lengths, person_blob, ignored_bytes = sections
+
+    meta = json.loads(meta_bytes)
+    names = _unpack_strings(name_lengths, name_blob)
+    prices = array('d')
+    prices.frombytes(price_bytes)
+    people_counts = array('Q')
+    people_counts.frombytes(count_bytes)
+    codes = array('Q')
+    codes.frombytes(code_bytes)
+    person_table = _unpack_strings(person_lengths, person_blob)
+    people = [person_table[code] for code in codes]
+    ends = list(accumulate(people_counts))
+    ignored = array('Q')
+    ignored.frombytes(ignored_bytes)
+    return {
+        'item_count': meta['item_count'],
+        'items': [(name, price, people[end - count:end])
+                  for name, price, end, count in zip(names, prices.tolist(), ends, people_counts)],
+        'charges': meta['charges'],
+        'ignored': set(ignored),
+    }
+
+def load_session(data):
+    """
+    Decode a session file in the binary format or the older JSON format
+
+    Args:
+        data: Session file contents as bytes or str
+
+    Returns:
+        dict: 'item_count', 'items' ((item_name, cost, [people]) tuples),
+            'charges' (tax, tip, extra_fees, discount present in the file)
+            and 'ignored' (set of item indices)
+    """
+    if isinstance(data, bytes) and data.startswith(SESSION_MAGIC):
+        return _load_binary(data)
+
+    payload = json.loads(data)
+    items = [tuple(item) for item in payload.get('items', [])]
+    return {
+        'item_count': int(payload.get('item_count', len(items))),
+        'items': items,
+        'charges': {key: payload[key] for key in ('tax', 'tip', 'extra_fees', 'discount') if key in payload},
+        'ignored': set(payload.get('ignored', ())),
+    }
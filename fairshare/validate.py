@@ -0,0 +1,299 @@
+"""
+Checking bill tables before they are split
+
+A bill table is checked in one vectorized pass. For each layout:
+
+- the required columns are present;
+- every item has a name and a numeric amount;
+- servings are whole numbers that are not negative;
+- non-numeric marks are ones we know, such as ✓.
+
+Problems come back as CellError rows and columns, numbered the way a
+spreadsheet shows them (header on row 1). The serving table builders in
+fairshare.ingest stay lenient; readers of uploaded files call
+check_bill_table first so a bad file is rejected before any split runs.
+"""
+
+from collections import namedtuple
+
+from .lazy import load
+
+# Columns (matched case-insensitively) that mark a long-format bill
+LONG_FORMAT_COLUMNS = ("item", "amount", "person")
+
+# Optional long-format columns: the servings count and an id telling apart POS lines of the same item and amount
+LONG_FORMAT_OPTIONAL_COLUMNS = ("servings", "line")
+
+# Non-numeric marks (compared case-insensitively) that count as one serving
+KNOWN_MARKS = ("✓", "✔", "☑", "x", "*", "y", "yes")
+
+# Problems reported before the rest are dropped
+MAX_REPORTED_ERRORS = 200
+
+# Problem codes of _cell_problems, indexing PROBLEM_MESSAGES
+(_MISSING_ITEM, _MISSING_AMOUNT, _BAD_AMOUNT, _NEGATIVE_SERVINGS, _UNKNOWN_MARK, _MISSING_PERSON,
+ _REPEATED_PERSON, _MISSING_LINE, _FRACTIONAL_SERVINGS) = range(1, 10)
+_BLANK_PROBLEMS = (_MISSING_ITEM, _MISSING_AMOUNT, _MISSING_PERSON, _MISSING_LINE)
+PROBLEM_MESSAGES = (
+    None,
+    "missing item name",
+    "missing amount",
+    "amount is not a number",
+    "negative servings",
+    "unknown mark",
+    "missing person",
+    "person repeated on the item (use Servings, or a Line column for separate items)",
+    "missing line id",
+    "servings must be a whole number",
+)
+
+class CellError(namedtuple("CellError", "row column value message")):
+    """
+    One problem found in a bill table
+
+    row is the spreadsheet row number (the header is row 1), column the
+    header of the offending column and value the cell as read (None for
+    problems with the header itself).
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        where = f"row {self.row}, column {self.column!r}"
+        if self.value is None:
+            return f"{where}: {self.message}"
+        return f"{where}: {self.message} ({self.value!r})"
+
+class BillValidationError(ValueError):
+    """
+    Raised when a bill table fails validation
+
+    Attributes:
+        errors: List of CellError, at most MAX_REPORTED_ERRORS of them
+        source: Optional name of the file or sheet the errors belong to
+    """
+
+    def __init__(self, errors, source=None):
+        # Both arguments are kept in args so the error pickles across process pools
+        super().__init__(errors, source)
+        self.errors = errors
+        self.source = source
+
+    def __str__(self):
+        count = f"{len(self.errors)}{'+' if len(self.errors) >= MAX_REPORTED_ERRORS else ''}"
+        where = f" in {self.source}" if self.source else ""
+        shown = "; ".join(str(error) for error in self.errors[:3])
+        more = "; ..." if len(self.errors) > 3 else ""
+        return f"{count} problem(s){where}: {shown}{more}"
+
+def is_long_format(columns):
+    """
+    Whether a bill header is the long (Item, amount, Person[, Servings][, Line]) layout
+
+    Args:
+        columns: Header cells of the bill
+    """
+    lowered = {str(column).strip().lower() for column in columns if column is not None}
+    return all(column in lowered for column in LONG_FORMAT_COLUMNS)
+
+def _long_format_positions(columns):
+    """Positions of the Item, amount, Person, Servings and Line columns (None for missing optional ones)"""
+    by_name = {}
+    for position, column in enumerate(columns):
+        by_name.setdefault(str(column).strip().lower(), position)
+    return (*(by_name[name] for name in LONG_FORMAT_COLUMNS),
+            *(by_name.get(name) for name in LONG_FORMAT_OPTIONAL_COLUMNS))
+
+def long_format_columns(df):
+    """
+    Item, amount, Person, Servings and Line columns of a long-format bill
+
+    Args:
+        df: DataFrame whose header passes is_long_format
+
+    Returns:
+        tuple: Five pandas Series; Servings and Line are None when the bill
+            has no such column
+    """
+    return tuple(None if position is None else df.iloc[:, position]
+                 for position in _long_format_positions(df.columns))
+
+def item_runs(items, amounts, lines=None):
+    """
+    Item number of each row of a long-format bill
+
+    A new item starts where Item or amount changes, or where the line id
+    does when the bill has a Line column. Without one, two POS lines of the
+    same item and amount next to each other read as a single shared item.
+
+    Args:
+        items: Item column
+        amounts: amount column
+        lines: Optional Line column
+
+    Returns:
+        tuple: (item number of each row, positions of the rows starting an item)
+    """
+    np = load("numpy")
+    starts = np.zeros(len(items), dtype=bool)
+    starts[:1] = True
+    for column in (items, amounts, lines):
+        if column is not None:
+            values = column.to_numpy(dtype=object)
+            starts[1:] |= values[1:] != values[:-1]
+    return np.cumsum(starts) - 1, np.flatnonzero(starts)
+
+def is_blank(values):
+    """Mask of missing or whitespace-only cells in an object array"""
+    pd = load("pandas")
+    series = pd.Series(values, dtype=object)
+    return (series.isna() | series.astype(str).str.strip().eq("")).to_numpy()
+
+def _mark_problems(values, known_marks):
+    """
+    Problem code of each cell of an array of servings marks
+
+    Marks are factorized first, so each distinct mark is checked once.
+    Numeric marks must be whole numbers, as the splitter counts servings and
+    would otherwise drop the fraction.
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    codes, distinct_marks = pd.factorize(values)
+    distinct = pd.Series(distinct_marks, dtype=object)
+    numeric = pd.to_numeric(distinct, errors="coerce").to_numpy(dtype=float)
+    text = distinct.astype(str).str.strip()
+    known = text.str.lower().isin({mark.lower() for mark in known_marks}).to_numpy() | text.eq("").to_numpy()
+    with np.errstate(invalid="ignore"):
+        fractional = np.mod(numeric, 1) != 0
+    problems = np.where(np.isnan(numeric), np.where(known, 0, _UNKNOWN_MARK),
+                        np.where(numeric < 0, _NEGATIVE_SERVINGS,
+                                 np.where(fractional, _FRACTIONAL_SERVINGS, 0))).astype(np.int8)
+    # Blank cells factorize to -1, which picks the appended 0
+    return np.append(problems, 0)[codes]
+
+def _person_problems(items, amounts, persons, lines):
+    """
+    Problem code of each row's Person cell in a long-format bill
+
+    Without a Line column a person named twice on one item is flagged, as the
+    rows may be separate POS lines whose costs would be merged.
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    blank = is_blank(persons.to_numpy(dtype=object))
+    if lines is None:
+        names = pd.Series(persons.to_numpy(dtype=object), dtype=object).astype(str).str.strip().str.lower()
+        rows = pd.DataFrame({'item': item_runs(items, amounts)[0], 'name': names.to_numpy()})
+        repeated = rows.duplicated().to_numpy() & ~blank
+    else:
+        repeated = np.zeros(len(persons), dtype=bool)
+    return np.where(blank, _MISSING_PERSON, np.where(repeated, _REPEATED_PERSON, 0)).astype(np.int8)
+
+def _item_problems(items, amounts, assigned):
+    """
+    Problem code of each row's Item and amount cells
+
+    assigned masks the rows that name anyone, which need an item and amount
+    even when both are blank.
+    """
+    np = load("numpy")
+    pd = load("pandas")
+    item_blank = is_blank(items.to_numpy(dtype=object))
+    amount_blank = is_blank(amounts.to_numpy(dtype=object))
+    amount_bad = pd.to_numeric(amounts, errors="coerce").isna().to_numpy() & ~amount_blank
+    # Rows with no item, amount or people are empty rows, not errors
+    item_problems = np.where(item_blank & (~amount_blank | assigned), _MISSING_ITEM, 0).astype(np.int8)
+    amount_problems = np.where(amount_bad, _BAD_AMOUNT,
+                               np.where(amount_blank & (~item_blank | assigned), _MISSING_AMOUNT, 0)).astype(np.int8)
+    return item_problems, amount_problems
+
+def _header_errors(df):
+    """CellErrors for required columns missing from a bill header"""
+    if is_long_format(df.columns):
+        return []
+    errors = [CellError(1, column, None, f"missing column (expected as column {position + 1})")
+              for position, column in enumerate(("Item", "amount"))
+              if df.shape[1] <= position or df.columns[position] != column]
+    if not errors and df.shape[1] < 3:
+        errors.append(CellError(1, "", None, "no person columns after Item and amount"))
+    return errors
+
+def _cell_problems(df, known_marks):
+    """
+    Problem code of every checked cell of a bill table
+
+    Returns:
+        tuple: (problems, positions) where problems is an int8 (rows, columns)
+            array, zero for good cells, and positions are the df column
+            positions of its columns
+    """
+    np = load("numpy")
+    if is_long_format(df.columns):
+        positions = [position for position in _long_format_positions(df.columns) if position is not None]
+        items, amounts, persons, servings, lines = long_format_columns(df)
+        assigned = ~is_blank(persons.to_numpy(dtype=object))
+        problems = [*_item_problems(items, amounts, assigned), _person_problems(items, amounts, persons, lines)]
+        if servings is not None:
+            problems.append(_mark_problems(servings.to_numpy(dtype=object), known_marks))
+        if lines is not None:
+            problems.append(np.where(is_blank(lines.to_numpy(dtype=object)), _MISSING_LINE, 0).astype(np.int8))
+        return np.column_stack(problems), positions
+
+    marks = df.iloc[:, 2:]
+    mark_values = marks.to_numpy(dtype=object)
+    mark_problems = _mark_problems(mark_values.ravel(), known_marks).reshape(marks.shape)
+    assigned = ~is_blank(mark_values.ravel()).reshape(marks.shape).all(axis=1)
+    problems = np.column_stack([*_item_problems(df['Item'], df['amount'], assigned), mark_problems])
+    return problems, list(range(df.shape[1]))
+
+def validate_bill_table(df, known_marks=KNOWN_MARKS, first_row=2, limit=MAX_REPORTED_ERRORS):
+    """
+    Check a wide or long-format bill table in one vectorized pass
+
+    Args:
+        df: Bill DataFrame (see fairshare.ingest)
+        known_marks: Non-numeric marks accepted as one serving
+        first_row: Spreadsheet row number of the first row of df, or a
+            sequence giving the row number of every row
+        limit: Most problems reported
+
+    Returns:
+        list: CellError problems in row order, empty if the table is good
+    """
+    np = load("numpy")
+    header_errors = _header_errors(df)
+    if header_errors:
+        return header_errors
+
+    problems, positions = _cell_problems(df, known_marks)
+    # Row-major order of the flattened array puts problems in row order
+    rows, cells = np.divmod(np.flatnonzero(problems)[:limit], problems.shape[1])
+    row_numbers = range(first_row, first_row + len(df)) if isinstance(first_row, int) else first_row
+    errors = []
+    for row, cell in zip(rows.tolist(), cells.tolist()):
+        problem = problems[row, cell]
+        # Missing cells have no value worth showing
+        value = None if problem in _BLANK_PROBLEMS else df.iat[row, positions[cell]]
+        if hasattr(value, "item"):
+            # Plain Python values, so reports show -2.0 rather than np.float64(-2.0)
+            value = value.item()
+        errors.append(CellError(row_numbers[row], str(df.columns[positions[cell]]), value, PROBLEM_MESSAGES[problem]))
+    return errors
+
+def check_bill_table(df, known_marks=KNOWN_MARKS, first_row=2, source=None):
+    """
+    Validate a bill table and raise if it has problems
+
+    Args:
+        df: Bill DataFrame (see fairshare.ingest)
+        known_marks: Non-numeric marks accepted as one serving
+        first_row: Spreadsheet row number of the first row of df, or a
+            sequence giving the row number of every row
+        source: Optional file or sheet name used in the error message
+
+    Raises:
+        BillValidationError: Listing the problems found
+    """
+    errors = validate_bill_table(df, known_marks, first_row)
+    if errors:
+        raise BillValidationError(errors, source)
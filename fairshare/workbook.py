@@ -0,0 +1,276 @@
+"""
+Multi-sheet Excel workbooks where every sheet is its own bill
+
+Workbooks are opened with openpyxl in read-only, values-only mode and their
+sheets are parsed into serving tables on a process pool. Three sheet layouts
+are read:
+
+- Person columns, like data/sample_bill_template.csv (servings or ✓ marks)
+- Long Item, amount, Person[, Servings] rows (see fairshare.ingest)
+- A "names" column followed by the names of the people who shared the item,
+  like data/ExampleExcelData-ChineseRestaurant.xlsx
+"""
+
+import io
+import os
+
+from .core import AMOUNT_FIELDS
+from .ingest import (
+    long_serving_table,
+    serving_table_from_items,
+    split_serving_table,
+    wide_serving_table,
+)
+from .lazy import load
+from .validate import BillValidationError, check_bill_table, is_long_format
+
+# Header after the amount column that marks a sheet listing names in its cells
+NAMES_HEADERS = ("names", "name", "people")
+
+# Amounts summed across sheets in the per-person roll-up
+ROLLUP_FIELDS = tuple(field for field in AMOUNT_FIELDS if field != 'percentage_of_bill')
+
+def _open_workbook(source):
+    """Open a workbook path or bytes in read-only, values-only mode"""
+    openpyxl = load("openpyxl")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+def _check_names_sheet(header, body, names, row_numbers):
+    """
+    Validate a sheet listing names as long-format rows, one per sheet row
+
+    Each row is its own item, so rows are given distinct line ids, and
+    problems with the names are reported against the names column.
+    """
+    pd = load("pandas")
+    # The header is checked as in the person-column layout
+    check_bill_table(pd.DataFrame(columns=header))
+    rows = pd.DataFrame({
+        "Item": [row[0] for row in body],
+        "amount": [row[1] for row in body],
+        "Person": [", ".join(row_names) for row_names in names],
+        "Line": row_numbers,
+    })
+    try:
+        check_bill_table(rows, first_row=row_numbers)
+    except BillValidationError as e:
+        raise BillValidationError([error._replace(column=str(header[2])) if error.column == "Person" else error
+                                   for error in e.errors]) from None
+
+def parse_sheet_rows(rows, validate=True):
+    """
+    Parse one sheet given as rows of cell values into a ServingTable
+
+    Args:
+        rows: Iterable of row tuples, header row first
+        validate: Check the sheet with check_bill_table first
+
+    Returns:
+        ServingTable of the sheet
+
+    Raises:
+        BillValidationError: If the sheet fails validation
+    """
+    rows = iter(rows)
+    header = list(next(rows, ()))
+    # Row numbers are kept for error reports, as blank rows are skipped
+    numbered = [(number, row) for number, row in enumerate(rows, start=2)
+                if any(cell is not None for cell in row)]
+    body = [row for _, row in numbered]
+    row_numbers = [number for number, _ in numbered]
+    marker = next((str(cell).strip().lower() for cell in header[2:] if cell is not None), "")
+
+    if marker in NAMES_HEADERS:
+        names = [[str(cell) for cell in row[2:] if cell is not None and str(cell).strip()] for row in body]
+        if validate:
+            _check_names_sheet(header, body, names, row_numbers)
+        return serving_table_from_items(
+            (row[0], row[1], row_names) for row, row_names in zip(body, names)
+            if row[0] is not None or row[1] is not None
+        )
+
+    pd = load("pandas")
+    df = pd.DataFrame.from_records(body, columns=header)
+    if validate:
+        check_bill_table(df, first_row=row_numbers)
+    if is_long_format(df.columns):
+        return long_serving_table(df)
+    # Unchecked sheets are read by column position
+    return wide_serving_table(df.set_axis(['Item', 'amount', *df.columns[2:]], axis=1))
+
+# Workbook path or bytes of the current pool worker, sent once per process
+_worker_source = None
+
+def _init_worker(source):
+    global _worker_source
+    _worker_source = source
+
+def _select_sheets(names, sheets):
+    """Sheet names picked by a parse_workbook sheets argument"""
+    if isinstance(sheets, int):
+        return names[:sheets]
+    if sheets is not None:
+        wanted = set(sheets)
+        return [name for name in names if name in wanted]
+    return names
+
+def _parse_sheet(workbook, name, validate):
+    """Parse one sheet of an open workbook, naming the sheet in validation errors"""
+    try:
+        return parse_sheet_rows(workbook[name].iter_rows(values_only=True), validate)
+    except BillValidationError as e:
+        raise BillValidationError(e.errors, f"sheet {name!r}") from None
+
+def _parse_sheet_group(source, names, sheets=None, validate=True):
+    """Open the workbook once and parse each named sheet (or the sheets selected)"""
+    workbook = _open_workbook(_worker_source if source is None else source)
+    try:
+        if names is None:
+            names = _select_sheets(list(workbook.sheetnames), sheets)
+        return [(name, _parse_sheet(workbook, name, validate)) for name in names]
+    finally:
+        workbook.close()
+
+def workbook_sheet_names(source):
+    """
+    Names of the sheets of a workbook, in workbook order
+
+    Args:
+        source: Path, bytes or binary file-like object
+    """
+    workbook = _open_workbook(source)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+def workbook_rollup(sheet_results):
+    """
+    Combine per-sheet splits into one total per person
+
+    Args:
+        sheet_results: {sheet_name: money_owed result tuple}
+
+    Returns:
+        dict: {person: {amount field: total across sheets, 'bills': sheet count}}
+    """
+    combined = {}
+    for detailed_result, _, _ in sheet_results.values():
+        for person, details in detailed_result.items():
+            totals = combined.get(person)
+            if totals is None:
+                totals = combined[person] = dict.fromkeys(ROLLUP_FIELDS, 0.0)
+                totals['bills'] = 0
+            for field in ROLLUP_FIELDS:
+                totals[field] += details[field]
+            totals['bills'] += 1
+    for totals in combined.values():
+        for field in ROLLUP_FIELDS:
+            totals[field] = round(totals[field], 2)
+    return combined
+
+def parse_workbook(source, workers=None, sheets=None, validate=True):
+    """
+    Parse every sheet of a workbook into a ServingTable on a process pool
+
+    Args:
+        source: Path, bytes or binary file-like object (e.g. a Streamlit upload)
+        workers: Number of worker processes (default: one per core); with a
+            single worker sheets are parsed in the calling process
+        sheets: Names of the sheets to parse, or a number to parse only the
+            first few (default: every sheet)
+        validate: Check each sheet with check_bill_table while parsing
+
+    Returns:
+        dict: {sheet_name: ServingTable}, in workbook order
+
+    Raises:
+        BillValidationError: If a sheet fails validation, naming the sheet
+    """
+    if not isinstance(source, (str, os.PathLike, bytes)):
+        # Worker processes get the raw bytes of uploaded files
+        source = source.getvalue() if hasattr(source, "getvalue") else source.read()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return dict(_parse_sheet_group(source, None, sheets, validate))
+
+    names = _select_sheets(workbook_sheet_names(source), sheets)
+    workers = min(workers, len(names))
+    if workers <= 1:
+        tables = dict(_parse_sheet_group(source, names, validate=validate))
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # A few groups per worker, so each one opens the workbook only a few times
+        group_size = -(-len(names) // (workers * 4))
+        groups = [names[start:start + group_size] for start in range(0, len(names), group_size)]
+        tables = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            for group_tables in pool.map(_parse_sheet_group, [None] * len(groups), groups,
+                                         [None] * len(groups), [validate] * len(groups)):
+                tables.update(group_tables)
+    return {name: tables[name] for name in names}
+
+def split_workbook_tables(sheet_tables, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0,
+                          exact_cents=False, sheet_charges=None):
+    """
+    Split parsed workbook sheets, each as its own bill
+
+    Args:
+        sheet_tables: {sheet_name: ServingTable} from parse_workbook
+        tax_amount: Tax amount applied to each sheet
+        tip_amount: Tip amount applied to each sheet
+        extra_fees: Extra fees applied to each sheet
+        discount_amount: Discount applied to each sheet
+        exact_cents: Split in integer cents (see money_owed)
+        sheet_charges: Optional {sheet_name: (tax, tip[, extra_fees, discount])}
+            overriding the charges of individual sheets
+
+    Returns:
+        tuple: (sheet_results, combined) where sheet_results maps each sheet
+            name to its money_owed result tuple and combined is the
+            per-person roll-up from workbook_rollup
+    """
+    default_charges = (tax_amount, tip_amount, extra_fees, discount_amount)
+    sheet_charges = sheet_charges or {}
+    sheet_results = {
+        name: split_serving_table(table, *sheet_charges.get(name, default_charges), exact_cents=exact_cents)
+        for name, table in sheet_tables.items()
+    }
+    return sheet_results, workbook_rollup(sheet_results)
+
+def split_workbook(source, tax_amount, tip_amount, extra_fees=0.0, discount_amount=0.0, exact_cents=False,
+                   workers=None, sheet_charges=None, sheets=None):
+    """
+    Split every sheet of a workbook as its own bill
+
+    Sheets are parsed on a process pool (see parse_workbook) and then split
+    with split_workbook_tables.
+
+    Args:
+        source: Path, bytes or binary file-like object (e.g. a Streamlit upload)
+        tax_amount: Tax amount applied to each sheet
+        tip_amount: Tip amount applied to each sheet
+        extra_fees: Extra fees applied to each sheet
+        discount_amount: Discount applied to each sheet
+        exact_cents: Split in integer cents (see money_owed)
+        workers: Number of worker processes (default: one per core)
+        sheet_charges: Optional {sheet_name: (tax, tip[, extra_fees, discount])}
+            overriding the charges of individual sheets
+        sheets: Names of the sheets to split, or a number to split only the
+            first few (default: every sheet)
+
+    Returns:
+        tuple: (sheet_results, combined) where sheet_results maps each sheet
+            name to its money_owed result tuple, in workbook order, and
+            combined is the per-person roll-up from workbook_rollup
+    """
+    sheet_tables = parse_workbook(source, workers, sheets)
+    return split_workbook_tables(sheet_tables, tax_amount, tip_amount, extra_fees, discount_amount,
+                                 exact_cents, sheet_charges)
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import copy
+import os
+import sys
 
-def normalize_name(name):
-    """Normalize a single name by trimming and title-casing"""
-    return name.strip().title()
+# Make the fairshare package importable when running from the scripts folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fairshare.core import money_owed as _money_owed
 
 def format_item_display(item_name, cost, num_people_shared):
     """
@@ -25,108 +27,11 @@ def format_item_display(item_name, cost, num_people_shared):
         fraction_str = f"{1}/{num_people_shared}"
         return f"{fraction_str} of {item_name}: ${cost:.2f}"
 
-def normalize_names_list(names_list):
-    """Normalize a list of names, handling comma-separated strings"""
-    normalized_names = []
-    for name_entry in names_list:
-        if ',' in name_entry:
-            # Split comma-separated names and normalize each
-            split_names = [n.strip() for n in name_entry.split(',') if n.strip()]
-            normalized_names.extend(split_names)
-        else:
-            # Single name, just normalize
-            normalized_names.append(name_entry)
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_names = []
-    for name in normalized_names:
-        normalized = normalize_name(name)
-        if normalized not in seen:
-            seen.add(normalized)
-            unique_names.append(normalized)
-    
-    return unique_names
-
 def money_owed(items, tax_amount, tip_amount, discount_amount=0.0):
     """Calculate how much each person owes with detailed breakdown"""
-    if not items:
-        return {}, {}, 0
-    
-    # Get unique people from all items
-    all_people = set()
-    for _, _, names in items:
-        all_people.update(names)
-    
-    person_list = list(all_people)
-    person_dict = {person: 0 for person in person_list}
-    person_dict_percent_of_bill = {person: 0 for person in person_list}
-    person_dict_final = {person: 0 for person in person_list}
-    
-    # Track what each person ate and their individual costs
-    person_items = {person: [] for person in person_list}
-    person_individual_costs = {person: 0 for person in person_list}
-    
-    running_total_preTaxTip = 0
-
-    for item, cost, names in items:
-        if not names:  # Skip items with no names
-            continue
-            
-        # Normalize names for this item
-        normalized_names = normalize_names_list(names)
-        if not normalized_names:  # Skip items with no valid names
-            continue
-            
-        split_cost_of_item = cost / len(normalized_names)
-        running_total_preTaxTip += split_cost_of_item * len(normalized_names)
-
-        for name in normalized_names:
-            person_dict[name] += split_cost_of_item
-            # Track what each person ate and their individual costs, including how many people shared the item
-            person_items[name].append((item, split_cost_of_item, len(normalized_names)))
-            person_individual_costs[name] += split_cost_of_item
-
-    total_tax_tip = tax_amount + tip_amount
-
-    for person in person_dict_percent_of_bill.keys():
-        person_dict_percent_of_bill[person] = person_dict[person] / running_total_preTaxTip
-
-    for person in person_dict:
-        person_tip_to_pay = person_dict_percent_of_bill[person] * tip_amount
-        person_tax_to_pay = person_dict_percent_of_bill[person] * tax_amount
-        person_discount_to_apply = person_dict_percent_of_bill[person] * discount_amount
-        person_tax_tip_to_pay = person_tax_to_pay + person_tip_to_pay
-        person_final_total = person_tax_tip_to_pay + person_dict[person] - person_discount_to_apply
-        person_dict_final[person] = round(person_final_total, 2)
-
-    # New: Return detailed breakdown
-    detailed_results = {}
-    for person in person_list:
-        person_percentage = person_dict_percent_of_bill[person]
-        person_tax = person_dict_percent_of_bill[person] * tax_amount
-        person_tip = person_dict_percent_of_bill[person] * tip_amount
-        person_discount = person_dict_percent_of_bill[person] * discount_amount
-        
-        detailed_results[person] = {
-            'items_eaten': person_items[person],
-            'subtotal_before_tax_tip': round(person_individual_costs[person], 2),
-            'percentage_of_bill': round(person_percentage * 100, 2),
-            'tax_amount': round(person_tax, 2),
-            'tip_amount': round(person_tip, 2),
-            'discount_amount': round(person_discount, 2),
-            'final_total': round(person_dict_final[person], 2)
-        }
-
-    return detailed_results, person_dict_final, running_total_preTaxTip
-
-def calculate_total_bill(items, tax_amount, tip_amount, discount_amount=0.0):
-    """Calculate the total bill amount including tax, tip, and discount"""
-    subtotal = sum(cost for _, cost, _ in items)
-    total = subtotal + tax_amount + tip_amount - discount_amount
-    return subtotal, total
+    return _money_owed(items, tax_amount, tip_amount, discount_amount=discount_amount)
 
-def owed_from_xl(filepath, tax_amount, tip_amount, file_type="excel"):
+def owed_from_xl(filepath, tax_amount, tip_amount, file_type="excel", discount_amount=0.0):
     """Read bill data from Excel or CSV file"""
     try:
         if file_type == "csv":
@@ -141,7 +46,7 @@ def owed_from_xl(filepath, tax_amount, tip_amount, file_type="excel"):
             consumers = [row[col] for col in df.columns[2:] if not pd.isnull(row[col])]
             items.append((item_name, item_cost, consumers))
 
-        return money_owed(items, tax_amount, tip_amount, discount_amount_compact)
+        return money_owed(items, tax_amount, tip_amount, discount_amount)
     except Exception as e:
         st.error(f"Error reading file: {str(e)}")
         return None, None, None
@@ -432,7 +337,7 @@ elif ui_style == "Compact UI":
     # Process file or show manual entry
     if uploaded_file_compact and tax_amount_compact and tip_amount_compact:
         detailed_result_compact, simple_result_compact, subtotal_compact = owed_from_xl(
-            uploaded_file_compact, tax_amount_compact, tip_amount_compact, file_type_compact
+            uploaded_file_compact, tax_amount_compact, tip_amount_compact, file_type_compact, discount_amount_compact
         )
         
         if detailed_result_compact is not None:
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the upload and report caches
+"""
+
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.cache import LRUCache, ParsedUploadCache, result_key
+from fairshare.core import money_owed
+
+def test_upload_cache_reuses_parses_and_evicts_lru():
+    """Same content and format parse once; the least recently used entry goes first"""
+    cache = ParsedUploadCache(max_bytes=10_000, max_entries=2)
+    parses = []
+    def parse(value):
+        parses.append(value)
+        return value
+    assert cache.get_or_parse(b"bill a", "csv", lambda: parse("a")) == "a"
+    assert cache.get_or_parse(b"bill a", "csv", lambda: parse("again")) == "a"
+    cache.get_or_parse(b"bill a", "excel", lambda: parse("a as excel"))
+    cache.get_or_parse(b"bill a", "csv", lambda: parse("again"))
+    cache.get_or_parse(b"bill b", "csv", lambda: parse("b"))
+    assert cache.get_or_parse(b"bill a", "csv", lambda: parse("again")) == "a"
+    assert parses == ["a", "a as excel", "b"]
+    cache.get_or_parse(b"huge", "csv", lambda: "x" * 20_000)
+    assert cache.stats()['entries'] == 2 and cache.stats()['nbytes'] <= 10_000
+    print("✅ Upload cache reuses parses and evicts LRU!")
+
+def test_reports_are_cached_by_result_hash():
+    """Equal results share one rendered report; any change to the result misses"""
+    items = [('Pizza', 20, ['alice', 'bob']), ('Wine', 30, ['bob']), ('Bread', 6, ['__EVERYONE__'])]
+    totals = {'subtotal': 56, 'tax': 5, 'tip': 10, 'extra_fees': 0, 'total': 71}
+    detailed, simple, _ = money_owed(items, 5, 10)
+    key = result_key(simple, detailed, totals)
+    def key_of(result):
+        return result_key(result[1], result[0], totals)
+    assert key == key_of(money_owed(items, 5, 10))
+    assert key != key_of(money_owed(items, 5, 11))
+    assert key != result_key(simple, detailed, dict(totals, tip=11))
+    assert key != key_of(money_owed([('Pizza', 20, ['alice']), *items[1:]], 5, 10))
+    # Plain per-person dicts hash the same way every time
+    plain = {person: dict(details) for person, details in detailed.items()}
+    assert result_key(simple, plain, totals) == result_key(simple, plain, dict(totals))
+
+    cache = LRUCache(max_bytes=10_000, max_entries=4)
+    renders = []
+    def render(kind):
+        renders.append(kind)
+        return f"{kind} report"
+    assert cache.get((key, "pdf")) is None
+    assert cache.get_or_create((key, "pdf"), lambda: render("pdf")) == "pdf report"
+    assert cache.get_or_create((key, "pdf"), lambda: render("pdf")) == "pdf report"
+    assert cache.get((key, "pdf")) == "pdf report"
+    cache.get_or_create((key, "text"), lambda: render("text"))
+    assert renders == ["pdf", "text"]
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 2
+    print("✅ Reports are cached by result hash!")
+
+def main():
+    """Run the cache tests"""
+    test_upload_cache_reuses_parses_and_evicts_lru()
+    test_reports_are_cached_by_result_hash()
+
+if __name__ == "__main__":
+    main()
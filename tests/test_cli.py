@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless fairshare command
+"""
+
+import csv
+import io
+import json
+import pathlib
+import sys
+import os
+import tempfile
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare import cli
+from fairshare.cli import make_row_writer, split_files
+from fairshare.core import money_owed
+from fairshare.ingest import read_bill_items
+
+SAMPLE_BILL = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_bill_template.csv')
+
+def test_csv_rows_add_up_to_bill():
+    """The CSV output has one row per person that sums to the bill total"""
+    output = io.StringIO()
+    failures = split_files([SAMPLE_BILL], make_row_writer(output, "csv"), 6.2, 12.4, exact_cents=True)
+    assert failures == 0
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["person"] for row in rows] == ["Alice", "Bob", "Charlie", "David"]
+    assert round(sum(float(row["final_total"]) for row in rows), 2) == 80.6
+    print("✅ CSV rows add up to the bill!")
+
+def test_main_writes_json_lines_and_reports_bad_files(tmp_path):
+    """main writes JSON Lines to a file and exits with 1 if any bill fails"""
+    output_path = os.path.join(tmp_path, "owed.jsonl")
+    stderr = sys.stderr
+    sys.stderr = io.StringIO()
+    try:
+        status = cli.main([SAMPLE_BILL, "missing.csv", "--tax", "5", "--tip", "10", "--format", "jsonl", "-o", output_path])
+        error_output = sys.stderr.getvalue()
+    finally:
+        sys.stderr = stderr
+    with open(output_path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert status == 1
+    assert "missing.csv" in error_output
+    assert len(rows) == 4 and rows[0]["person"] == "Alice"
+    print("✅ JSON Lines written and bad files reported!")
+
+def test_statements_written_per_person_and_bill(tmp_path):
+    """--statements zips a PDF per person; several bills get a folder each"""
+    import zipfile
+
+    zip_path = os.path.join(tmp_path, "statements.zip")
+    stderr = sys.stderr
+    sys.stderr = io.StringIO()
+    try:
+        status = cli.main([SAMPLE_BILL, "--tax", "5", "--tip", "10", "--statements", zip_path, "-o", os.devnull])
+        with zipfile.ZipFile(zip_path) as archive:
+            names = sorted(archive.namelist())
+    finally:
+        sys.stderr = stderr
+    assert status == 0
+    assert names == ["Alice.pdf", "Bob.pdf", "Charlie.pdf", "David.pdf"]
+
+    result = money_owed([('Pizza', 20, ['alice'])], 0, 0)
+    folders = cli.statement_folders({"bills/a.csv": result, "x/a.csv": result, "b.xlsx:Lunch": result})
+    assert list(folders) == ["a_csv", "a_csv (2)", "b_xlsx_Lunch"]
+    print("✅ Statements written per person and bill!")
+
+def test_text_format_writes_a_report_per_bill():
+    """--format text streams the same report as the app's text download, one per bill"""
+    from fairshare.report import write_text_report
+
+    output = io.StringIO()
+    failures = split_files([SAMPLE_BILL, SAMPLE_BILL], None, 5, 10,
+                           on_bill=cli.make_text_bill_writer(output, 5, 10))
+    detailed_result, simple_result, subtotal = money_owed(read_bill_items(SAMPLE_BILL), 5, 10)
+    expected = io.StringIO()
+    write_text_report(expected, simple_result, detailed_result,
+                      {'subtotal': subtotal, 'tax': 5, 'tip': 10, 'extra_fees': 0.0, 'discount': 0.0,
+                       'total': subtotal + 15}, title=SAMPLE_BILL)
+    assert failures == 0
+    assert output.getvalue() == expected.getvalue() + "\n" + expected.getvalue()
+    print("✅ Text format writes a report per bill!")
+
+def main():
+    """Run the command-line tests"""
+    test_csv_rows_add_up_to_bill()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_main_writes_json_lines_and_reports_bad_files(pathlib.Path(tmp_dir))
+        test_statements_written_per_person_and_bill(pathlib.Path(tmp_dir))
+    test_text_format_writes_a_report_per_bill()
+
+if __name__ == "__main__":
+    main()
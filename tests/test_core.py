@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the fairshare.core split engine
+"""
+
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.core import (
+    IncrementalSplit,
+    calculate_total_bill,
+    money_owed,
+    money_owed_batch,
+    normalize_names_bulk,
+    normalize_names_list,
+    to_cents,
+)
+
+ITEMS = [
+    ("Pizza", 20, ["alice", "Bob"]),
+    ("Pasta", 15, ["ALICE"]),
+    ("Salad", 10, ["bob, charlie"]),
+    ("Wine", 30, ["Charlie", "Charlie", "alice"]),
+    ("Bread", 6, ["__EVERYONE__"]),
+    ("Nobody", 4, [])
+]
+
+def test_money_owed_splits_servings_and_everyone_items():
+    """Servings, comma-separated names and the everyone marker are resolved"""
+    detailed_result, simple_result, subtotal = money_owed(ITEMS, 8.0, 12.0, 2.0, 4.0)
+
+    assert list(simple_result) == ["Alice", "Bob", "Charlie"]
+    assert subtotal == 81
+    assert detailed_result["Alice"]["subtotal_before_tax_tip"] == 37.0
+    assert detailed_result["Charlie"]["subtotal_before_tax_tip"] == 27.0
+    assert ("Bread", 2.0, 3) in detailed_result["Bob"]["items_eaten"]
+    assert abs(sum(simple_result.values()) - (81 + 8 + 12 + 2 - 4)) < 0.02
+    print("✅ Python engine split is correct!")
+
+def test_engines_agree():
+    """The numpy engine returns the same breakdown as the python engine"""
+    for exact_cents in (False, True):
+        python_result = money_owed(ITEMS, 8.13, 12.07, 2.5, 4.99, exact_cents=exact_cents)
+        numpy_result = money_owed(ITEMS, 8.13, 12.07, 2.5, 4.99, engine="numpy", exact_cents=exact_cents)
+        assert python_result[1] == numpy_result[1]
+        assert abs(python_result[2] - numpy_result[2]) < 1e-9
+        for person, details in python_result[0].items():
+            numpy_details = numpy_result[0][person]
+            assert [item for item, _, _ in details['items_eaten']] == [item for item, _, _ in numpy_details['items_eaten']]
+            for field in ('subtotal_before_tax_tip', 'percentage_of_bill', 'tax_amount', 'tip_amount',
+                          'extra_fees_amount', 'discount_amount', 'final_total'):
+                assert details[field] == numpy_details[field], (person, field)
+    print("✅ Python and numpy engines agree!")
+
+def test_exact_cents_adds_up_to_bill():
+    """Per-person totals add up to calculate_total_bill's total to the cent"""
+    items = ITEMS[:-1]
+    for engine in ("python", "numpy"):
+        _, simple_result, _ = money_owed(items, 7.77, 11.11, 1.01, 3.33, engine=engine, exact_cents=True)
+        _, total_bill = calculate_total_bill(items, 7.77, 11.11, 1.01, 3.33)
+        assert sum(to_cents(amount) for amount in simple_result.values()) == to_cents(total_bill), engine
+    print("✅ Exact cents totals match the bill!")
+
+def test_money_owed_accepts_generators():
+    """Items can be streamed from a generator"""
+    streamed = money_owed((item for item in ITEMS), 8.0, 12.0)
+    assert streamed[1] == money_owed(ITEMS, 8.0, 12.0)[1]
+    print("✅ Generator input works!")
+
+def test_money_owed_batch_keeps_input_order():
+    """Batch results come back in input order, in-process and across a pool"""
+    bills = [(ITEMS[:count], 1.0 * count, 2.0) for count in range(1, len(ITEMS))]
+    expected = [money_owed(*bill) for bill in bills]
+    assert money_owed_batch(bills, workers=1) == expected
+    assert money_owed_batch(bills, workers=2, chunk_items=3) == expected
+    print("✅ Batch results are in input order!")
+
+def test_incremental_split_matches_money_owed():
+    """Adding, removing, ignoring and restoring items keeps the split in step"""
+    split = IncrementalSplit()
+    keys = [split.add_item(*item) for item in ITEMS]
+    split.ignore_item(keys[1])
+    split.remove_item(keys[3])
+    split.ignore_item(keys[2])
+    split.restore_item(keys[2])
+    active_items = [ITEMS[0], ITEMS[2], ITEMS[4], ITEMS[5]]
+
+    detailed_result, simple_result, subtotal = split.result(8.0, 12.0, 2.0, 4.0)
+    expected_detailed, expected_simple, expected_subtotal = money_owed(active_items, 8.0, 12.0, 2.0, 4.0)
+    assert simple_result == expected_simple
+    assert abs(subtotal - expected_subtotal) < 1e-9
+    for person, details in expected_detailed.items():
+        assert sorted(detailed_result[person]['items_eaten']) == sorted(details['items_eaten'])
+    assert split.totals(8.0, 12.0, 2.0, 4.0) == expected_simple
+    print("✅ Incremental split matches money_owed!")
+
+def test_bulk_normalization_matches_per_item():
+    """normalize_names_bulk gives the same names as normalize_names_list"""
+    raw_entries = ["scott, callie", "  JOHN  ", None, "Scott,Callie", "", " , mary", 7]
+    expected = [tuple(normalize_names_list([entry])) for entry in raw_entries]
+    assert normalize_names_bulk(raw_entries) == expected
+    try:
+        import pandas as pd
+    except ImportError:
+        return
+    assert normalize_names_bulk(pd.Series(raw_entries)) == expected
+    print("✅ Bulk normalization matches!")
+
+def main():
+    """Run the core engine tests"""
+    test_money_owed_splits_servings_and_everyone_items()
+    test_engines_agree()
+    test_exact_cents_adds_up_to_bill()
+    test_money_owed_accepts_generators()
+    test_money_owed_batch_keeps_input_order()
+    test_incremental_split_matches_money_owed()
+    test_bulk_normalization_matches_per_item()
+
+if __name__ == "__main__":
+    main()
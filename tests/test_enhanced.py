@@ -11,7 +11,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 # Import the enhanced function from the scripts folder
-from enhanced_functions import money_owed_enhanced, calculate_total_bill
+from enhanced_functions import money_owed_enhanced, calculate_total_bill, allocate_cents, to_cents
 
 def test_enhanced_functionality():
     """Test the enhanced bill splitting functionality"""
@@ -75,5 +75,38 @@ def test_enhanced_functionality():
         import traceback
         traceback.print_exc()
 
+def test_exact_cents_adds_up_to_bill():
+    """Per-person totals in exact_cents mode always add up to the bill total"""
+    items = [
+        ("Pizza", 20, ["Alice", "Bob", "Charlie"]),
+        ("Pasta", 15.01, ["Alice"]),
+        ("Salad", 10, ["Bob", "Charlie", "Charlie"]),
+        ("Drinks", 5.55, ["Charlie", "Alice", "Bob"])
+    ]
+    tax_amount = 10.97
+    tip_amount = 10.73
+    discount_amount = 3.33
+
+    detailed_result, simple_result, subtotal = money_owed_enhanced(
+        items, tax_amount, tip_amount, discount_amount, exact_cents=True
+    )
+    subtotal_bill, total_bill = calculate_total_bill(items, tax_amount, tip_amount, discount_amount)
+
+    assert to_cents(subtotal) == to_cents(subtotal_bill)
+    assert sum(to_cents(amount) for amount in simple_result.values()) == to_cents(total_bill)
+    for person, details in detailed_result.items():
+        expected = (to_cents(details['subtotal_before_tax_tip']) + to_cents(details['tax_amount'])
+                    + to_cents(details['tip_amount']) - to_cents(details['discount_amount']))
+        assert to_cents(details['final_total']) == expected, person
+    print("✅ Exact cents totals match the bill!")
+
+def test_allocate_cents_largest_remainder():
+    """Leftover pennies go to the largest remainders, ties to the earliest share"""
+    assert allocate_cents(100, [1, 1, 1]) == [34, 33, 33]
+    assert allocate_cents(10, [1, 2]) == [3, 7]
+    assert allocate_cents(5, [0, 0]) == [0, 0]
+
 if __name__ == "__main__":
     test_enhanced_functionality()
+    test_exact_cents_adds_up_to_bill()
+    test_allocate_cents_largest_remainder()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for reading bill files into serving tables
+"""
+
+import io
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.core import money_owed
+from fairshare.validate import BillValidationError, CellError
+from fairshare.ingest import (
+    long_serving_table,
+    read_bill_items,
+    read_bill_table,
+    split_serving_table,
+    stream_csv_serving_table,
+    wide_serving_table,
+)
+
+SAMPLE_BILL = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_bill_template.csv')
+
+def test_read_bill_items_counts_marks_as_servings():
+    """✓ marks count as one serving and blank cells are skipped"""
+    items = read_bill_items(SAMPLE_BILL)
+    assert items[0] == ("Pizza", 20.0, ["Alice", "Bob"])
+    assert items[-1] == ("Dessert", 12.0, ["Alice", "Bob", "Charlie", "David"])
+    print("✅ Bill file read correctly!")
+
+def test_serving_table_matches_money_owed():
+    """Counts, marks and shared column headers split like the item list does"""
+    import pandas as pd
+    df = pd.DataFrame({
+        'Item': ['Pizza', 'Wine', 'Bread', 'Water'],
+        'amount': [20.0, 30.0, 6.0, 2.0],
+        'alice': ['✓', 2, None, -1],
+        'Scott, Callie': [None, '1', 'x', None],
+        'Bob': [1.9, None, None, 0],
+    })
+    table = wide_serving_table(df)
+    assert table.people == ['Alice', 'Bob', 'Scott', 'Callie']
+    assert table.item_names == ['Pizza', 'Wine', 'Bread']
+    assert table.servings.tolist() == [1, 1, 2, 1, 1, 1, 1]
+    expected = money_owed([
+        ('Pizza', 20.0, ['alice', 'Bob']),
+        ('Wine', 30.0, ['alice', 'alice', 'Scott, Callie']),
+        ('Bread', 6.0, ['Scott, Callie']),
+    ], 5, 10)
+    detailed_result, simple_result, subtotal = split_serving_table(table, 5, 10)
+    assert simple_result == expected[1] and subtotal == expected[2]
+    assert dict(detailed_result['Scott']) == dict(expected[0]['Scott'])
+    print("✅ Serving table matches money_owed!")
+
+def test_streamed_csv_matches_whole_file():
+    """Reading a CSV two rows at a time gives the same table and reports progress"""
+    progress = []
+    streamed = stream_csv_serving_table(SAMPLE_BILL, chunk_rows=2, progress=lambda *args: progress.append(args))
+    whole = wide_serving_table(read_bill_table(SAMPLE_BILL))
+    assert streamed.people == whole.people and streamed.item_names == whole.item_names
+    assert streamed.item_index.tolist() == whole.item_index.tolist()
+    assert streamed.person_index.tolist() == whole.person_index.tolist()
+    assert [rows for rows, _, _ in progress] == [2, 4, 5]
+    assert progress[-1][1] == progress[-1][2] == os.path.getsize(SAMPLE_BILL)
+    print("✅ Streamed CSV matches the whole file!")
+
+def test_long_format_matches_person_columns():
+    """One row per person per item splits like the person-column layout, in any chunk size"""
+    import pandas as pd
+    long_csv = (
+        "Item,amount,Person,Servings\n"
+        "Pizza,20,Alice,\n"
+        "Pizza,20,Bob,1\n"
+        "Wine,30,Bob,0\n"
+        "Wine,30,Alice,2\n"
+        "Wine,30,Carol,1\n"
+        "Bread,6,Carol,1\n"
+        "Bread,6,Alice,1\n"
+    )
+    wide = wide_serving_table(pd.DataFrame({
+        'Item': ['Pizza', 'Wine', 'Bread'],
+        'amount': [20.0, 30.0, 6.0],
+        'Alice': ['✓', 2, 1],
+        'Bob': [1, None, None],
+        'Carol': [None, 1, 1],
+    }))
+    whole = long_serving_table(pd.read_csv(io.StringIO(long_csv)))
+    streamed = stream_csv_serving_table(io.BytesIO(long_csv.encode("utf-8")), chunk_rows=2)
+    for table in (whole, streamed):
+        assert table.people == wide.people == ['Alice', 'Bob', 'Carol']
+        assert table.item_names == wide.item_names
+        assert split_serving_table(table, 5, 10)[1] == split_serving_table(wide, 5, 10)[1]
+    print("✅ Long-format bills match person columns!")
+
+def test_line_ids_keep_pos_lines_apart():
+    """Same item and amount on separate POS lines are separate items; without line ids a repeat is rejected"""
+    lines_csv = "Item,amount,Person,Line\nBeer,5,alice,L1\nBeer,5,bob,L2\nBeer,5,bob,L3\nNachos,9,alice,L4\nNachos,9,bob,L4\n"
+    expected = money_owed([('Beer', 5, ['alice']), ('Beer', 5, ['bob']), ('Beer', 5, ['bob']),
+                           ('Nachos', 9, ['alice', 'bob'])], 2, 3)
+    for chunk_rows in (2, 100):
+        table = stream_csv_serving_table(io.BytesIO(lines_csv.encode("utf-8")), chunk_rows=chunk_rows)
+        assert table.item_names == ['Beer', 'Beer', 'Beer', 'Nachos']
+        detailed_result, simple_result, subtotal = split_serving_table(table, 2, 3)
+        assert simple_result == expected[1] and subtotal == expected[2] == 24
+
+    # A repeat is caught even when the item runs across a chunk boundary
+    repeated_csv = "Item,amount,Person\nBeer,5,alice\nBeer,5,bob\nBeer,5,Alice\nNachos,9,bob\n"
+    for chunk_rows in (1, 2, 100):
+        try:
+            stream_csv_serving_table(io.BytesIO(repeated_csv.encode("utf-8")), chunk_rows=chunk_rows)
+            assert False, "repeated person was merged into one item"
+        except BillValidationError as e:
+            assert e.errors == [CellError(4, 'Person', 'Alice', e.errors[0].message)]
+            assert "Line column" in e.errors[0].message
+    print("✅ Line ids keep POS lines apart!")
+
+def test_header_only_csv_gives_empty_table():
+    """A bill with a header and no rows reads as an empty table in either layout"""
+    for header in ("Item,amount,Person,Servings\n", "Item,amount,Alice,Bob\n"):
+        table = stream_csv_serving_table(io.BytesIO(header.encode("utf-8")))
+        assert table.item_names == [] and table.people == [] and len(table.servings) == 0
+        assert split_serving_table(table, 5, 10)[1] == {}
+    print("✅ Header-only CSV gives an empty table!")
+
+def main():
+    """Run the bill ingestion tests"""
+    test_read_bill_items_counts_marks_as_servings()
+    test_serving_table_matches_money_owed()
+    test_streamed_csv_matches_whole_file()
+    test_long_format_matches_person_columns()
+    test_line_ids_keep_pos_lines_apart()
+    test_header_only_csv_gives_empty_table()
+
+if __name__ == "__main__":
+    main()
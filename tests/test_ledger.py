@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for splitting several bills into a trip ledger
+"""
+
+import threading
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.core import money_owed
+from fairshare.ledger import split_bills, trip_ledger, unique_bill_names
+
+def test_trip_bills_split_concurrently_into_one_ledger():
+    """Bills split on threads at the same time and total per person"""
+    bills = {
+        'lunch.csv': [('Pizza', 20.0, ['Alice', 'Bob'])],
+        'dinner.csv': [('Wine', 30.0, ['bob', 'Carol'])],
+        'taxi.csv': [('Ride', 12.0, ['Alice'])],
+        'bad.csv': None,
+    }
+    # Every split waits here until all four are running, so a serial split breaks the barrier
+    all_running = threading.Barrier(len(bills), timeout=10)
+    def split_bill(items):
+        all_running.wait()
+        if items is None:
+            raise ValueError("unreadable")
+        return money_owed(items, 1, 2)
+    bill_results, failures = split_bills(bills, split_bill, workers=4)
+    assert list(bill_results) == ['lunch.csv', 'dinner.csv', 'taxi.csv']
+    assert list(failures) == ['bad.csv'] and isinstance(failures['bad.csv'], ValueError)
+
+    ledger = trip_ledger(bill_results)
+    assert ledger['Bob']['bills'] == 2
+    assert ledger['Bob']['by_bill'] == {'lunch.csv': bill_results['lunch.csv'][1]['Bob'],
+                                        'dinner.csv': bill_results['dinner.csv'][1]['Bob']}
+    assert ledger['Alice']['final_total'] == round(sum(ledger['Alice']['by_bill'].values()), 2)
+    assert unique_bill_names(['a.csv', 'b.csv', 'a.csv']) == ['a.csv', 'b.csv', 'a.csv (2)']
+    print("✅ Trip bills split concurrently into one ledger!")
+
+def main():
+    """Run the trip ledger tests"""
+    test_trip_bills_split_concurrently_into_one_ledger()
+
+if __name__ == "__main__":
+    main()
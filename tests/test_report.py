@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script for the bill breakdown reports
+"""
+
+import io
+import json
+import pathlib
+import re
+import sys
+import tempfile
+import zipfile
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.core import money_owed
+from fairshare.export import ALLOCATION_FIELDS, export_bytes, export_columns, parquet_available, write_export
+from fairshare.report import (
+    CONSOLE_LAYOUT,
+    DESCRIPTION_TEXT_WIDTH,
+    STORY_CHUNK,
+    _table,
+    pdf_styles,
+    person_table_rows,
+    standin_items,
+    statement_names,
+    write_pdf_report,
+    write_person_breakdowns,
+    write_statements_zip,
+    write_text_report,
+)
+
+ITEMS = [
+    ("Pizza", 20.0, ["Alice", "Bob"]),
+    ("Wine", 30.0, ["Bob"]),
+    ("Bread", 6.0, ["__EVERYONE__"]),
+]
+
+def bill_totals(subtotal, tax_amount, tip_amount, discount_amount=0.0):
+    return {'subtotal': subtotal, 'tax': tax_amount, 'tip': tip_amount, 'extra_fees': 0.0,
+            'discount': discount_amount, 'total': subtotal + tax_amount + tip_amount - discount_amount}
+
+class CountingStream(io.StringIO):
+    """StringIO that counts write calls"""
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+def test_text_report_streams_one_write_per_person():
+    """The text report matches the expected lines and writes each person at once"""
+    detailed_result, simple_result, subtotal = money_owed(ITEMS, 5, 10, discount_amount=2)
+    stream = CountingStream()
+    write_text_report(stream, simple_result, detailed_result, bill_totals(subtotal, 5, 10, 2))
+    text = stream.getvalue()
+    assert text.startswith("=" * 60 + "\nFAIR SHARE BILL SPLITTER - BREAKDOWN\n")
+    assert "\nTOTALS:\n" in text and "Discount: -$2.00\n" in text and "TOTAL: $69.00\n" in text
+    bob = text[text.index("\nBOB:\n"):]
+    assert bob.splitlines()[2:6] == ["  Items eaten:", "    • 1/2 of Pizza: $10.00", "    • Wine: $30.00",
+                                     "    • 1/2 of Bread: $3.00"]
+    assert bob.endswith(f"  FINAL TOTAL: ${simple_result['Bob']:.2f}\n")
+    # Heading writes plus a summary line and one breakdown write per person, however many lines it has
+    heading_writes = stream.writes - 2 * len(detailed_result)
+    stream = CountingStream()
+    many, simple_many, subtotal_many = money_owed(standin_items(300), 30, 60, discount_amount=2)
+    write_text_report(stream, simple_many, many, bill_totals(subtotal_many, 30, 60, 2))
+    assert stream.writes == heading_writes + 2 * len(many)
+
+    console = io.StringIO()
+    write_person_breakdowns(console, detailed_result, CONSOLE_LAYOUT)
+    assert f"\n📋 Bob - ${simple_result['Bob']:.2f}\n   Items eaten:\n   • 1/2 of Pizza: $10.00\n" in console.getvalue()
+    print("✅ Text report streams one write per person!")
+
+def test_person_table_lists_items_and_charges():
+    """Each breakdown becomes one table from the person's header to their final total"""
+    detailed_result, simple_result, _ = money_owed(ITEMS, 5, 10, discount_amount=2)
+    rows = person_table_rows("Bob", detailed_result["Bob"])
+    assert rows[0] == ["Bob", "Amount"]
+    assert ["1/2 of Pizza", "$10.00"] in rows and ["Wine", "$30.00"] in rows and ["1/2 of Bread", "$3.00"] in rows
+    assert rows[-2][0].startswith("Discount") and rows[-2][1].startswith("-$")
+    assert rows[-1] == ["Final Total", f"${simple_result['Bob']:.2f}"]
+    assert pdf_styles() is pdf_styles()
+    print("✅ Person tables list items and charges!")
+
+def test_long_descriptions_wrap_inside_their_column():
+    """Item and person names too wide for the description column wrap instead of running over the amounts"""
+    from reportlab.platypus import Paragraph
+    long_item = "Chef's tasting platter of hand-rolled pork and chive dumplings with three house dipping sauces"
+    long_person = "Maximiliana Alexandrovna Featherstonehaugh-Worthington of the Accounts Payable Team"
+    detailed_result, _, _ = money_owed([(long_item, 40.0, [long_person, "Bob"])], 0, 0)
+    person = next(iter(detailed_result))
+    table = _table(person_table_rows(person, detailed_result[person]), pdf_styles()['person'])
+    header, item, *charges = table._cellvalues
+    assert isinstance(header[0], Paragraph) and header[1] == "Amount"
+    assert isinstance(item[0], Paragraph) and item[1] == "$20.00"
+    assert all(isinstance(description, str) for description, _ in charges)
+    for paragraph in (header[0], item[0]):
+        width, height = paragraph.wrap(DESCRIPTION_TEXT_WIDTH, 1000)
+        assert len(paragraph.blPara.lines) > 1 and max(paragraph.getActualLineWidths0()) <= DESCRIPTION_TEXT_WIDTH
+    print("✅ Long descriptions wrap inside their column!")
+
+def test_pdf_report_writes_every_person(tmp_path):
+    """Reports larger than one story chunk come out whole, to a stream or a file"""
+    people = STORY_CHUNK
+    items = standin_items(people, items_per_person=4)
+    detailed_result, simple_result, subtotal = money_owed(items, 40, 80)
+    output = io.BytesIO()
+    stats = write_pdf_report(simple_result, detailed_result, bill_totals(subtotal, 40, 80), output)
+    pdf = output.getvalue()
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+    assert stats.people == len(detailed_result) and stats.pages > 1
+    assert len(re.findall(rb"/Type /Page\b", pdf)) == stats.pages
+    # Pages are only deflated, without changing reportlab's setting for other documents
+    from reportlab import rl_config
+    assert b"ASCII85Decode" not in pdf and rl_config.useA85
+
+    # Plain per-person dicts work as well as SplitResult
+    plain = {person: dict(details) for person, details in money_owed(ITEMS, 5, 10)[0].items()}
+    path = os.path.join(tmp_path, "report_test.pdf")
+    stats = write_pdf_report({"Alice": 1.0}, plain, bill_totals(56, 5, 10), path)
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+    assert stats.people == 2 and stats.pages >= 1
+    print(f"✅ PDF report wrote {people} people at {stats.pages_per_second:.0f} pages/s!")
+
+def test_statements_zip_has_one_pdf_per_person():
+    """Statements rendered on a pool land in the archive under safe, unique names, in a fixed order"""
+    assert statement_names(["Alice", "A/B", "A&B", " "]) == ["Alice.pdf", "A_B.pdf", "A_B (2).pdf", "unnamed.pdf"]
+    detailed_result, _, _ = money_owed(standin_items(40, items_per_person=3), 12, 24)
+    lunch, _, _ = money_owed(ITEMS, 5, 10)
+    for workers in (1, 2):
+        output = io.BytesIO()
+        stats = write_statements_zip({"dinner": detailed_result, "lunch/": lunch}, output, workers=workers)
+        with zipfile.ZipFile(output) as archive:
+            names = archive.namelist()
+            pdfs = [archive.read(name) for name in names]
+        # Members come in bill order, sorted by person, however many workers render them
+        assert names == sorted(f"dinner/{person}.pdf" for person in detailed_result) + ["lunch/Alice.pdf", "lunch/Bob.pdf"]
+        assert all(pdf.startswith(b"%PDF") for pdf in pdfs)
+        assert stats.people == len(names) and stats.pages >= len(names)
+    print(f"✅ {stats.people} statements zipped at {stats.pages_per_second:.0f} pages/s!")
+
+def test_exports_hold_totals_and_allocation_lines():
+    """People and allocation tables agree with the split, for SplitResult and plain dicts alike"""
+    items = ITEMS + [("Tea", 9.0, ["Alice", "Alice", "Bob"])]
+    detailed_result, simple_result, _ = money_owed(items, 5, 10)
+    people = export_columns(detailed_result, "people")
+    assert list(people['person']) == list(simple_result)
+    assert list(people['final_total']) == list(simple_result.values())
+
+    allocations = export_columns(detailed_result, "allocations")
+    assert list(allocations) == list(ALLOCATION_FIELDS)
+    lines = {(person, item): (int(servings), int(item_servings), float(amount)) for person, item, servings, item_servings, _, amount
+             in zip(*(allocations[field] for field in ALLOCATION_FIELDS))}
+    assert lines[("Alice", "Tea")] == (2, 3, 6.0) and lines[("Bob", "Tea")] == (1, 3, 3.0)
+    assert lines[("Alice", "Bread")] == (1, 2, 3.0) and lines[("Bob", "Wine")] == (1, 1, 30.0)
+    for person, details in detailed_result.items():
+        person_lines = [amount for (name, _), (_, _, amount) in lines.items() if name == person]
+        assert abs(sum(person_lines) - details['subtotal_before_tax_tip']) < 0.01 * len(person_lines)
+
+    plain = {person: dict(details) for person, details in detailed_result.items()}
+    for file_format in ("csv", "jsonl"):
+        assert export_bytes(plain, file_format, "people") == export_bytes(detailed_result, file_format, "people")
+        # Items shared with everyone come last in a plain breakdown, so only the set of lines is the same
+        assert (sorted(export_bytes(plain, file_format, "allocations").splitlines())
+                == sorted(export_bytes(detailed_result, file_format, "allocations").splitlines()))
+    rows = [json.loads(line) for line in export_bytes(detailed_result, "jsonl", "people").decode().splitlines()]
+    assert [row['person'] for row in rows] == list(simple_result)
+    assert export_bytes(detailed_result, "csv", "allocations").decode().splitlines()[0] == ",".join(ALLOCATION_FIELDS)
+
+    many, _, _ = money_owed(standin_items(500), 30, 60)
+    assert len(export_columns(many, "people")['person']) == len(many)
+    if parquet_available():
+        output = io.BytesIO()
+        write_export(many, output, "parquet", "allocations")
+        assert output.getvalue().startswith(b"PAR1")
+    else:
+        try:
+            write_export(many, io.BytesIO(), "parquet")
+            assert False, "Parquet export without pyarrow"
+        except ImportError as e:
+            assert "pyarrow" in str(e)
+    print("✅ Exports hold totals and allocation lines!")
+
+def main():
+    """Run the report tests"""
+    test_text_report_streams_one_write_per_person()
+    test_person_table_lists_items_and_charges()
+    test_long_descriptions_wrap_inside_their_column()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_pdf_report_writes_every_person(pathlib.Path(tmp_dir))
+    test_statements_zip_has_one_pdf_per_person()
+    test_exports_hold_totals_and_allocation_lines()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for filtering rows of large CSV exports
+"""
+
+import pathlib
+import sys
+import os
+import tempfile
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.scan import read_filtered_serving_table, scan_csv
+
+def test_filtered_scan_reads_only_matching_rows(tmp_path):
+    """Rows are picked by exact value and date range, across quoted fields and small blocks"""
+    export = (
+        b'event,when,Item,amount,Person\r\n'
+        b'E1,2024-05-01 19:00,"Soup, hot",8,Ann\r\n'
+        b'E2,2024-05-01 20:00,"Note\nwith E1 newline",5,Bob\r\n'
+        b'"E1",2024-05-02,Bread,4,Cy\r\n'
+        b'E10,2024-05-03,Tea,2,Dee\r\n'
+        b'E1,2024-05-04,Cake,6,Ann'
+    )
+    for block_bytes in (7, 1 << 20):
+        _, runs = scan_csv(export, {'event': 'E1', 'WHEN': ('2024-05-01', '2024-05-02')}, block_bytes)
+        assert [export[start:end] for start, end in runs] == [
+            b'E1,2024-05-01 19:00,"Soup, hot",8,Ann\r\n', b'"E1",2024-05-02,Bread,4,Cy\r\n']
+
+    export_path = os.path.join(tmp_path, "pos_export.csv")
+    with open(export_path, "wb") as f:
+        f.write(export)
+    table = read_filtered_serving_table(export_path, {'event': 'E1'}, block_bytes=16)
+    assert table.item_names == ['Soup, hot', 'Bread', 'Cake']
+    assert table.people == ['Ann', 'Cy']
+    print("✅ Filtered scan reads only matching rows!")
+
+def main():
+    """Run the export scan tests"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_filtered_scan_reads_only_matching_rows(pathlib.Path(tmp_dir))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for saving and restoring partially completed sessions
+"""
+
+import json
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.session import SESSION_MAGIC, dump_session, load_session
+
+ITEMS = [
+    ("Pizza", 20.0, ["Alice", "Bob"]),
+    ("Crème brûlée", 8.5, ["Bob", "Bob"]),
+    ("Bread", 6.0, ["__EVERYONE__"]),
+    ("", 0.0, []),
+]
+
+def test_binary_session_round_trip():
+    """Items, charges and ignored rows come back exactly"""
+    blob = dump_session(ITEMS, item_count=5, charges={'tax': 3.5, 'tip': 7.0}, ignored={2})
+    assert blob.startswith(SESSION_MAGIC)
+    session = load_session(blob)
+    assert session['items'] == ITEMS
+    assert session['item_count'] == 5
+    assert session['charges'] == {'tax': 3.5, 'tip': 7.0}
+    assert session['ignored'] == {2}
+    print("✅ Binary session round trip works!")
+
+def test_json_sessions_still_load():
+    """Session files saved by older versions as JSON are still read"""
+    old_file = json.dumps({'items': [list(item) for item in ITEMS], 'tax': 2.0, 'tip': 4.0}, indent=2)
+    session = load_session(old_file.encode("utf-8"))
+    assert session['items'] == [tuple(item) for item in ITEMS]
+    assert session['item_count'] == len(ITEMS)
+    assert session['charges'] == {'tax': 2.0, 'tip': 4.0}
+    assert session['ignored'] == set()
+    print("✅ JSON sessions still load!")
+
+def main():
+    """Run the session file tests"""
+    test_binary_session_round_trip()
+    test_json_sessions_still_load()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for checking bill tables before they are split
+"""
+
+import io
+import pathlib
+import sys
+import os
+import tempfile
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.cli import make_row_writer, split_files
+from fairshare.ingest import long_serving_table, stream_csv_serving_table, wide_serving_table
+from fairshare.validate import BillValidationError, CellError, validate_bill_table
+
+SAMPLE_BILL = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_bill_template.csv')
+
+def test_bad_cells_are_reported_before_splitting(tmp_path):
+    """Validation names each bad cell by spreadsheet row and column, and rejects the file"""
+    import pandas as pd
+    df = pd.DataFrame({
+        'Item': ['Pizza', None, 'Wine', 'Bread'],
+        'amount': [20.0, 5.0, 'twelve', None],
+        'Alice': ['✓', 'yes', -1, None],
+        'Bob': [1, 'maybe', None, 2],
+    })
+    assert validate_bill_table(df) == [
+        CellError(3, 'Item', None, 'missing item name'),
+        CellError(3, 'Bob', 'maybe', 'unknown mark'),
+        CellError(4, 'amount', 'twelve', 'amount is not a number'),
+        CellError(4, 'Alice', -1, 'negative servings'),
+        CellError(5, 'amount', None, 'missing amount'),
+    ]
+    assert validate_bill_table(pd.read_csv(SAMPLE_BILL)) == []
+
+    # Part servings are rejected rather than truncated to none
+    part_csv = "Item,amount,Alice,Bob\nPizza,10,0.5,1\nWine,30,2.0,inf\n"
+    try:
+        stream_csv_serving_table(io.BytesIO(part_csv.encode("utf-8")))
+        assert False, "part serving was accepted"
+    except BillValidationError as e:
+        assert e.errors == [CellError(2, 'Alice', 0.5, 'servings must be a whole number'),
+                            CellError(3, 'Bob', float('inf'), 'servings must be a whole number')]
+
+    # A bad cell in the third chunk is reported by its row in the file
+    bad_csv = "Item,amount,Alice,Bob\nPizza,20,✓,\nWine,30,1,1\nBread,6,1,\nSoup,8,,-2\n"
+    try:
+        stream_csv_serving_table(io.BytesIO(bad_csv.encode("utf-8")), chunk_rows=2)
+        assert False, "bad bill was accepted"
+    except BillValidationError as e:
+        assert e.errors == [CellError(5, 'Bob', -2, 'negative servings')]
+
+    output = io.StringIO()
+    errors = io.StringIO()
+    bad_path = os.path.join(tmp_path, "bad_bill.csv")
+    with open(bad_path, "w", encoding="utf-8") as f:
+        f.write(bad_csv)
+    failures = split_files([bad_path], make_row_writer(output, "csv"), 5, 10, errors=errors)
+    assert failures == 1
+    assert "bad_bill.csv: row 5, column 'Bob': negative servings (-2.0)" in errors.getvalue()
+    print("✅ Bad cells reported before splitting!")
+
+def test_whitespace_cells_are_blank_when_split():
+    """A cell of spaces passes validation as blank and gives no serving, not one"""
+    import pandas as pd
+    df = pd.DataFrame({'Item': ['Pizza', 'Wine'], 'amount': [20.0, 30.0], 'Alice': ['✓', ' '], 'Bob': ['  ', 2]})
+    assert validate_bill_table(df) == []
+    table = wide_serving_table(df)
+    assert table.item_names == ['Pizza', 'Wine'] and table.people == ['Alice', 'Bob']
+    assert list(zip(table.item_index.tolist(), table.person_index.tolist(), table.servings.tolist())) == [(0, 0, 1), (1, 1, 2)]
+
+    # In long format a blank Servings cell still means one serving
+    long_df = pd.DataFrame({'Item': ['Pizza', 'Pizza'], 'amount': [20.0, 20.0], 'Person': ['Alice', 'Bob'],
+                            'Servings': [' ', 2]})
+    assert validate_bill_table(long_df) == []
+    assert long_serving_table(long_df).servings.tolist() == [1, 2]
+    print("✅ Whitespace cells are blank when split!")
+
+def test_marked_rows_need_an_item_and_amount():
+    """Marks on a row with no item or amount are reported in CSV and Excel bills, and never split"""
+    import openpyxl
+    import pandas as pd
+    from fairshare.workbook import parse_sheet_rows
+    marked_csv = "Item,amount,Alice,Bob\nPizza,10,✓,\n,,✓,\n"
+    expected = [CellError(3, 'Item', None, 'missing item name'), CellError(3, 'amount', None, 'missing amount')]
+    try:
+        stream_csv_serving_table(io.BytesIO(marked_csv.encode("utf-8")))
+        assert False, "marked row without an item was accepted"
+    except BillValidationError as e:
+        assert e.errors == expected
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in (['Item', 'amount', 'Alice', 'Bob'], ['Pizza', 10, '✓', None], [None, None, '✓', None]):
+        sheet.append(row)
+    try:
+        parse_sheet_rows(sheet.iter_rows(values_only=True))
+        assert False, "marked sheet row without an item was accepted"
+    except BillValidationError as e:
+        assert e.errors == expected
+
+    # Unvalidated, the row is skipped rather than splitting a missing amount
+    table = wide_serving_table(pd.read_csv(io.StringIO(marked_csv)))
+    assert table.item_names == ['Pizza'] and table.item_costs == [10.0]
+    assert table.item_index.tolist() == [0] and table.person_index.tolist() == [0]
+    print("✅ Marked rows need an item and amount!")
+
+def main():
+    """Run the bill validation tests"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_bad_cells_are_reported_before_splitting(pathlib.Path(tmp_dir))
+    test_whitespace_cells_are_blank_when_split()
+    test_marked_rows_need_an_item_and_amount()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for splitting multi-sheet Excel workbooks
+"""
+
+import io
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fairshare.core import money_owed
+from fairshare.validate import BillValidationError, CellError
+from fairshare.workbook import parse_sheet_rows, parse_workbook, split_workbook
+
+def test_workbook_sheets_split_as_separate_bills():
+    """Each sheet is its own bill in either layout and the roll-up sums them"""
+    import openpyxl
+    workbook = openpyxl.Workbook()
+    columns_sheet = workbook.active
+    columns_sheet.title = "Lunch"
+    columns_sheet.append(['Item', 'amount', 'Alice', 'Bob'])
+    columns_sheet.append(['Pizza', 20, '✓', 2])
+    names_sheet = workbook.create_sheet("Dinner")
+    names_sheet.append(['Item', 'amount', 'names', None])
+    names_sheet.append(['Pasta', 15, 'alice', None])
+    names_sheet.append(['Wine', 30, 'bob', 'charlie'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    sheet_results, combined = split_workbook(buffer.getvalue(), 3, 6, workers=1)
+    assert list(sheet_results) == ["Lunch", "Dinner"]
+    assert sheet_results["Lunch"][0]['Bob']['subtotal_before_tax_tip'] == 13.33
+    assert sheet_results["Dinner"][1] == money_owed([('Pasta', 15, ['alice']), ('Wine', 30, ['bob', 'charlie'])], 3, 6)[1]
+    assert combined['Alice']['bills'] == 2 and combined['Charlie']['bills'] == 1
+    assert combined['Bob']['final_total'] == round(sheet_results["Lunch"][1]['Bob'] + sheet_results["Dinner"][1]['Bob'], 2)
+    # Sheets parsed on a pool of spawned workers come back the same, in workbook order
+    pooled = parse_workbook(buffer.getvalue(), workers=2)
+    assert list(pooled) == ["Lunch", "Dinner"]
+    assert pooled["Dinner"].people == parse_workbook(buffer.getvalue(), workers=1)["Dinner"].people
+    print("✅ Workbook sheets split as separate bills!")
+
+def test_sheets_are_validated_in_every_layout():
+    """A misnamed header and bad rows of a sheet listing names are reported, not split"""
+    def sheet_errors(rows):
+        try:
+            parse_sheet_rows(rows)
+        except BillValidationError as e:
+            return e.errors
+        assert False, "bad sheet was accepted"
+    assert sheet_errors([('Food', 'amount', 'Alice'), ('Pizza', 20, '✓')]) == [
+        CellError(1, 'Item', None, 'missing column (expected as column 1)')]
+    assert sheet_errors([('Item', 'cost', 'names', None), ('Pasta', 15, 'alice', None)]) == [
+        CellError(1, 'amount', None, 'missing column (expected as column 2)')]
+    assert sheet_errors([
+        ('Item', 'amount', 'names', None),
+        ('Pasta', 'fifteen', 'alice', None),
+        ('Wine', 30, None, None),
+        (None, None, None, None),
+        (None, None, 'bob', 'carol'),
+    ]) == [
+        CellError(2, 'amount', 'fifteen', 'amount is not a number'),
+        CellError(3, 'names', None, 'missing person'),
+        CellError(5, 'Item', None, 'missing item name'),
+        CellError(5, 'amount', None, 'missing amount'),
+    ]
+    # The same row twice is two items in this layout, not a repeated person
+    table = parse_sheet_rows([('Item', 'amount', 'names'), ('Beer', 5, 'alice'), ('Beer', 5, 'alice')])
+    assert table.item_names == ['Beer', 'Beer']
+    print("✅ Sheets are validated in every layout!")
+
+def main():
+    """Run the workbook tests"""
+    test_workbook_sheets_split_as_separate_bills()
+    test_sheets_are_validated_in_every_layout()
+
+if __name__ == "__main__":
+    main()